@@ -6,3 +6,5 @@ class AuthConfig(AppConfig):
     name = 'apps.auth'
     label = 'custom_auth'  # Label unique pour éviter le conflit avec django.contrib.auth
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,117 @@
+"""
+Authentification JWT sans requête en base pour les lectures.
+
+JWTAuthentication charge la ligne User à chaque requête authentifiée. Or le token
+contient déjà user_id, email et is_producer (CustomTokenObtainPairSerializer) :
+
+- lecture (GET, HEAD, OPTIONS) sur une vue déclarant stateless_auth = True :
+  utilisateur construit à partir des claims (TokenUser), aucune requête ;
+- autres cas : utilisateur complet, mis en cache quelques secondes
+  (AUTH_USER_CACHE_TTL) et invalidé à chaque écriture du compte. Le cache des
+  réponses est partagé : l'utilisateur y est stocké sans le hash du mot de passe
+  (champ différé, relu en base par check_password ; save() ne l'écrit pas).
+
+Les tokens révoqués (déconnexion) sont refusés ; la vérification se fait le plus
+souvent sans appel réseau (filtre de Bloom, voir blacklist.py).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .blacklist import token_blacklist
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_KEY = 'auth_user:{user_id}'
+# Champs jamais mis en cache (chargés à la demande)
+USER_CACHE_DEFERRED_FIELDS = ('password',)
+
+
+def invalidate_user_cache(user_id):
+    """Supprime l'utilisateur mis en cache."""
+    try:
+        cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+    except Exception as e:
+        logger.warning(f'Error invalidating user cache for {user_id}: {e}')
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication avec utilisateur issu du token pour les lectures.
+
+    Usage:
+        class ProductViewSet(viewsets.ModelViewSet):
+            stateless_auth = True  # request.user est un TokenUser en lecture
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if jti and token_blacklist.is_revoked(jti):
+            raise InvalidToken('Token is blacklisted')
+
+        if request.method in SAFE_METHODS and self._view_allows_stateless(request):
+            return self.get_token_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    @staticmethod
+    def _view_allows_stateless(request) -> bool:
+        parser_context = getattr(request, 'parser_context', None) or {}
+        return getattr(parser_context.get('view'), 'stateless_auth', False)
+
+    @staticmethod
+    def _get_user_id(validated_token):
+        """Identifiant de l'utilisateur porté par le token."""
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def get_token_user(self, validated_token):
+        """Utilisateur léger porté par les claims du token."""
+        self._get_user_id(validated_token)
+        return TokenUser(validated_token)
+
+    def get_user(self, validated_token):
+        """Utilisateur complet, depuis le cache ou la base."""
+        user = self._get_cached_user(self._get_user_id(validated_token))
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+    def _get_cached_user(self, user_id):
+        """Lit l'utilisateur dans le cache, ou le charge en base et l'y enregistre."""
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        try:
+            user = cache.get(key)
+        except Exception as e:
+            logger.warning(f'Error reading user cache: {e}')
+            user = None
+        if user is not None:
+            return user
+
+        try:
+            user = self.user_model.objects.defer(*USER_CACHE_DEFERRED_FIELDS).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        try:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+        except Exception as e:
+            logger.warning(f'Error writing user cache: {e}')
+        return user
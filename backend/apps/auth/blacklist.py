@@ -0,0 +1,155 @@
+"""
+Liste noire des tokens JWT, stockée dans le cache Redis 'tokens'.
+
+Chaque token révoqué (refresh token après rotation, tokens d'une déconnexion) est
+enregistré sous sa clé jti, avec une durée de vie égale à sa validité restante :
+la liste ne grossit pas indéfiniment, contrairement à l'app token_blacklist.
+
+Chaque processus garde un filtre de Bloom des jti révoqués, complété
+périodiquement depuis un sorted set Redis (jti → date de révocation). Un jti absent
+du filtre n'est pas révoqué : le cas courant est tranché sans appel réseau. Un jti
+présent (révoqué ou faux positif) est vérifié dans Redis. Une révocation faite par
+un autre processus est vue au plus tard après TOKEN_BLOOM_REFRESH_INTERVAL secondes ;
+la rotation des refresh tokens, elle, est atomique (cache.add).
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = 'jti:{jti}'
+REVOKED_INDEX_KEY = 'jti:revoked'
+
+
+def get_tokens_cache():
+    return caches['tokens']
+
+
+def _get_redis_client(cache):
+    """Client Redis du cache s'il s'agit de django-redis, None sinon."""
+    client = getattr(cache, 'client', None)
+    if client is None or not hasattr(client, 'get_client'):
+        return None
+    return client.get_client(write=True)
+
+
+class BloomFilter:
+    """Filtre de Bloom en mémoire (double hachage sur blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklist:
+    """Révocation des tokens par jti, avec pré-vérification locale."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_until = 0.0
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    @property
+    def lifetime(self) -> int:
+        """Durée de conservation de l'index : validité maximale d'un token."""
+        return int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+
+    def revoke(self, jti: str, exp: int) -> bool:
+        """
+        Révoque un token jusqu'à son expiration.
+
+        Returns:
+            False si le token était déjà révoqué (rotation concurrente)
+        """
+        cache = get_tokens_cache()
+        now = time.time()
+        timeout = max(1, int(exp - now))
+        added = cache.add(REVOKED_KEY.format(jti=jti), 1, timeout)
+        if added:
+            redis_client = _get_redis_client(cache)
+            if redis_client is not None:
+                try:
+                    redis_client.zadd(cache.make_key(REVOKED_INDEX_KEY), {jti: now})
+                except Exception as e:
+                    logger.warning(f'Error indexing revoked token: {e}')
+            with self._lock:
+                if self._bloom is not None:
+                    self._bloom.add(jti)
+        return added
+
+    def is_revoked(self, jti: str) -> bool:
+        """Indique si un token est révoqué (sans appel réseau s'il est absent du filtre)."""
+        cache = get_tokens_cache()
+        redis_client = _get_redis_client(cache)
+        if redis_client is not None:
+            self._refresh(cache, redis_client)
+            with self._lock:
+                if self._bloom is not None and jti not in self._bloom:
+                    return False
+        try:
+            return cache.get(REVOKED_KEY.format(jti=jti)) is not None
+        except Exception as e:
+            logger.warning(f'Error checking token blacklist: {e}')
+            return False
+
+    def _refresh(self, cache, redis_client):
+        """Complète le filtre avec les révocations récentes, le reconstruit périodiquement."""
+        now = time.time()
+        interval = getattr(settings, 'TOKEN_BLOOM_REFRESH_INTERVAL', 2)
+        with self._lock:
+            if self._bloom is not None and now - self._checked_at < interval:
+                return
+            self._checked_at = now
+            rebuild = self._bloom is None or now - self._built_at > getattr(settings, 'TOKEN_BLOOM_REBUILD_INTERVAL', 3600)
+            since = 0.0 if rebuild else self._synced_until
+
+        index_key = cache.make_key(REVOKED_INDEX_KEY)
+        try:
+            if rebuild:
+                redis_client.zremrangebyscore(index_key, '-inf', now - self.lifetime)
+            # Marge d'une seconde : révocations horodatées par des processus décalés
+            jtis = redis_client.zrangebyscore(index_key, max(0.0, since - 1), '+inf')
+        except Exception as e:
+            logger.warning(f'Error refreshing token bloom filter: {e}')
+            with self._lock:
+                if rebuild:
+                    # Sans filtre fiable, toutes les vérifications passent par le cache
+                    self._bloom = None
+            return
+
+        with self._lock:
+            if rebuild:
+                capacity = max(getattr(settings, 'TOKEN_BLOOM_CAPACITY', 100000), 2 * len(jtis))
+                self._bloom = BloomFilter(capacity, getattr(settings, 'TOKEN_BLOOM_ERROR_RATE', 0.001))
+                self._built_at = now
+            for jti in jtis:
+                self._bloom.add(jti.decode() if isinstance(jti, bytes) else jti)
+            self._synced_until = now
+
+
+token_blacklist = TokenBlacklist()
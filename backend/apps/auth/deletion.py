@@ -0,0 +1,186 @@
+"""
+Suppression asynchrone des comptes utilisateurs.
+
+La demande de suppression désactive immédiatement le compte (is_active=False,
+deletion_requested_at renseigné). La suppression effective est faite plus tard,
+hors requête, par lots bornés : photos de produits, produits, horaires, modes de
+vente, photos du producteur, profil puis utilisateur. Chaque lot a sa propre
+transaction, les fichiers images sont supprimés après son commit : une
+interruption ne laisse ni lot à moitié supprimé ni ligne sans fichier (au pire
+des fichiers orphelins, repris par gc_media), et un nouveau passage reprend là où
+le précédent s'est arrêté.
+
+Le traitement est fait par la commande process_account_deletions --loop
+(service account-deletions de docker-compose) ou, en développement, par un thread local au processus réveillé
+après chaque demande (ACCOUNT_DELETION_WORKER). Chaque compte est d'abord réservé
+(claim_accounts) : plusieurs workers ne suppriment jamais le même compte.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.producers.cache import invalidate_producer_cache, invalidate_owner_cache
+from apps.producers.models import OpeningHours, ProducerPhoto, ProducerProfile, SaleMode
+from apps.producers.signals import deferred_invalidation
+from apps.products.models import Product, ProductPhoto
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+
+_worker_thread = None
+_worker_wakeup = threading.Event()
+
+
+def request_account_deletion(user):
+    """Désactive le compte et planifie sa suppression."""
+    user.is_active = False
+    user.deletion_requested_at = timezone.now()
+    user.save(update_fields=['is_active', 'deletion_requested_at'])
+    logger.info(f'Account deletion requested for user {user.pk}')
+    if getattr(settings, 'ACCOUNT_DELETION_WORKER', False):
+        transaction.on_commit(wake_worker)
+
+
+def _delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning(f'Could not delete media file {name}: {e}')
+
+
+def _delete_in_batches(queryset, batch_size, file_field=None) -> int:
+    """
+    Supprime les lignes d'un queryset par lots, fichiers compris.
+
+    file_field n'est utilisé que pour les photos (champ content_hash, voir
+    apps.producers.blobs). Les fichiers sont supprimés après le commit du lot.
+
+    Returns:
+        Nombre de lignes supprimées
+    """
+    deleted = 0
+    while True:
+        fields = ('pk', file_field, 'content_hash') if file_field else ('pk',)
+        batch = list(queryset.order_by('pk').values_list(*fields)[:batch_size])
+        if not batch:
+            return deleted
+        # Fichier partagé (content_hash) : libéré par le signal post_delete
+        names = [row[1] for row in batch if row[1] and not row[2]] if file_field else []
+        with transaction.atomic():
+            count, _ = queryset.model.objects.filter(pk__in=[row[0] for row in batch]).delete()
+            if names:
+                transaction.on_commit(lambda names=names: _delete_files(names))
+        deleted += count
+
+
+def delete_user_data(user, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Supprime un compte et toutes ses données. Idempotent.
+
+    Returns:
+        Nombre de lignes supprimées par type
+    """
+    report = {}
+    producer_id = ProducerProfile.objects.filter(user=user).values_list('id', flat=True).first()
+
+    with deferred_invalidation():
+        if producer_id:
+            report['product_photos'] = _delete_in_batches(
+                ProductPhoto.objects.filter(product__producer_id=producer_id), batch_size, 'image_file'
+            )
+            report['products'] = _delete_in_batches(Product.objects.filter(producer_id=producer_id), batch_size)
+            report['opening_hours'] = _delete_in_batches(
+                OpeningHours.objects.filter(sale_mode__producer_id=producer_id), batch_size
+            )
+            report['sale_modes'] = _delete_in_batches(SaleMode.objects.filter(producer_id=producer_id), batch_size)
+            report['producer_photos'] = _delete_in_batches(
+                ProducerPhoto.objects.filter(producer_id=producer_id), batch_size, 'image_file'
+            )
+            ProducerProfile.objects.filter(pk=producer_id).delete()
+        User.objects.filter(pk=user.pk).delete()
+
+    if producer_id:
+        invalidate_producer_cache(producer_id)
+        invalidate_owner_cache(user.pk)
+    logger.info(f'Account {user.pk} deleted: {report}')
+    return report
+
+
+def claim_accounts(limit: int = None) -> list:
+    """
+    Réserve des comptes à supprimer, des plus anciens aux plus récents.
+
+    Une réservation plus vieille que ACCOUNT_DELETION_TIMEOUT (worker interrompu)
+    est reprise.
+
+    Returns:
+        Identifiants des comptes réservés
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'ACCOUNT_DELETION_TIMEOUT', 3600))
+    with transaction.atomic():
+        queryset = User.objects.filter(
+            Q(deletion_started_at__isnull=True) | Q(deletion_started_at__lt=stale),
+            deletion_requested_at__isnull=False,
+        ).order_by('deletion_requested_at')
+        if connection.features.has_select_for_update_skip_locked:
+            # Plusieurs workers : chacun prend des comptes différents
+            queryset = queryset.select_for_update(skip_locked=True)
+        if limit:
+            queryset = queryset[:limit]
+        claimed = list(queryset.values_list('pk', flat=True))
+        if claimed:
+            User.objects.filter(pk__in=claimed).update(deletion_started_at=now)
+    return claimed
+
+
+def process_pending_deletions(batch_size: int = DEFAULT_BATCH_SIZE, limit: int = None) -> int:
+    """
+    Traite les comptes en attente de suppression réservés par ce worker.
+
+    Returns:
+        Nombre de comptes supprimés
+    """
+    claimed = claim_accounts(limit)
+    processed = 0
+    for user in User.objects.filter(pk__in=claimed).order_by('deletion_requested_at'):
+        try:
+            delete_user_data(user, batch_size)
+            processed += 1
+        except Exception as e:
+            # Réservation levée : le compte sera repris au prochain passage
+            User.objects.filter(pk=user.pk).update(deletion_started_at=None)
+            logger.error(f'Error deleting account {user.pk}: {e}', exc_info=True)
+    return processed
+
+
+def wake_worker():
+    """Réveille le thread de suppression, en le démarrant si besoin."""
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=_run_worker, name='account-deletion', daemon=True)
+        _worker_thread.start()
+    _worker_wakeup.set()
+
+
+def _run_worker():
+    """Boucle du thread local : traite les comptes en attente puis se rendort."""
+    interval = getattr(settings, 'ACCOUNT_DELETION_INTERVAL', 300)
+    while True:
+        _worker_wakeup.wait(interval)
+        _worker_wakeup.clear()
+        try:
+            process_pending_deletions()
+        except Exception as e:
+            logger.error(f'Account deletion worker failed: {e}', exc_info=True)
+        finally:
+            connection.close()
@@ -0,0 +1,59 @@
+"""
+Commande Django pour supprimer les comptes en attente de suppression.
+Usage: python manage.py process_account_deletions [--batch-size 200] [--loop --interval 60]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.auth.deletion import DEFAULT_BATCH_SIZE, process_pending_deletions
+from apps.auth.models import User
+
+
+class Command(BaseCommand):
+    help = 'Supprime par lots les comptes désactivés en attente de suppression (données et images)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Nombre de lignes supprimées par transaction (défaut: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Nombre maximal de comptes traités par passage',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Tourner en continu (worker)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Secondes entre deux passages avec --loop (défaut: 60)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            pending = User.objects.filter(deletion_requested_at__isnull=False).count()
+            if pending:
+                self.stdout.write(f'\n🗑️  {pending} compte(s) en attente de suppression...')
+                processed = process_pending_deletions(options['batch_size'], options['limit'])
+                self.stdout.write(self.style.SUCCESS(f'✅ {processed} compte(s) supprimé(s)'))
+                failed = min(pending, options['limit'] or pending) - processed
+                if failed > 0:
+                    self.stdout.write(self.style.WARNING(
+                        f'⚠ {failed} compte(s) non supprimé(s) (échec, repris au prochain passage, '
+                        f'ou réservé par un autre worker)'
+                    ))
+            elif not options['loop']:
+                self.stdout.write(self.style.SUCCESS('✅ Aucun compte en attente de suppression'))
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deletion_requested_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_auth', '0002_user_deletion_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deletion_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -7,6 +7,10 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     is_producer = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Suppression demandée : compte désactivé, données supprimées en arrière-plan
+    deletion_requested_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Suppression réservée par un worker (voir deletion.claim_accounts)
+    deletion_started_at = models.DateTimeField(null=True, blank=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -0,0 +1,17 @@
+"""
+Invalidation du cache des utilisateurs (voir authentication.py).
+
+Couvre la modification du profil (me PATCH), le changement de mot de passe et la
+suppression du compte, ainsi que les modifications faites depuis l'admin.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_user_cache
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Le prochain accès relira l'utilisateur en base."""
+    invalidate_user_cache(instance.pk)
@@ -1,11 +1,14 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import register, me, change_password, delete_account, CustomTokenObtainPairView
+from .views import (
+    register, me, logout, change_password, delete_account,
+    CustomTokenObtainPairView, CustomTokenRefreshView
+)
 
 urlpatterns = [
     path('register/', register, name='register'),
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', logout, name='logout'),
     path('me/', me, name='me'),
     path('change-password/', change_password, name='change_password'),
     path('delete-account/', delete_account, name='delete_account'),
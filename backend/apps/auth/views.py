@@ -1,9 +1,14 @@
-from rest_framework import status, generics
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .blacklist import token_blacklist
+from .deletion import request_account_deletion
 from .models import User
 from .serializers import RegisterSerializer, UserSerializer
 
@@ -24,6 +29,65 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
 
 
+class BlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rafraîchissement avec révocation du refresh token dans la liste noire Redis."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        self.check_user(refresh)
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # Atomique : deux rafraîchissements concurrents du même token ne passent pas
+            if not token_blacklist.revoke(jti, refresh['exp']):
+                raise InvalidToken('Token is blacklisted')
+        elif token_blacklist.is_revoked(jti):
+            raise InvalidToken('Token is blacklisted')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+    @staticmethod
+    def check_user(refresh):
+        """Refuse les comptes désactivés ou dont la suppression est demandée."""
+        state = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).values_list('is_active', 'deletion_requested_at').first()
+        if state is None or not state[0] or state[1] is not None:
+            raise AuthenticationFailed('No active account found for the given token.', code='no_active_account')
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    """Vue pour rafraîchir les tokens JWT (rotation avec liste noire)."""
+    serializer_class = BlacklistTokenRefreshSerializer
+    permission_classes = [AllowAny]
+
+
+def revoke_refresh_token(request) -> bool:
+    """
+    Révoque le refresh token du corps de la requête (champ refresh), s'il
+    appartient à l'utilisateur connecté.
+
+    Returns:
+        False si le token fourni est invalide
+    """
+    refresh = request.data.get('refresh')
+    if not refresh:
+        return True
+    try:
+        token = RefreshToken(refresh)
+    except TokenError:
+        return False
+    if token[api_settings.USER_ID_CLAIM] == request.user.pk:
+        token_blacklist.revoke(token[api_settings.JTI_CLAIM], token['exp'])
+    return True
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register(request):
@@ -70,6 +134,22 @@ def me(request):
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    """Révoquer le token d'accès courant et le refresh token fourni."""
+    if request.auth is not None:
+        token_blacklist.revoke(request.auth[api_settings.JTI_CLAIM], request.auth['exp'])
+
+    if not revoke_refresh_token(request):
+        return Response(
+            {'error': 'Refresh token invalide.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({'message': 'Déconnexion réussie.'})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -131,8 +211,12 @@ def delete_account(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     try:
-        user = request.user
-        user.delete()
+        # Désactivation immédiate, suppression des données en arrière-plan
+        request_account_deletion(request.user)
+        if request.auth is not None:
+            token_blacklist.revoke(request.auth[api_settings.JTI_CLAIM], request.auth['exp'])
+        # Refresh token fourni : révoqué aussi (un token invalide ne bloque pas la suppression)
+        revoke_refresh_token(request)
         return Response(
             {'message': 'Compte supprimé avec succès.'},
             status=status.HTTP_200_OK
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ProducerProfile, ProducerPhoto
+from .models import MediaBlob, ProducerProfile, ProducerPhoto
 
 
 class ProducerPhotoInline(admin.TabularInline):
@@ -20,3 +20,8 @@ class ProducerPhotoAdmin(admin.ModelAdmin):
     list_display = ('producer', 'image_file', 'created_at')
     list_filter = ('created_at',)
 
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ref_count', 'size', 'created_at')
+    readonly_fields = ('hash', 'name', 'size', 'ref_count', 'derivatives', 'created_at')
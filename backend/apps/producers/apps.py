@@ -1,7 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ProducersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.producers'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # Préchauffage périodique optionnel du cache (désactivé par défaut)
+        interval = getattr(settings, 'CACHE_WARM_INTERVAL', 0)
+        if interval > 0:
+            from .warmup import start_periodic_warmer
+            start_periodic_warmer(interval)
@@ -0,0 +1,203 @@
+"""
+Stockage des photos adressé par contenu.
+
+Le fichier original est haché (SHA-256) par blocs et enregistré une seule fois sous
+photos/<2 premiers caractères>/<hash>.<ext>, quel que soit le nombre de photos
+(producteurs ou produits) qui le référencent. MediaBlob compte les références :
+le fichier et ses déclinaisons sont supprimés avec la dernière photo.
+
+Les déclinaisons et le placeholder sont rattachés au blob : une photo dont le
+contenu est déjà connu les reprend sans repasser par le traitement.
+
+Les photos antérieures (content_hash vide) gardent leur fichier propre ; la
+commande dedupe_photos les convertit.
+"""
+import hashlib
+import logging
+import os
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .images import delete_derivatives
+from .models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'photos'
+
+
+def hash_file(file) -> tuple:
+    """
+    Hache un fichier par blocs, sans le charger en mémoire.
+
+    Returns:
+        (hash hexadécimal, taille en octets)
+    """
+    # Upload déjà haché pendant la réception (uploadhandlers.py)
+    digest = getattr(file, 'content_hash', None)
+    if digest and getattr(file, 'size', None) is not None:
+        return digest, file.size
+
+    hasher = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        hasher.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return hasher.hexdigest(), size
+
+
+def blob_name(digest: str, original_name: str) -> str:
+    ext = os.path.splitext(original_name or '')[1].lower() or '.jpg'
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{ext}'
+
+
+def acquire_blob(file, original_name: str) -> MediaBlob:
+    """
+    Référence le blob correspondant au contenu du fichier, en le créant si besoin.
+
+    À appeler dans la transaction qui crée la photo : le compteur suit son sort.
+    """
+    digest, size = hash_file(file)
+    if MediaBlob.objects.filter(hash=digest).update(ref_count=F('ref_count') + 1):
+        return MediaBlob.objects.get(hash=digest)
+
+    name = default_storage.save(blob_name(digest, original_name), file)
+    return _create_blob(digest, name, size, 1)
+
+
+def acquire_blobs(uploads, executor=None) -> list:
+    """
+    acquire_blob pour plusieurs fichiers (upload groupé, bulk_create sans pre_save).
+
+    Un même contenu présent plusieurs fois n'est écrit qu'une fois ; les nouveaux
+    fichiers sont écrits en parallèle si un executor est fourni.
+
+    Args:
+        uploads: liste de (fichier, nom d'origine)
+
+    Returns:
+        Blobs dans l'ordre des fichiers
+    """
+    hashed = [hash_file(file) for file, _ in uploads]
+    counts = Counter(digest for digest, _ in hashed)
+    known = set(MediaBlob.objects.filter(hash__in=counts).values_list('hash', flat=True))
+    for digest in known:
+        MediaBlob.objects.filter(hash=digest).update(ref_count=F('ref_count') + counts[digest])
+
+    # Premier fichier de chaque nouveau contenu
+    first = {}
+    for index, (digest, _) in enumerate(hashed):
+        if digest not in known:
+            first.setdefault(digest, index)
+
+    def store(index):
+        file, original_name = uploads[index]
+        return default_storage.save(blob_name(hashed[index][0], original_name), file)
+
+    names = list((executor.map if executor else map)(store, first.values()))
+    for (digest, index), name in zip(first.items(), names):
+        _create_blob(digest, name, hashed[index][1], counts[digest])
+
+    blobs = MediaBlob.objects.in_bulk(list(counts))
+    return [blobs[digest] for digest, _ in hashed]
+
+
+def _create_blob(digest: str, name: str, size: int, count: int) -> MediaBlob:
+    try:
+        with transaction.atomic():
+            return MediaBlob.objects.create(hash=digest, name=name, size=size, ref_count=count)
+    except IntegrityError:
+        # Même contenu enregistré en parallèle : on garde le premier fichier
+        default_storage.delete(name)
+        MediaBlob.objects.filter(hash=digest).update(ref_count=F('ref_count') + count)
+        return MediaBlob.objects.get(hash=digest)
+
+
+def release_blob(digest: str):
+    """
+    Retire une référence ; supprime le blob à la dernière.
+
+    Les fichiers (original et déclinaisons) sont effacés après le commit.
+    """
+    with transaction.atomic():
+        MediaBlob.objects.filter(hash=digest).update(ref_count=F('ref_count') - 1)
+        blob = MediaBlob.objects.select_for_update().filter(hash=digest, ref_count__lte=0).first()
+        if blob is None:
+            return
+        blob.delete()
+    transaction.on_commit(lambda: _delete_blob_files(blob))
+
+
+def _delete_blob_files(blob):
+    try:
+        default_storage.delete(blob.name)
+    except Exception as e:
+        logger.warning(f'Could not delete blob {blob.name}: {e}')
+    delete_derivatives(blob.derivatives)
+
+
+def known_derivatives(digests) -> dict:
+    """
+    Déclinaisons déjà générées pour ces contenus.
+
+    Un blob décliné avant l'ajout des placeholders n'est pas retenu : le contenu
+    repasse une fois par le traitement.
+
+    Returns:
+        hash → (déclinaisons, placeholder)
+    """
+    digests = [digest for digest in set(digests) if digest]
+    if not digests:
+        return {}
+    rows = (
+        MediaBlob.objects.filter(hash__in=digests)
+        .exclude(derivatives={})
+        .exclude(placeholder='')
+        .values_list('hash', 'derivatives', 'placeholder')
+    )
+    return {digest: (derivatives, placeholder) for digest, derivatives, placeholder in rows}
+
+
+def share_derivatives(digest: str, derivatives: dict, placeholder: str = '') -> tuple:
+    """
+    Rattache des déclinaisons au blob, sauf si un autre traitement l'a déjà fait.
+
+    Returns:
+        (déclinaisons, placeholder) à utiliser (ceux du blob s'ils existaient déjà)
+    """
+    if MediaBlob.objects.filter(hash=digest, derivatives={}).update(derivatives=derivatives, placeholder=placeholder):
+        return derivatives, placeholder
+    existing = MediaBlob.objects.filter(hash=digest).values_list('derivatives', 'placeholder').first()
+    if not existing or not existing[0]:
+        return derivatives, placeholder
+    existing_derivatives, existing_placeholder = existing
+    if existing_derivatives != derivatives:
+        delete_derivatives(derivatives)
+    if not existing_placeholder and placeholder:
+        # Blob décliné avant l'ajout des placeholders
+        MediaBlob.objects.filter(hash=digest, placeholder='').update(placeholder=placeholder)
+        existing_placeholder = placeholder
+    return existing_derivatives, existing_placeholder
+
+
+def replace_derivatives(digest: str, derivatives: dict, placeholder: str = ''):
+    """Remplace les déclinaisons d'un blob et de toutes les photos qui le référencent."""
+    from .processing import get_photo_models
+
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(hash=digest).first()
+        if blob is None:
+            return
+        previous = blob.derivatives
+        blob.derivatives = derivatives
+        blob.placeholder = placeholder
+        blob.save(update_fields=['derivatives', 'placeholder'])
+        for model in get_photo_models():
+            model.objects.filter(content_hash=digest).update(derivatives=derivatives, placeholder=placeholder)
+    if previous and previous != derivatives:
+        transaction.on_commit(lambda: delete_derivatives(previous))
@@ -1,11 +1,28 @@
 """
 Cache service for producers using Redis.
+
+Les réponses sont mises en cache sous leur forme finale (corps JSON rendu,
+éventuellement compressé), accompagnées du content-type et d'un ETag. Un hit
+renvoie directement ces octets, sans repasser par les serializers ni les renderers.
+Les requêtes identiques simultanées partagent un seul calcul.
 """
 import logging
 import hashlib
+from abc import ABC, abstractmethod
+import threading
+import time
+import zlib
+from collections import Counter, namedtuple
 from functools import wraps
 from django.core.cache import cache
 from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 est optionnel, zlib est toujours disponible
+    lz4_frame = None
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +34,244 @@ CACHE_DURATIONS = {
     'categories_list': 3600,    # 1 heure
 }
 
+# Entrée stockée : corps rendu (éventuellement compressé) et métadonnées.
+# fresh_until est un timestamp ; l'entrée reste lisible CACHE_STALE_GRACE secondes
+# de plus pour être servie pendant son recalcul.
+CachedPayload = namedtuple(
+    'CachedPayload', ['version', 'fresh_until', 'status_code', 'content_type', 'etag', 'codec', 'body']
+)
+PAYLOAD_VERSION = 2
+
+# Intervalle de scrutation d'un résultat calculé par un autre worker
+COALESCE_POLL_INTERVAL = 0.02
+
+CODEC_NONE = 'none'
+CODEC_ZLIB = 'zlib'
+CODEC_LZ4 = 'lz4'
+
+# Clé META positionnée par le préchauffage pour forcer le recalcul d'une entrée.
+# Les en-têtes HTTP arrivent préfixés par HTTP_ : un client ne peut pas l'injecter.
+CACHE_REFRESH_META_KEY = 'mpl.cache_refresh'
+
+# Sorted set Redis des URLs les plus demandées (alimente le préchauffage)
+FREQUENCY_KEY = 'cache_warm:frequency'
+FREQUENCY_MAX_ENTRIES = 1000
+FREQUENCY_TTL = 7 * 24 * 3600
+
+# Génération d'une portée de clés (cache sans delete_pattern, voir versioned_scope)
+GENERATION_KEY = 'cache_generation:{scope}'
+
+# Association utilisateur → profil producteur (action me)
+OWNER_CACHE_KEY = 'producer_owner:{user_id}'
+OWNER_CACHE_TIMEOUT = 3600
+
+# Espaces de noms des métriques, par préfixe de clé de cache
+METRICS_KEY_PREFIX = 'cache_metrics'
+METRIC_NAMESPACES = {
+    'producers_list': 'producers_list',
+    'producers_nearby': 'nearby',
+    'producer_detail': 'detail',
+    'categories_list': 'categories',
+}
+
+
+def get_redis_client():
+    """Retourne le client Redis brut du cache par défaut, ou None (DummyCache, LocMem)."""
+    client = getattr(cache, 'client', None)
+    if client is None or not hasattr(client, 'get_client'):
+        return None
+    try:
+        return client.get_client(write=True)
+    except Exception as e:
+        logger.warning(f'Redis client unavailable: {e}')
+        return None
+
+
+class BufferedCounter(ABC):
+    """
+    Compteurs tenus en mémoire par processus et fusionnés périodiquement dans Redis.
+
+    Les incréments ne coûtent qu'un verrou local : aucun aller-retour réseau n'est
+    ajouté aux requêtes. Sans Redis, les totaux restent locaux au processus.
+    Les sous-classes définissent _write, qui traduit les compteurs en commandes Redis.
+    """
+
+    def __init__(self, flush_interval: float = 30.0, max_pending: int = 500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._local_totals = Counter()
+        self._last_flush = time.monotonic()
+
+    def increment(self, key, amount: int = 1):
+        """Incrémente un compteur local et déclenche la fusion si elle est due."""
+        with self._lock:
+            self._pending[key] += amount
+            due = (
+                len(self._pending) >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Fusionne les compteurs locaux dans Redis.
+
+        En cas d'erreur Redis, les compteurs sont remis en attente pour la fusion suivante.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                self._local_totals.update(pending)
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            self._write(pipe, pending)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f'Error flushing {self.__class__.__name__}: {e}')
+            with self._lock:
+                self._pending.update(pending)
+
+    @abstractmethod
+    def _write(self, pipe, pending: Counter):
+        """Ajoute au pipeline Redis les commandes de fusion des compteurs."""
+
+
+class RequestFrequencyRecorder(BufferedCounter):
+    """
+    Compte les URLs servies par le cache de réponses, dans un sorted set Redis.
+    """
+
+    def record(self, url: str):
+        """Incrémente le compteur d'une URL."""
+        self.increment(url)
+
+    def _write(self, pipe, pending: Counter):
+        key = cache.make_key(FREQUENCY_KEY)
+        for url, count in pending.items():
+            pipe.zincrby(key, count, url)
+        # Ne garder que les URLs les plus demandées
+        pipe.zremrangebyrank(key, 0, -(FREQUENCY_MAX_ENTRIES + 1))
+        pipe.expire(key, FREQUENCY_TTL)
+
+    def top(self, limit: int):
+        """
+        Retourne les URLs les plus demandées.
+
+        Returns:
+            Liste de tuples (url, nombre de requêtes), du plus au moins fréquent
+        """
+        if limit <= 0:
+            return []
+        self.flush()
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                return self._local_totals.most_common(limit)
+        try:
+            entries = client.zrevrange(cache.make_key(FREQUENCY_KEY), 0, limit - 1, withscores=True)
+        except Exception as e:
+            logger.warning(f'Error reading request frequencies: {e}')
+            return []
+        return [(url.decode() if isinstance(url, bytes) else url, int(score)) for url, score in entries]
+
+
+class CacheMetrics(BufferedCounter):
+    """
+    Instrumentation du cache de réponses par espace de noms logique.
+
+    Compte les hits, misses, réponses périmées servies, requêtes regroupées sur un
+    calcul en cours, écritures et leurs tailles, ainsi que le temps passé dans les lectures et écritures (en microsecondes).
+    Chaque espace de noms est fusionné dans un hash Redis.
+    """
+
+    FIELDS = ('hits', 'misses', 'stale', 'coalesced', 'gets', 'get_us', 'sets', 'set_us', 'set_bytes', 'raw_bytes')
+
+    def record_get(self, namespace: str, outcome: str, duration: float):
+        """
+        Enregistre une lecture du cache.
+
+        Args:
+            namespace: Espace de noms logique
+            outcome: 'hits', 'misses', 'stale' ou 'coalesced' (résultat d'un autre calcul)
+            duration: Durée de la lecture en secondes
+        """
+        self.increment((namespace, outcome))
+        self.increment((namespace, 'gets'))
+        self.increment((namespace, 'get_us'), int(duration * 1_000_000))
+
+    def record_set(self, namespace: str, stored_bytes: int, raw_bytes: int, duration: float):
+        """Enregistre une écriture dans le cache (taille stockée et taille avant compression)."""
+        self.increment((namespace, 'sets'))
+        self.increment((namespace, 'set_bytes'), stored_bytes)
+        self.increment((namespace, 'raw_bytes'), raw_bytes)
+        self.increment((namespace, 'set_us'), int(duration * 1_000_000))
+
+    def _write(self, pipe, pending: Counter):
+        for (namespace, field), amount in pending.items():
+            pipe.hincrby(cache.make_key(f'{METRICS_KEY_PREFIX}:{namespace}'), field, amount)
+
+    def _read_totals(self) -> dict:
+        """Lit les totaux agrégés de tous les processus."""
+        namespaces = list(dict.fromkeys(METRIC_NAMESPACES.values()))
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                totals = dict(self._local_totals)
+            return {
+                namespace: {field: totals.get((namespace, field), 0) for field in self.FIELDS}
+                for namespace in namespaces
+            }
+        try:
+            pipe = client.pipeline(transaction=False)
+            for namespace in namespaces:
+                pipe.hgetall(cache.make_key(f'{METRICS_KEY_PREFIX}:{namespace}'))
+            raw_totals = pipe.execute()
+        except Exception as e:
+            logger.warning(f'Error reading cache metrics: {e}')
+            return {}
+        result = {}
+        for namespace, raw in zip(namespaces, raw_totals):
+            values = {
+                (k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()
+            }
+            result[namespace] = {field: values.get(field, 0) for field in self.FIELDS}
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        Vue agrégée par espace de noms, avec les indicateurs dérivés.
+
+        Les compteurs du processus courant sont fusionnés avant lecture ; ceux des
+        autres processus le sont au plus tard après flush_interval secondes.
+        """
+        self.flush()
+        snapshot = {}
+        for namespace, counters in self._read_totals().items():
+            served = counters['hits'] + counters['stale'] + counters['coalesced']
+            lookups = served + counters['misses']
+            snapshot[namespace] = {
+                **counters,
+                'hit_rate': round(served / max(lookups, 1) * 100, 2),
+                'avg_get_ms': round(counters['get_us'] / max(counters['gets'], 1) / 1000, 3),
+                'avg_set_ms': round(counters['set_us'] / max(counters['sets'], 1) / 1000, 3),
+                'avg_entry_bytes': counters['set_bytes'] // max(counters['sets'], 1),
+                'compression_ratio': round(counters['raw_bytes'] / max(counters['set_bytes'], 1), 2),
+            }
+        return snapshot
+
+
+frequency_recorder = RequestFrequencyRecorder()
+cache_metrics = CacheMetrics(flush_interval=10.0)
+
 
 def get_cache_key(prefix: str, **kwargs) -> str:
     """
@@ -32,10 +287,310 @@ def get_cache_key(prefix: str, **kwargs) -> str:
     return prefix
 
 
+def versioned_scope(prefix: str, scope: str) -> str:
+    """
+    Portée d'une clé de réponse, suffixée de ses générations si le cache ne
+    supporte pas delete_pattern.
+
+    L'invalidation change alors la génération de la portée (bump_generations) : les
+    anciennes clés ne sont plus lues et expirent d'elles-mêmes, sans vider le cache.
+    Un détail dépend de la génération de son espace de noms et de la sienne.
+    """
+    if hasattr(cache, 'delete_pattern'):
+        return scope
+    keys = [GENERATION_KEY.format(scope=name) for name in dict.fromkeys([prefix, scope])]
+    try:
+        generations = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f'Error reading cache generations: {e}')
+        return scope
+    tokens = [str(generations[key]) for key in keys if key in generations]
+    return f"{scope}:g{'.'.join(tokens)}" if tokens else scope
+
+
+def bump_generations(scopes):
+    """Invalide des portées de clés sans delete_pattern (voir versioned_scope)."""
+    token = f'{time.time_ns():x}'
+    cache.set_many({GENERATION_KEY.format(scope=scope): token for scope in scopes}, None)
+
+
+def _get_codec() -> str:
+    """Retourne le codec de compression configuré (lz4 uniquement s'il est installé)."""
+    codec = getattr(settings, 'CACHE_COMPRESSION', CODEC_ZLIB)
+    if codec == CODEC_LZ4 and lz4_frame is None:
+        return CODEC_ZLIB
+    if codec not in (CODEC_NONE, CODEC_ZLIB, CODEC_LZ4):
+        return CODEC_ZLIB
+    return codec
+
+
+def compress_body(body: bytes):
+    """
+    Compresse un corps de réponse.
+
+    Returns:
+        Tuple (codec, données) ; les petits corps ne sont pas compressés.
+    """
+    codec = _get_codec()
+    if codec == CODEC_NONE or len(body) < getattr(settings, 'CACHE_COMPRESS_MIN_BYTES', 1024):
+        return CODEC_NONE, body
+    if codec == CODEC_LZ4:
+        return CODEC_LZ4, lz4_frame.compress(body)
+    return CODEC_ZLIB, zlib.compress(body, 6)
+
+
+def decompress_body(codec: str, data: bytes) -> bytes:
+    """Décompresse un corps stocké par compress_body."""
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_LZ4:
+        if lz4_frame is None:
+            raise ValueError('Entrée compressée en lz4 mais lz4 n\'est pas installé')
+        return lz4_frame.decompress(data)
+    return data
+
+
+def compute_etag(body: bytes) -> str:
+    """ETag fort calculé à partir du corps rendu."""
+    return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def build_cache_payload(response, fresh_for: int) -> CachedPayload:
+    """
+    Construit l'entrée de cache à partir d'une réponse déjà rendue.
+
+    Args:
+        response: Réponse rendue
+        fresh_for: Durée de fraîcheur en secondes ; au-delà, l'entrée est périmée
+    """
+    body = response.content
+    codec, data = compress_body(body)
+    etag = response.get('ETag') or compute_etag(body)
+    return CachedPayload(
+        PAYLOAD_VERSION, time.time() + fresh_for, response.status_code,
+        response['Content-Type'], etag, codec, data
+    )
+
+
+def _is_current(payload) -> bool:
+    """Entrée au format actuel (ni ancien format, ni objet étranger sous la clé)."""
+    return isinstance(payload, CachedPayload) and payload.version == PAYLOAD_VERSION
+
+
+def is_fresh(payload) -> bool:
+    """Indique si une entrée est encore dans sa durée de fraîcheur."""
+    return payload.fresh_until > time.time()
+
+
+def response_from_payload(request, payload):
+    """
+    Reconstruit une réponse HTTP à partir d'une entrée de cache.
+
+    Retourne None si l'entrée est illisible (ancien format, codec indisponible).
+    """
+    try:
+        if not _is_current(payload):
+            return None
+        if payload.etag and _etag_matches(request, payload.etag):
+            response = HttpResponseNotModified()
+            response['ETag'] = payload.etag
+            return response
+        response = HttpResponse(
+            decompress_body(payload.codec, payload.body),
+            status=payload.status_code,
+            content_type=payload.content_type,
+        )
+    except (TypeError, ValueError, zlib.error) as e:
+        logger.warning(f'Unreadable cache entry ignored: {e}')
+        return None
+    if payload.etag:
+        response['ETag'] = payload.etag
+    return response
+
+
+def _etag_matches(request, etag: str) -> bool:
+    """Vérifie l'en-tête If-None-Match de la requête."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def _is_cacheable_request(request) -> bool:
+    """Seules les requêtes GET rendues en JSON sont mises en cache."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return request.method == 'GET' and renderer is not None and renderer.format == 'json'
+
+
+def _render_response(view, request, response):
+    """
+    Rend une Response DRF dans la vue (normalement fait après le handler par finalize_response).
+    """
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    response.render()
+    return response
+
+
+class _InFlight:
+    """Calcul en cours pour une clé, partagé par les threads du processus."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.payload = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _wait_for_payload(cache_key: str, timeout: float):
+    """Attend qu'un autre worker écrive une entrée fraîche pour cette clé."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(COALESCE_POLL_INTERVAL)
+        payload = cache.get(cache_key)
+        if _is_current(payload) and is_fresh(payload):
+            return payload
+    return None
+
+
+def _compute_and_store(view, request, func, args, kwargs, namespace, cache_key, cache_timeout):
+    """
+    Exécute la vue, stocke son rendu et retourne (réponse, entrée de cache ou None).
+
+    L'ETag de conditional_etag (etags.py), s'il y en a un, est calculé avant la vue
+    (des horodatages plus récents que le corps ne donneraient jamais un faux 304)
+    et stocké dans l'entrée.
+    """
+    deferred_etag = getattr(request, 'deferred_etag', None)
+    etag = deferred_etag() if deferred_etag is not None else None
+    response = func(view, request, *args, **kwargs)
+
+    # Ne cacher que les réponses réussies
+    if getattr(response, 'status_code', None) != 200:
+        return response, None
+    if hasattr(response, 'render') and not response.is_rendered:
+        response = _render_response(view, request, response)
+    if etag is not None:
+        response['ETag'] = etag
+    payload = build_cache_payload(response, cache_timeout)
+    response['ETag'] = payload.etag
+    started = time.perf_counter()
+    # L'entrée survit à sa fraîcheur pour pouvoir être servie pendant un recalcul
+    cache.set(cache_key, payload, cache_timeout + getattr(settings, 'CACHE_STALE_GRACE', 60))
+    cache_metrics.record_set(namespace, len(payload.body), len(response.content), time.perf_counter() - started)
+    logger.debug(
+        f'Cached response for {cache_key} '
+        f'({len(response.content)} -> {len(payload.body)} bytes, TTL: {cache_timeout}s)'
+    )
+    return response, payload
+
+
+def _lead_computation(view, request, func, args, kwargs, namespace, cache_key, cache_timeout,
+                      stale_response, lookup_duration):
+    """
+    Calcul de la réponse par le thread leader du processus.
+
+    Un verrou court dans le cache désigne un seul worker pour le calcul ; les autres
+    servent l'entrée périmée s'il y en a une, sinon attendent le résultat.
+    """
+    lock_key = f'lock:{cache_key}'
+    lock_timeout = getattr(settings, 'CACHE_COALESCE_LOCK_TIMEOUT', 10)
+    locked = cache.add(lock_key, 1, lock_timeout)
+    if not locked:
+        if stale_response is not None:
+            cache_metrics.record_get(namespace, 'stale', lookup_duration)
+            logger.debug(f'Cache STALE for {cache_key} (recomputed by another worker)')
+            return stale_response, None
+        payload = _wait_for_payload(cache_key, getattr(settings, 'CACHE_COALESCE_WAIT', 2.0))
+        response = response_from_payload(request, payload) if payload is not None else None
+        if response is not None:
+            cache_metrics.record_get(namespace, 'coalesced', lookup_duration)
+            return response, payload
+        # Le calcul distant n'a pas abouti à temps : calculer localement
+
+    cache_metrics.record_get(namespace, 'misses', lookup_duration)
+    logger.debug(f'Cache MISS for {cache_key}')
+    try:
+        return _compute_and_store(view, request, func, args, kwargs, namespace, cache_key, cache_timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def _cached_call(view, request, func, args, kwargs, prefix, cache_key, cache_timeout):
+    """
+    Sert la réponse depuis le cache ou exécute la vue puis stocke son rendu.
+
+    Les requêtes identiques concurrentes sont regroupées : dans un processus, les
+    threads attendent le calcul du premier ; entre workers, un verrou dans le cache
+    réserve le calcul à un seul d'entre eux.
+    """
+    if not _is_cacheable_request(request):
+        return func(view, request, *args, **kwargs)
+
+    namespace = METRIC_NAMESPACES.get(prefix, prefix)
+    if request.META.get(CACHE_REFRESH_META_KEY):
+        # Préchauffage : recalculer sans lire l'entrée existante
+        response, _ = _compute_and_store(view, request, func, args, kwargs, namespace, cache_key, cache_timeout)
+        return response
+
+    frequency_recorder.record(request.build_absolute_uri())
+    started = time.perf_counter()
+    payload = cache.get(cache_key)
+    lookup_duration = time.perf_counter() - started
+    stale_response = None
+    if payload is not None:
+        cached_response = response_from_payload(request, payload)
+        if cached_response is not None and is_fresh(payload):
+            cache_metrics.record_get(namespace, 'hits', lookup_duration)
+            logger.debug(f'Cache HIT for {cache_key}')
+            return cached_response
+        stale_response = cached_response
+
+    with _inflight_lock:
+        flight = _inflight.get(cache_key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _inflight[cache_key] = _InFlight()
+
+    if not is_leader:
+        if stale_response is not None:
+            cache_metrics.record_get(namespace, 'stale', lookup_duration)
+            return stale_response
+        flight.event.wait(getattr(settings, 'CACHE_COALESCE_WAIT', 2.0))
+        response = response_from_payload(request, flight.payload) if flight.payload is not None else None
+        if response is not None:
+            cache_metrics.record_get(namespace, 'coalesced', lookup_duration)
+            return response
+        # Le leader a échoué ou n'a rien mis en cache (erreur, 4xx) : calculer soi-même
+        cache_metrics.record_get(namespace, 'misses', lookup_duration)
+        response, _ = _compute_and_store(view, request, func, args, kwargs, namespace, cache_key, cache_timeout)
+        return response
+
+    try:
+        response, flight.payload = _lead_computation(
+            view, request, func, args, kwargs, namespace, cache_key, cache_timeout,
+            stale_response, lookup_duration
+        )
+        return response
+    finally:
+        with _inflight_lock:
+            _inflight.pop(cache_key, None)
+        flight.event.set()
+
+
 def cache_response(prefix: str, timeout: int = None):
     """
     Décorateur pour cacher les réponses des vues.
-    
+
+    La clé couvre tous les paramètres de requête ainsi que le schéma et l'hôte (les
+    URLs absolues des images et de la pagination en dépendent). Pour les vues de
+    détail, la clé est préfixée par l'identifiant afin de pouvoir l'invalider isolément.
+
     Args:
         prefix: Préfixe de la clé de cache
         timeout: Durée en secondes (utilise CACHE_DURATIONS si None)
@@ -45,36 +600,13 @@ def cache_response(prefix: str, timeout: int = None):
         def wrapper(self, request, *args, **kwargs):
             # Construire la clé de cache
             cache_params = {
-                'page': request.query_params.get('page', '1'),
-                'category': request.query_params.get('category', ''),
-                'search': request.query_params.get('search', ''),
-                'ordering': request.query_params.get('ordering', ''),
+                'origin': f'{request.scheme}://{request.get_host()}',
+                'query': request.query_params.urlencode() if request.query_params else None,
             }
-            
-            # Ajouter les paramètres spécifiques à l'action
-            if kwargs:
-                cache_params.update(kwargs)
-            
-            cache_key = get_cache_key(prefix, **cache_params)
+            scope = f"{prefix}:{kwargs['pk']}" if 'pk' in kwargs else prefix
+            cache_key = get_cache_key(versioned_scope(prefix, scope), **cache_params)
             cache_timeout = timeout or CACHE_DURATIONS.get(prefix, settings.CACHE_TTL)
-            
-            # Essayer de récupérer depuis le cache
-            cached_response = cache.get(cache_key)
-            if cached_response is not None:
-                logger.debug(f'Cache HIT for {cache_key}')
-                return cached_response
-            
-            logger.debug(f'Cache MISS for {cache_key}')
-            
-            # Exécuter la fonction et cacher le résultat
-            response = func(self, request, *args, **kwargs)
-            
-            # Ne cacher que les réponses réussies
-            if hasattr(response, 'status_code') and response.status_code == 200:
-                cache.set(cache_key, response, cache_timeout)
-                logger.debug(f'Cached response for {cache_key} (TTL: {cache_timeout}s)')
-            
-            return response
+            return _cached_call(self, request, func, args, kwargs, prefix, cache_key, cache_timeout)
         return wrapper
     return decorator
 
@@ -90,7 +622,7 @@ def cache_nearby_response(timeout: int = None):
             lat = request.query_params.get('latitude', '')
             lng = request.query_params.get('longitude', '')
             radius = request.query_params.get('radius_km', '50')
-            
+
             if lat and lng:
                 try:
                     # Arrondir à 2 décimales (~1km de précision)
@@ -102,66 +634,140 @@ def cache_nearby_response(timeout: int = None):
             else:
                 lat_rounded = lat
                 lng_rounded = lng
-            
+
             cache_params = {
+                'origin': f'{request.scheme}://{request.get_host()}',
                 'lat': lat_rounded,
                 'lng': lng_rounded,
                 'radius': radius,
+                'categories': request.query_params.get('categories'),
                 'page': request.query_params.get('page', '1'),
             }
-            
-            cache_key = get_cache_key('producers_nearby', **cache_params)
+
+            cache_key = get_cache_key(versioned_scope('producers_nearby', 'producers_nearby'), **cache_params)
             cache_timeout = timeout or CACHE_DURATIONS.get('producers_nearby', 300)
-            
-            # Essayer de récupérer depuis le cache
-            cached_response = cache.get(cache_key)
-            if cached_response is not None:
-                logger.debug(f'Cache HIT for nearby: {cache_key}')
-                return cached_response
-            
-            logger.debug(f'Cache MISS for nearby: {cache_key}')
-            
-            # Exécuter la fonction et cacher le résultat
-            response = func(self, request, *args, **kwargs)
-            
-            # Ne cacher que les réponses réussies
-            if hasattr(response, 'status_code') and response.status_code == 200:
-                cache.set(cache_key, response, cache_timeout)
-                logger.debug(f'Cached nearby response for {cache_key} (TTL: {cache_timeout}s)')
-            
-            return response
+            return _cached_call(
+                self, request, func, args, kwargs, 'producers_nearby', cache_key, cache_timeout
+            )
         return wrapper
     return decorator
 
 
+def get_owned_producer_id(user_id: int):
+    """
+    ID du profil producteur d'un utilisateur (None s'il n'en a pas), mis en cache.
+
+    L'absence de profil est aussi mise en cache (valeur 0) ; la création et la
+    suppression d'un profil invalident l'entrée (voir signals.py).
+    """
+    from .models import ProducerProfile
+
+    key = OWNER_CACHE_KEY.format(user_id=user_id)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f'Error reading producer owner cache: {e}')
+        cached = None
+    if cached is not None:
+        return cached or None
+
+    producer_id = ProducerProfile.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+    try:
+        cache.set(key, producer_id or 0, OWNER_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f'Error writing producer owner cache: {e}')
+    return producer_id
+
+
+def invalidate_owner_cache(user_id: int):
+    """Invalide l'association utilisateur → profil producteur."""
+    try:
+        cache.delete(OWNER_CACHE_KEY.format(user_id=user_id))
+    except Exception as e:
+        logger.error(f'Error invalidating producer owner cache: {e}')
+
+
+def invalidate_owners_cache(user_ids):
+    """invalidate_owner_cache pour plusieurs utilisateurs, en un appel."""
+    keys = [OWNER_CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.error(f'Error invalidating producer owner cache: {e}')
+
+
 def invalidate_producer_cache(producer_id: int = None):
     """
     Invalide le cache lié aux producteurs.
-    
+
     Args:
         producer_id: ID du producteur à invalider (None pour tout invalider)
     """
     try:
-        if producer_id:
-            # Invalider le détail du producteur
-            cache.delete(get_cache_key('producer_detail', id=producer_id))
-            logger.info(f'Invalidated cache for producer {producer_id}')
-        
-        # Invalider les listes (utiliser un pattern si Redis le supporte)
-        # Note: django-redis supporte delete_pattern
+        # Note: django-redis supporte delete_pattern et ajoute lui-même KEY_PREFIX
         if hasattr(cache, 'delete_pattern'):
-            cache.delete_pattern('mpl:producers_list:*')
-            cache.delete_pattern('mpl:producers_nearby:*')
+            if producer_id:
+                # Invalider le détail du producteur
+                cache.delete_pattern(f'producer_detail:{producer_id}:*')
+                logger.info(f'Invalidated cache for producer {producer_id}')
+            cache.delete_pattern('producers_list:*')
+            cache.delete_pattern('producers_nearby:*')
             logger.info('Invalidated all producers list cache')
         else:
-            # Fallback: invalider les clés connues
-            cache.delete('producers_list')
-            logger.info('Invalidated producers list cache (fallback)')
-            
+            # Sans recherche par motif : nouvelle génération des portées concernées
+            scopes = ['producers_list', 'producers_nearby']
+            if producer_id:
+                scopes.append(f'producer_detail:{producer_id}')
+            bump_generations(scopes)
+            logger.info('Invalidated producers cache (fallback: new generation)')
+
     except Exception as e:
         logger.error(f'Error invalidating producer cache: {e}')
 
 
+def invalidate_producers_cache(producer_ids, max_patterns: int = 100):
+    """
+    Invalide le détail de plusieurs producteurs et les listes, en une fois.
+
+    Au-delà de max_patterns producteurs, tous les détails sont invalidés (un
+    balayage des clés par producteur coûterait plus cher).
+    """
+    producer_ids = list(producer_ids)
+    try:
+        if hasattr(cache, 'delete_pattern'):
+            if len(producer_ids) > max_patterns:
+                cache.delete_pattern('producer_detail:*')
+            else:
+                for producer_id in producer_ids:
+                    cache.delete_pattern(f'producer_detail:{producer_id}:*')
+            cache.delete_pattern('producers_list:*')
+            cache.delete_pattern('producers_nearby:*')
+            logger.info(f'Invalidated cache for {len(producer_ids)} producer(s)')
+        else:
+            if len(producer_ids) > max_patterns:
+                details = ['producer_detail']
+            else:
+                details = [f'producer_detail:{producer_id}' for producer_id in producer_ids]
+            bump_generations(details + ['producers_list', 'producers_nearby'])
+            logger.info(f'Invalidated cache for {len(producer_ids)} producer(s) (fallback: new generation)')
+    except Exception as e:
+        logger.error(f'Error invalidating producers cache: {e}')
+
+
+def invalidate_categories_cache():
+    """Invalide le cache de la liste des catégories de produits."""
+    try:
+        if hasattr(cache, 'delete_pattern'):
+            cache.delete_pattern('categories_list*')
+        else:
+            bump_generations(['categories_list'])
+        logger.info('Invalidated categories cache')
+    except Exception as e:
+        logger.error(f'Error invalidating categories cache: {e}')
+
+
 def invalidate_all_cache():
     """Invalide tout le cache."""
     try:
@@ -172,24 +778,30 @@ def invalidate_all_cache():
 
 
 def get_cache_stats():
-    """Récupère les statistiques du cache Redis."""
+    """
+    Récupère les statistiques du cache.
+
+    'namespaces' contient les métriques du cache de réponses par espace de noms ;
+    les autres champs sont les statistiques globales de Redis (sessions et
+    throttling compris).
+    """
+    stats = {'namespaces': cache_metrics.snapshot()}
     try:
         client = cache.client.get_client()
         info = client.info()
-        return {
+        stats.update({
             'used_memory': info.get('used_memory_human', 'N/A'),
             'connected_clients': info.get('connected_clients', 'N/A'),
             'total_keys': client.dbsize(),
             'hits': info.get('keyspace_hits', 0),
             'misses': info.get('keyspace_misses', 0),
             'hit_rate': round(
-                info.get('keyspace_hits', 0) / 
-                max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1) * 100, 
+                info.get('keyspace_hits', 0) /
+                max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1) * 100,
                 2
             ),
-        }
+        })
     except Exception as e:
         logger.error(f'Error getting cache stats: {e}')
-        return {'error': str(e)}
-
-
+        stats['error'] = str(e)
+    return stats
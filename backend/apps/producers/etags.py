@@ -0,0 +1,130 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match).
+
+L'ETag d'une ressource est calculé à partir d'horodatages (updated_at du modèle,
+content_updated_at du producteur pour les objets embarqués) et du nombre de lignes,
+par une seule requête d'agrégat, sans sérialisation. Si le client présente un ETag
+identique, la vue répond 304 avant tout accès au cache ou aux serializers. Sans
+If-None-Match, un hit du cache ne fait aucune requête : l'ETag est dans l'entrée.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+
+from .cache import _etag_matches
+
+# À incrémenter si la représentation change sans que les données changent
+# (nouveau champ sérialisé, nouveau format de réponse...)
+ETAG_VERSION = 1
+
+
+def build_etag(request, parts) -> str:
+    """
+    Construit un ETag fort à partir des horodatages d'une ressource.
+
+    L'origine et les paramètres de requête en font partie : les réponses contiennent
+    des URLs absolues et dépendent de la pagination, du tri et des filtres.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    seed = '|'.join(str(part) for part in (
+        ETAG_VERSION,
+        f'{request.scheme}://{request.get_host()}',
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        renderer.format if renderer is not None else '',
+        *parts,
+    ))
+    return f'"{hashlib.md5(seed.encode()).hexdigest()}"'
+
+
+def queryset_stamps(queryset, *fields) -> tuple:
+    """
+    Nombre de lignes et horodatage maximal de chaque champ, en une requête.
+
+    Le nombre de lignes couvre les suppressions, les horodatages les créations et
+    modifications.
+    """
+    aggregates = {'_count': Count('pk')}
+    aggregates.update({f'_max_{i}': Max(field) for i, field in enumerate(fields)})
+    values = queryset.order_by().aggregate(**aggregates)
+    stamps = [values['_count']]
+    stamps += [values[f'_max_{i}'].isoformat() if values[f'_max_{i}'] else '' for i in range(len(fields))]
+    return tuple(stamps)
+
+
+def conditional_etag(etag_func):
+    """
+    Décorateur de méthode de ViewSet gérant If-None-Match.
+
+    etag_func(view, request, *args, **kwargs) retourne les éléments de l'ETag,
+    ou None si la ressource n'en a pas (objet introuvable : la vue gère le 404).
+    À placer au-dessus de cache_response pour court-circuiter aussi le cache.
+
+    L'agrégat n'est exécuté que si le client présente un ETag. Sinon il est
+    calculé à la demande (request.deferred_etag) : par cache_response avant un
+    calcul, l'ETag étant alors stocké dans l'entrée de cache et resservi sans
+    requête, ou ici pour une réponse 200 sans ETag.
+
+    Usage:
+        @conditional_etag(producer_detail_etag)
+        @cache_response('producer_detail')
+        def retrieve(self, request, *args, **kwargs):
+            ...
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return func(view, request, *args, **kwargs)
+
+            computed = []
+
+            def deferred_etag():
+                if not computed:
+                    parts = etag_func(view, request, *args, **kwargs)
+                    computed.append(build_etag(request, parts) if parts is not None else None)
+                return computed[0]
+
+            if request.META.get('HTTP_IF_NONE_MATCH'):
+                etag = deferred_etag()
+                if etag is not None and _etag_matches(request, etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+
+            request.deferred_etag = deferred_etag
+            response = func(view, request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header('ETag'):
+                etag = deferred_etag()
+                if etag is not None:
+                    response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def producer_detail_etag(view, request, pk=None, **kwargs):
+    """Fiche producteur : le profil et tout son contenu embarqué."""
+    stamps = view.get_queryset().filter(pk=pk).values_list('updated_at', 'content_updated_at').first()
+    if stamps is None:
+        return None
+    return tuple(stamp.isoformat() for stamp in stamps)
+
+
+def producer_list_etag(view, request, *args, **kwargs):
+    """Liste des producteurs, avec les filtres, la recherche et le tri de la requête."""
+    queryset = view.filter_queryset(view.get_queryset())
+    return queryset_stamps(queryset, 'updated_at', 'content_updated_at')
+
+
+def sale_mode_list_etag(view, request, *args, **kwargs):
+    """Modes de vente d'un producteur (horaires embarqués)."""
+    return queryset_stamps(view.get_queryset(), 'updated_at', 'producer__content_updated_at')
+
+
+def sale_mode_detail_etag(view, request, pk=None, **kwargs):
+    """Un mode de vente et ses horaires."""
+    stamps = queryset_stamps(view.get_queryset().filter(pk=pk), 'updated_at', 'producer__content_updated_at')
+    return stamps if stamps[0] else None
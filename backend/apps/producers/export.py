@@ -0,0 +1,137 @@
+"""
+Export de tous les producteurs en GeoJSON ou NDJSON, en flux.
+
+La mémoire reste constante quelle que soit la taille de la table :
+
+- projection plate (values_list) : ni instances de modèle, ni serializer, ni
+  jointure ;
+- curseur côté serveur (.iterator(chunk_size=...)) : PostgreSQL envoie les lignes
+  par paquets, rien n'est chargé en entier ;
+- le document est produit morceau par morceau (StreamingHttpResponse) et
+  éventuellement compressé au fil de l'eau (gzip), sans jamais être assemblé.
+
+Les lignes sont regroupées en blocs d'environ CHUNK_BYTES avant envoi : un
+morceau par producteur ferait autant d'écritures sur la socket (et d'appels au
+compresseur).
+"""
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'geojson': ('application/geo+json', 'geojson'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+EXPORT_FIELDS = (
+    'id', 'name', 'category', 'description', 'address', 'latitude', 'longitude',
+    'phone', 'email_contact', 'website', 'opening_hours', 'created_at', 'content_updated_at',
+)
+DEFAULT_CHUNK_SIZE = 2000
+CHUNK_BYTES = 64 * 1024
+
+
+def export_rows(queryset, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Lignes (dict) à exporter, lues par paquets sur un curseur côté serveur."""
+    rows = (
+        queryset.select_related(None).prefetch_related(None)
+        .order_by('pk').values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for values in rows:
+        row = dict(zip(EXPORT_FIELDS, values))
+        row['latitude'] = float(row['latitude'])
+        row['longitude'] = float(row['longitude'])
+        row['created_at'] = row['created_at'].isoformat()
+        row['content_updated_at'] = row['content_updated_at'].isoformat()
+        yield row
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_geojson(rows):
+    """FeatureCollection GeoJSON (coordonnées en longitude, latitude)."""
+    yield '{"type":"FeatureCollection","features":['
+    separator = ''
+    for row in rows:
+        coordinates = [row.pop('longitude'), row.pop('latitude')]
+        yield separator + _dumps({
+            'type': 'Feature',
+            'id': row['id'],
+            'geometry': {'type': 'Point', 'coordinates': coordinates},
+            'properties': row,
+        })
+        separator = ','
+    yield ']}\n'
+
+
+def iter_ndjson(rows):
+    """Un objet JSON par ligne."""
+    for row in rows:
+        yield _dumps(row) + '\n'
+
+
+def buffered(chunks, size: int = CHUNK_BYTES):
+    """Encode en UTF-8 et regroupe les morceaux en blocs d'environ size octets."""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzipped(chunks, level: int = 6):
+    """Compresse un flux au format gzip, bloc par bloc."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(request) -> bool:
+    """Compression demandée (?gzip=1) ou acceptée par le client (Accept-Encoding)."""
+    requested = request.GET.get('gzip')
+    if requested is not None:
+        return requested.lower() in ('1', 'true', 'yes')
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = [item.strip().lower() for item in part.split(';')]
+        if coding == 'gzip':
+            return not any(param in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000') for param in params)
+    return False
+
+
+def export_response(queryset, fmt: str, compress: bool = False,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamingHttpResponse:
+    """
+    Réponse en flux de l'export des producteurs du queryset.
+
+    Args:
+        fmt: 'geojson' ou 'ndjson'
+        compress: compression gzip au fil de l'eau (Content-Encoding: gzip)
+    """
+    content_type, extension = EXPORT_FORMATS[fmt]
+    serialize = iter_geojson if fmt == 'geojson' else iter_ndjson
+    stream = buffered(serialize(export_rows(queryset, chunk_size)))
+    if compress:
+        stream = gzipped(stream)
+    response = StreamingHttpResponse(stream, content_type=f'{content_type}; charset=utf-8')
+    filename = f'producteurs-{timezone.now():%Y%m%d}.{extension}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Vary'] = 'Accept-Encoding'
+    # nginx transmet les morceaux au fil de l'eau au lieu de tout mettre en tampon
+    response['X-Accel-Buffering'] = 'no'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,152 @@
+"""
+Déclinaisons des photos (producteurs et produits).
+
+Chaque photo est déclinée en plusieurs largeurs (DERIVATIVE_WIDTHS), en WebP et en
+JPEG de repli, enregistrées à côté de l'original : producers/2024/01/01/ferme.jpg
+donne ferme_160.webp, ferme_160.jpg, ferme_480.webp... Les chemins sont stockés dans
+le champ derivatives de la photo :
+
+    {"webp": {"160": "producers/.../ferme_160.webp", ...}, "jpeg": {"160": ...}}
+
+Les listes servent la déclinaison THUMBNAIL_WIDTH au lieu de l'original, les fiches
+un srcset complet.
+
+Un placeholder (image de PLACEHOLDER_SIZE px en WebP, ~200 octets en data URI) est
+calculé au même décodage : le front l'affiche flouté en attendant la vignette.
+"""
+import base64
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 480, 1024)
+# Format : (format PIL, extension, options d'encodage)
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+THUMBNAIL_WIDTH = 480
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+
+def derivative_widths(original_width: int) -> list:
+    """Largeurs à générer : jamais d'agrandissement, au moins une déclinaison."""
+    widths = [width for width in DERIVATIVE_WIDTHS if width <= original_width]
+    return widths or [original_width]
+
+
+def verify_image(storage, name):
+    """
+    Vérifie la structure de l'original (lève une exception s'il est corrompu).
+
+    Les données tronquées sont détectées ensuite, au décodage des déclinaisons.
+    """
+    with storage.open(name, 'rb') as f:
+        with Image.open(f) as img:
+            img.verify()
+
+
+def make_placeholder(img) -> str:
+    """Image minuscule en data URI (affichée floutée pendant le chargement)."""
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.BILINEAR)
+    buffer = io.BytesIO()
+    small.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def generate_derivatives(storage, name: str) -> tuple:
+    """
+    Génère les déclinaisons et le placeholder d'une image ; les déclinaisons sont
+    enregistrées à côté de l'original.
+
+    Les métadonnées EXIF (position GPS comprise) ne sont pas recopiées ; l'orientation
+    est appliquée aux pixels. N'accède pas à la base : utilisable dans un processus
+    fils (voir processing.py).
+
+    Returns:
+        (chemins des déclinaisons par format puis par largeur, placeholder)
+    """
+    root = os.path.splitext(name)[0]
+    derivatives = {fmt: {} for fmt in DERIVATIVE_FORMATS}
+
+    with storage.open(name, 'rb') as f:
+        with Image.open(f) as img:
+            # Décodage JPEG réduit : inutile de décompresser plus que la plus grande largeur
+            largest = max(DERIVATIVE_WIDTHS)
+            img.draft('RGB', (largest, largest))
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+
+            # Du plus grand au plus petit : chaque réduction part de la précédente
+            source = img
+            for width in sorted(derivative_widths(img.width), reverse=True):
+                height = max(1, round(img.height * width / img.width))
+                if (width, height) != source.size:
+                    source = source.resize((width, height), Image.LANCZOS)
+                for fmt, (pil_format, ext, options) in DERIVATIVE_FORMATS.items():
+                    buffer = io.BytesIO()
+                    source.save(buffer, pil_format, **options)
+                    derivatives[fmt][str(width)] = storage.save(
+                        f'{root}_{width}.{ext}', ContentFile(buffer.getvalue())
+                    )
+            # Depuis la plus petite déclinaison
+            placeholder = make_placeholder(source)
+
+    return derivatives, placeholder
+
+
+def delete_derivatives(derivatives: dict, storage=None):
+    """Supprime les fichiers de déclinaisons (erreurs journalisées, jamais levées)."""
+    if not derivatives:
+        return
+    if storage is None:
+        from django.core.files.storage import default_storage
+        storage = default_storage
+    for names in derivatives.values():
+        for name in names.values():
+            try:
+                storage.delete(name)
+            except Exception as e:
+                logger.warning(f'Could not delete derivative {name}: {e}')
+
+
+def save_derivatives(photo, derivatives: dict, placeholder: str = None, delete_previous: bool = True):
+    """
+    Enregistre les déclinaisons (et le placeholder) sur la photo et la marque prête.
+
+    Les anciennes déclinaisons sont supprimées une fois les nouvelles en place, sauf
+    si elles sont partagées (delete_previous=False, voir blobs.py).
+    """
+    from .models import PHOTO_READY
+
+    previous = photo.derivatives or {}
+    photo.derivatives = derivatives
+    photo.processing_status = PHOTO_READY
+    photo.processing_started_at = None
+    update_fields = ['derivatives', 'processing_status', 'processing_started_at']
+    if placeholder is not None:
+        photo.placeholder = placeholder
+        update_fields.append('placeholder')
+    photo.save(update_fields=update_fields)
+    if previous and delete_previous and previous != derivatives:
+        storage = photo.image_file.storage
+        transaction.on_commit(lambda: delete_derivatives(previous, storage))
+
+
+def thumbnail_name(derivatives: dict, fmt: str = 'webp'):
+    """Chemin de la déclinaison utilisée dans les listes (la plus proche de THUMBNAIL_WIDTH)."""
+    names = (derivatives or {}).get(fmt) or {}
+    if not names:
+        return None
+    widths = sorted(int(width) for width in names)
+    fitting = [width for width in widths if width <= THUMBNAIL_WIDTH]
+    return names[str(fitting[-1] if fitting else widths[0])]
@@ -0,0 +1,553 @@
+"""
+Import en masse de producteurs (CSV, GeoJSON, NDJSON).
+
+Un enregistrement décrit un producteur, son compte (email) et, optionnellement,
+ses produits et modes de vente avec leurs horaires (même structure que les
+commandes de peuplement, voir import_producers --help).
+
+- lecture en flux : le fichier n'est jamais chargé en entier (GeoJSON décodé
+  élément par élément dans le tableau features) ;
+- validation par lots : chaque ligne est validée en mémoire (clean_fields et clean
+  des modèles, sans les requêtes d'unicité de full_clean) ; l'unicité est résolue
+  par lot, par clé naturelle ;
+- écriture par lot, dans une transaction : utilisateurs (email), profils
+  (utilisateur), produits (producteur, nom), modes de vente (producteur, type,
+  titre) et horaires (mode de vente, jour) mis à jour ou créés par
+  bulk_create(update_conflicts=True) ;
+- reprise : après chaque lot validé, le nombre d'enregistrements lus est écrit
+  dans un fichier de point de reprise ; une reprise les saute.
+
+Les produits et modes de vente absents du fichier ne sont pas supprimés. Les
+lignes invalides sont rapportées et ignorées.
+"""
+import csv
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from apps.auth.models import User
+from apps.products.models import Product, ProductCategory
+from .cache import invalidate_owners_cache, invalidate_producers_cache
+from .models import OpeningHours, ProducerProfile, SaleMode
+from .signals import deferred_invalidation
+from .validators import clean_instance
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+FORMATS = ('csv', 'geojson', 'ndjson')
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.geojson': 'geojson',
+    '.json': 'geojson',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+PRODUCER_FIELDS = [
+    'name', 'description', 'category', 'address', 'latitude', 'longitude',
+    'phone', 'email_contact', 'website', 'opening_hours',
+]
+PRODUCT_FIELDS = ['description', 'category', 'availability_type', 'availability_start_month', 'availability_end_month']
+SALE_MODE_FIELDS = [
+    'instructions', 'phone_number', 'website_url', 'is_24_7', 'location_address',
+    'location_latitude', 'location_longitude', 'market_info', 'order',
+]
+OPENING_HOURS_FIELDS = ['is_closed', 'opening_time', 'closing_time']
+# Compteurs cumulés d'un import, repris du point de reprise
+STAT_KEYS = (
+    'imported', 'invalid', 'duplicates', 'created', 'updated', 'products', 'sale_modes', 'opening_hours',
+)
+
+# Ligne validée : instances non enregistrées (clés étrangères résolues à l'écriture)
+ImportRow = namedtuple('ImportRow', ['number', 'email', 'username', 'producer', 'products', 'sale_modes'])
+
+
+# Lecture
+
+def detect_format(path: str) -> str:
+    fmt = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f'Format non reconnu pour {path} (préciser : {", ".join(FORMATS)})')
+    return fmt
+
+
+def iter_csv(stream):
+    """Lignes CSV ; colonnes products et sale_modes en JSON (décodées à la validation)."""
+    yield from csv.DictReader(stream)
+
+
+def iter_ndjson(stream):
+    """Lignes NDJSON, décodées à la validation : une ligne illisible n'arrête pas l'import."""
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+_FEATURES = re.compile(r'"features"\s*:\s*\[')
+
+
+def iter_geojson(stream, read_size: int = 1 << 16):
+    """
+    Features d'une FeatureCollection, décodées une à une.
+
+    Le tableau features est repéré par sa clé, puis chaque élément est décodé
+    (raw_decode) dès qu'il est complet dans le tampon.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while True:
+        match = _FEATURES.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        data = stream.read(read_size)
+        if not data:
+            raise ValueError('GeoJSON : tableau "features" introuvable')
+        # La clé peut être coupée entre deux lectures
+        buffer = buffer[-32:] + data
+
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            data = stream.read(read_size)
+            if not data:
+                raise ValueError('GeoJSON : fichier tronqué')
+            buffer += data
+            continue
+        yield feature
+        buffer = buffer[end:]
+
+
+READERS = {'csv': iter_csv, 'geojson': iter_geojson, 'ndjson': iter_ndjson}
+
+
+def normalize_record(record: dict) -> dict:
+    """Feature GeoJSON → enregistrement à plat (coordonnées depuis la géométrie)."""
+    if record.get('type') != 'Feature':
+        return record
+    flat = dict(record.get('properties') or {})
+    coordinates = (record.get('geometry') or {}).get('coordinates') or []
+    if len(coordinates) >= 2:
+        flat['longitude'], flat['latitude'] = coordinates[0], coordinates[1]
+    return flat
+
+
+# Validation
+
+def _round_coordinate(value):
+    """Coordonnée arrondie à 7 décimales (précision du modèle), sinon inchangée."""
+    try:
+        return round(Decimal(str(value)), 7)
+    except (InvalidOperation, ValueError, TypeError):
+        return value
+
+
+def _values(record: dict, fields: list) -> dict:
+    """Champs renseignés (vides ignorés : valeurs par défaut du modèle)."""
+    return {field: record[field] for field in fields if record.get(field) not in (None, '')}
+
+
+def _check(instance, exclude: list, prefix: str, errors: list):
+    try:
+        clean_instance(instance, exclude)
+    except ValidationError as e:
+        items = e.message_dict.items() if hasattr(e, 'error_dict') else [(NON_FIELD_ERRORS, e.messages)]
+        for field, messages in items:
+            label = (prefix.rstrip('.') or 'ligne') if field == NON_FIELD_ERRORS else f'{prefix}{field}'
+            errors.extend(f'{label}: {message}' for message in messages)
+
+
+def _build_products(items: list, categories: dict, errors: list) -> list:
+    """Produits d'un enregistrement (un seul par nom, le dernier l'emporte)."""
+    products = {}
+    for index, data in enumerate(items, 1):
+        values = _values(data, ['name'] + PRODUCT_FIELDS)
+        category_name = values.pop('category', None)
+        product = Product(**values)
+        if category_name:
+            product.category = categories.get(category_name)
+            if product.category is None:
+                errors.append(f'products[{index}].category: catégorie inconnue ({category_name})')
+        _check(product, ['producer', 'category'], f'products[{index}].', errors)
+        products[product.name] = product
+    return list(products.values())
+
+
+def _build_opening_hours(items: list, prefix: str, errors: list) -> list:
+    """Horaires d'un mode de vente (un seul par jour)."""
+    hours = {}
+    for hour_data in items:
+        # Format des commandes de peuplement (day, opening, closing) ou du modèle
+        day = hour_data.get('day', hour_data.get('day_of_week'))
+        is_closed = hour_data.get('is_closed', False)
+        hour = OpeningHours(
+            day_of_week=day,
+            is_closed=is_closed,
+            opening_time=None if is_closed else hour_data.get('opening', hour_data.get('opening_time')),
+            closing_time=None if is_closed else hour_data.get('closing', hour_data.get('closing_time')),
+        )
+        _check(hour, ['sale_mode'], f'{prefix}opening_hours[{day}].', errors)
+        hours[hour.day_of_week] = hour
+    return list(hours.values())
+
+
+def _build_sale_modes(items: list, errors: list) -> list:
+    """Modes de vente d'un enregistrement : [(SaleMode, [OpeningHours])]."""
+    sale_modes = {}
+    for index, data in enumerate(items, 1):
+        values = _values(data, ['mode_type', 'title'] + SALE_MODE_FIELDS)
+        for field in ('location_latitude', 'location_longitude'):
+            if field in values:
+                values[field] = _round_coordinate(values[field])
+        sale_mode = SaleMode(**values)
+        prefix = f'sale_modes[{index}].'
+        _check(sale_mode, ['producer'], prefix, errors)
+        hours = _build_opening_hours(data.get('opening_hours') or [], prefix, errors)
+        sale_modes[(sale_mode.mode_type, sale_mode.title)] = (sale_mode, hours)
+    return list(sale_modes.values())
+
+
+def build_row(number: int, record: dict, categories: dict) -> tuple:
+    """
+    Valide un enregistrement.
+
+    Returns:
+        (ImportRow ou None, liste d'erreurs)
+    """
+    errors = []
+    if isinstance(record, str):
+        record = json.loads(record)
+    record = normalize_record(record)
+    for key in ('products', 'sale_modes'):
+        if isinstance(record.get(key), str):
+            record[key] = json.loads(record[key]) if record[key].strip() else []
+    email = User.objects.normalize_email(str(record.get('email') or '').strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        errors.append(f'email: adresse invalide ({email or "vide"})')
+    username = str(record.get('username') or email)[:150]
+
+    values = _values(record, PRODUCER_FIELDS)
+    for field in ('latitude', 'longitude'):
+        if field in values:
+            values[field] = _round_coordinate(values[field])
+    producer = ProducerProfile(**values)
+    _check(producer, ['user'], '', errors)
+
+    products = _build_products(record.get('products') or [], categories, errors)
+    sale_modes = _build_sale_modes(record.get('sale_modes') or [], errors)
+
+    if errors:
+        return None, errors
+    return ImportRow(number, email, username, producer, products, sale_modes), []
+
+
+def _check_usernames(rows: list) -> tuple:
+    """
+    Noms d'utilisateur déjà pris par un autre compte (en base ou plus tôt dans le lot).
+
+    Returns:
+        (lignes retenues, [(numéro, erreurs)])
+    """
+    taken = dict(
+        User.objects.filter(username__in=[row.username for row in rows]).values_list('username', 'email')
+    )
+    kept, rejected = [], []
+    for row in rows:
+        owner = taken.setdefault(row.username, row.email)
+        if owner != row.email:
+            rejected.append((row.number, [f'username: déjà utilisé ({row.username})']))
+        else:
+            kept.append(row)
+    return kept, rejected
+
+
+def _check_accounts(rows: list) -> tuple:
+    """
+    Comptes existants : le profil importé n'est rattaché qu'à un compte déjà
+    producteur, actif, hors équipe et sans suppression demandée. L'import ne
+    change jamais le rôle d'un compte.
+
+    Returns:
+        (lignes retenues, [(numéro, erreurs)])
+    """
+    accounts = {
+        email: (is_producer, is_staff or is_superuser, is_active and deletion_requested_at is None)
+        for email, is_producer, is_staff, is_superuser, is_active, deletion_requested_at
+        in User.objects.filter(email__in=[row.email for row in rows]).values_list(
+            'email', 'is_producer', 'is_staff', 'is_superuser', 'is_active', 'deletion_requested_at'
+        )
+    }
+    kept, rejected = [], []
+    for row in rows:
+        is_producer, is_team, is_usable = accounts.get(row.email, (True, False, True))
+        if is_team:
+            rejected.append((row.number, [f'email: compte de l\'équipe ({row.email})']))
+        elif not is_producer:
+            rejected.append((row.number, [f'email: compte existant non producteur ({row.email})']))
+        elif not is_usable:
+            rejected.append((row.number, [f'email: compte désactivé ou en cours de suppression ({row.email})']))
+        else:
+            kept.append(row)
+    return kept, rejected
+
+
+# Écriture
+
+def _upsert_by_key(model, objects: list, existing: dict, key, update_fields: list):
+    """
+    Met à jour ou crée des objets sans contrainte d'unicité en base : la clé
+    primaire des existants est reprise, puis un seul bulk_create en conflit sur id.
+    """
+    for obj in objects:
+        obj.pk = existing.get(key(obj))
+    model.objects.bulk_create(objects, update_conflicts=True, unique_fields=['id'], update_fields=update_fields)
+
+
+def _write_products(rows: list, producer_ids: dict, stats: dict):
+    products = []
+    for row in rows:
+        for product in row.products:
+            product.producer_id = producer_ids[row.producer.user_id]
+            products.append(product)
+    if not products:
+        return
+    existing = {
+        (producer_id, name): pk
+        for pk, producer_id, name in Product.objects.filter(
+            producer_id__in=producer_ids.values()
+        ).values_list('id', 'producer_id', 'name')
+    }
+    _upsert_by_key(Product, products, existing, lambda p: (p.producer_id, p.name), PRODUCT_FIELDS + ['updated_at'])
+    stats['products'] += len(products)
+
+
+def _write_sale_modes(rows: list, producer_ids: dict, stats: dict):
+    sale_modes = []
+    for row in rows:
+        for sale_mode, hours in row.sale_modes:
+            sale_mode.producer_id = producer_ids[row.producer.user_id]
+            sale_modes.append((sale_mode, hours))
+    if not sale_modes:
+        return
+    sale_mode_queryset = SaleMode.objects.filter(producer_id__in=producer_ids.values())
+    key = lambda s: (s.producer_id, s.mode_type, s.title)  # noqa: E731
+    existing = {
+        (producer_id, mode_type, title): pk
+        for pk, producer_id, mode_type, title in sale_mode_queryset.values_list('id', 'producer_id', 'mode_type', 'title')
+    }
+    _upsert_by_key(SaleMode, [s for s, _ in sale_modes], existing, key, SALE_MODE_FIELDS + ['updated_at'])
+    stats['sale_modes'] += len(sale_modes)
+
+    # Clés primaires des modes créés (non renvoyées par toutes les bases)
+    sale_mode_ids = {
+        (producer_id, mode_type, title): pk
+        for pk, producer_id, mode_type, title in sale_mode_queryset.values_list('id', 'producer_id', 'mode_type', 'title')
+    }
+    hours = []
+    for sale_mode, sale_mode_hours in sale_modes:
+        for hour in sale_mode_hours:
+            hour.sale_mode_id = sale_mode_ids[key(sale_mode)]
+            hours.append(hour)
+    if hours:
+        OpeningHours.objects.bulk_create(
+            hours,
+            update_conflicts=True,
+            unique_fields=['sale_mode', 'day_of_week'],
+            update_fields=OPENING_HOURS_FIELDS,
+        )
+        stats['opening_hours'] += len(hours)
+
+
+def write_chunk(rows: list, stats: dict) -> set:
+    """
+    Écrit un lot de lignes validées (à appeler dans une transaction).
+
+    Returns:
+        IDs des profils producteurs écrits
+    """
+    # Même compte plusieurs fois dans le lot : la dernière ligne l'emporte
+    rows = list({row.email: row for row in rows}.values())
+    now = timezone.now()
+
+    User.objects.bulk_create(
+        [
+            User(email=row.email, username=row.username, is_producer=True, is_active=True,
+                 password=make_password(None))
+            for row in rows
+        ],
+        # Comptes existants déjà vérifiés (_check_accounts) : laissés tels quels
+        ignore_conflicts=True,
+    )
+    user_ids = dict(User.objects.filter(email__in=[row.email for row in rows]).values_list('email', 'id'))
+    known_profiles = set(
+        ProducerProfile.objects.filter(user_id__in=user_ids.values()).values_list('user_id', flat=True)
+    )
+
+    for row in rows:
+        row.producer.user_id = user_ids[row.email]
+        row.producer.content_updated_at = now
+    ProducerProfile.objects.bulk_create(
+        [row.producer for row in rows],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=PRODUCER_FIELDS + ['content_updated_at', 'updated_at'],
+    )
+    producer_ids = dict(
+        ProducerProfile.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id')
+    )
+    new_owners = set(user_ids.values()) - known_profiles
+    stats['created'] += len(new_owners)
+    stats['updated'] += len(rows) - len(new_owners)
+    invalidate_owners_cache(new_owners)
+
+    _write_products(rows, producer_ids, stats)
+    _write_sale_modes(rows, producer_ids, stats)
+    return set(producer_ids.values())
+
+
+# Point de reprise
+
+def _source_signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+def load_checkpoint(checkpoint: str, path: str) -> tuple:
+    """
+    État enregistré par le point de reprise.
+
+    Returns:
+        (nombre d'enregistrements déjà traités, statistiques cumulées),
+        (0, {}) sans fichier
+    """
+    if not checkpoint or not os.path.exists(checkpoint):
+        return 0, {}
+    with open(checkpoint, encoding='utf-8') as f:
+        state = json.load(f)
+    signature = _source_signature(path)
+    if any(state.get(key) != value for key, value in signature.items()):
+        raise ValueError(f'Le point de reprise {checkpoint} correspond à un autre fichier ou à une autre version')
+    return state['rows'], state.get('stats') or {}
+
+
+def save_checkpoint(checkpoint: str, path: str, rows: int, stats: dict):
+    """Écrit le point de reprise de façon atomique (fichier temporaire puis rename)."""
+    state = dict(_source_signature(path), rows=rows, stats=stats, saved_at=timezone.now().isoformat())
+    tmp = f'{checkpoint}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, checkpoint)
+
+
+# Import
+
+def _read_chunk(chunk: list, number: int, categories: dict) -> tuple:
+    """
+    Valide un lot d'enregistrements numérotés à partir de number + 1.
+
+    Returns:
+        (lignes valides, [(numéro, erreurs)])
+    """
+    rows, rejected = [], []
+    for number, record in enumerate(chunk, number + 1):
+        try:
+            row, errors = build_row(number, record, categories)
+        except (TypeError, ValueError, AttributeError) as e:
+            row, errors = None, [f'ligne: enregistrement illisible ({e})']
+        if row is None:
+            rejected.append((number, errors))
+        else:
+            rows.append(row)
+    if rows:
+        rows, refused = _check_accounts(rows)
+        rejected += refused
+    if rows:
+        rows, taken = _check_usernames(rows)
+        rejected += taken
+    return rows, rejected
+
+
+def _import_chunk(chunk: list, categories: dict, stats: dict, dry_run: bool, on_invalid) -> set:
+    """Valide et écrit un lot, met à jour les statistiques ; renvoie les IDs des profils écrits."""
+    rows, rejected = _read_chunk(chunk, stats['rows'], categories)
+    written = set()
+    if rows and not dry_run:
+        with transaction.atomic():
+            written = write_chunk(rows, stats)
+    # Même email plusieurs fois dans le lot : seule la dernière ligne est écrite
+    unique = len({row.email for row in rows})
+    stats['rows'] += len(chunk)
+    stats['imported'] += unique
+    stats['duplicates'] += len(rows) - unique
+    stats['invalid'] += len(rejected)
+    if on_invalid is not None:
+        for number, errors in sorted(rejected):
+            on_invalid(number, errors)
+    return written
+
+
+def import_producers(path: str, fmt: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, checkpoint: str = None,
+                     resume: bool = False, dry_run: bool = False, on_chunk=None, on_invalid=None) -> dict:
+    """
+    Importe un fichier de producteurs par lots.
+
+    Args:
+        fmt: csv, geojson ou ndjson (déduit de l'extension sinon)
+        checkpoint: fichier de point de reprise, écrit après chaque lot et
+            supprimé à la fin de l'import
+        resume: reprendre après les enregistrements du point de reprise
+        dry_run: valider sans rien écrire
+        on_chunk: appelé avec les statistiques après chaque lot
+        on_invalid: appelé avec (numéro d'enregistrement, erreurs) pour chaque ligne rejetée
+
+    Returns:
+        Statistiques : enregistrements lus, sautés (reprise), importés, invalides,
+        doublons d'un même email dans un lot, profils créés et mis à jour, produits, modes de vente, horaires, durée
+    """
+    fmt = fmt or detect_format(path)
+    skip, saved = load_checkpoint(checkpoint, path) if resume else (0, {})
+    categories = {category.name: category for category in ProductCategory.objects.all()}
+    stats = {key: saved.get(key, 0) for key in STAT_KEYS}
+    stats.update(rows=skip, skipped=skip)
+    written = set()
+    started = time.monotonic()
+
+    with open(path, encoding='utf-8-sig', newline='' if fmt == 'csv' else None) as stream, deferred_invalidation():
+        records = itertools.islice(READERS[fmt](stream), skip, None)
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            written |= _import_chunk(chunk, categories, stats, dry_run, on_invalid)
+            if checkpoint and not dry_run:
+                save_checkpoint(checkpoint, path, stats['rows'], stats)
+            stats['seconds'] = time.monotonic() - started
+            if on_chunk is not None:
+                on_chunk(stats)
+
+    if checkpoint and not dry_run and os.path.exists(checkpoint):
+        # Import terminé : plus rien à reprendre
+        os.remove(checkpoint)
+    if written:
+        invalidate_producers_cache(written)
+    stats['seconds'] = time.monotonic() - started
+    logger.info(f'Producer import from {path}: {stats}')
+    return stats
@@ -4,15 +4,14 @@ Usage: python manage.py add_10_complete_producers
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.db import transaction
+from django.db.models import Count
 from decimal import Decimal
 from datetime import time
-import requests
-from io import BytesIO
-from PIL import Image
 
 from apps.producers.models import ProducerProfile, ProducerPhoto, SaleMode, OpeningHours
+from apps.producers.seed_images import DEFAULT_WORKERS, ImageDownloader, seed_photos
+from apps.producers.signals import touch_producer_content
 from apps.products.models import Product, ProductCategory, ProductPhoto
 
 User = get_user_model()
@@ -306,28 +305,6 @@ PRODUCERS_DATA = [
 ]
 
 
-def download_image(url, timeout=15):
-    """Télécharge une image depuis une URL."""
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(url, timeout=timeout, headers=headers, stream=True)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content))
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[-1])
-            else:
-                background.paste(img)
-            img = background
-        img_io = BytesIO()
-        img.save(img_io, format='JPEG', quality=85, optimize=True)
-        img_io.seek(0)
-        return img_io
-    except Exception as e:
-        raise Exception(f"Erreur téléchargement {url}: {e}")
-
-
 def get_or_create_category(name):
     """Retourne la catégorie produit par nom (legumes, fromage, etc.)."""
     defaults = {'icon': 'tag', 'display_name': name.capitalize(), 'order': 0}
@@ -335,12 +312,30 @@ def get_or_create_category(name):
     return cat
 
 
+def pending_photo_urls(data):
+    """URLs des photos pas encore présentes pour un producteur et ses produits."""
+    producer = ProducerProfile.objects.filter(user__email=data['email']).first()
+    if producer is None:
+        existing, product_counts = 0, {}
+    else:
+        existing = producer.photos.count()
+        product_counts = dict(
+            ProductPhoto.objects.filter(product__producer=producer)
+            .values_list('product__name').annotate(count=Count('id'))
+        )
+    urls = list(data.get('producer_photos', []))[existing:]
+    for pdata in data.get('products', []):
+        urls += list(pdata.get('photos', []))[product_counts.get(pdata['name'], 0):]
+    return urls
+
+
 class Command(BaseCommand):
     help = 'Crée 10 producteurs avec profils complets et photos téléchargées'
 
     def add_arguments(self, parser):
         parser.add_argument('--clear', action='store_true', help='Supprime les producteurs @example.com existants avant')
         parser.add_argument('--skip-photos', action='store_true', help='Ne pas télécharger les photos (création rapide)')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'Téléchargements simultanés (défaut: {DEFAULT_WORKERS})')
 
     def handle(self, *args, **options):
         if options['clear']:
@@ -355,114 +350,117 @@ class Command(BaseCommand):
         category_map = {cat.name: cat for cat in ProductCategory.objects.all()}
         created_count = 0
 
-        for data in PRODUCERS_DATA:
-            try:
-                with transaction.atomic():
-                    user, _ = User.objects.get_or_create(
-                        email=data['email'],
-                        defaults={'username': data['username'], 'is_producer': True, 'is_active': True}
-                    )
-                    if not user.password or not user.check_password('demo123456'):
-                        user.set_password('demo123456')
-                        user.save()
-
-                    lat = round(Decimal(str(data['latitude'])), 7)
-                    lng = round(Decimal(str(data['longitude'])), 7)
-                    producer, created = ProducerProfile.objects.get_or_create(
-                        user=user,
-                        defaults={
-                            'name': data['name'], 'category': data['category'], 'description': data['description'],
-                            'address': data['address'], 'latitude': lat, 'longitude': lng,
-                            'phone': data.get('phone', ''), 'email_contact': data.get('email_contact', ''),
-                            'website': data.get('website', ''), 'opening_hours': data.get('opening_hours', ''),
-                        }
-                    )
-                    if not created:
-                        producer.name = data['name']
-                        producer.category = data['category']
-                        producer.description = data['description']
-                        producer.address = data['address']
-                        producer.latitude = lat
-                        producer.longitude = lng
-                        producer.phone = data.get('phone', '')
-                        producer.email_contact = data.get('email_contact', '')
-                        producer.website = data.get('website', '')
-                        producer.opening_hours = data.get('opening_hours', '')
-                        producer.save()
-
-                    # Photos exploitation (ne pas dupliquer si déjà présentes)
-                    photo_count = producer.photos.count()
-                    if not skip_photos and photo_count < len(data.get('producer_photos', [])):
-                        for i, url in enumerate(data.get('producer_photos', []), 1):
-                            if photo_count >= len(data['producer_photos']):
-                                break
-                            try:
-                                img_io = download_image(url)
-                                fname = f"{data['username']}_photo_{photo_count + 1}.jpg"
-                                ProducerPhoto.objects.create(
-                                    producer=producer,
-                                    image_file=ContentFile(img_io.read(), name=fname)
-                                )
-                                photo_count += 1
-                            except Exception as e:
-                                self.stdout.write(self.style.WARNING(f'  Photo {i} {data["name"]}: {e}'))
+        with ImageDownloader(workers=options['workers']) as downloader:
+            if not skip_photos:
+                # Téléchargements en parallèle avant les transactions, une fois par URL
+                downloader.fetch_all(url for data in PRODUCERS_DATA for url in pending_photo_urls(data))
+            for data in PRODUCERS_DATA:
+                try:
+                    with transaction.atomic():
+                        user, _ = User.objects.get_or_create(
+                            email=data['email'],
+                            defaults={'username': data['username'], 'is_producer': True, 'is_active': True}
+                        )
+                        if not user.password or not user.check_password('demo123456'):
+                            user.set_password('demo123456')
+                            user.save()
 
-                    # Produits
-                    for pdata in data.get('products', []):
-                        cat_name = pdata.get('category', 'legumes')
-                        cat = category_map.get(cat_name) or get_or_create_category(cat_name)
-                        product, _ = Product.objects.get_or_create(
-                            producer=producer, name=pdata['name'],
+                        lat = round(Decimal(str(data['latitude'])), 7)
+                        lng = round(Decimal(str(data['longitude'])), 7)
+                        producer, created = ProducerProfile.objects.get_or_create(
+                            user=user,
                             defaults={
-                                'description': pdata.get('description', ''),
-                                'category': cat,
-                                'availability_type': pdata.get('availability_type', 'all_year'),
-                                'availability_start_month': pdata.get('availability_start_month'),
-                                'availability_end_month': pdata.get('availability_end_month'),
+                                'name': data['name'], 'category': data['category'], 'description': data['description'],
+                                'address': data['address'], 'latitude': lat, 'longitude': lng,
+                                'phone': data.get('phone', ''), 'email_contact': data.get('email_contact', ''),
+                                'website': data.get('website', ''), 'opening_hours': data.get('opening_hours', ''),
                             }
                         )
-                        if not skip_photos and product.photos.count() < len(pdata.get('photos', [])):
+                        if not created:
+                            producer.name = data['name']
+                            producer.category = data['category']
+                            producer.description = data['description']
+                            producer.address = data['address']
+                            producer.latitude = lat
+                            producer.longitude = lng
+                            producer.phone = data.get('phone', '')
+                            producer.email_contact = data.get('email_contact', '')
+                            producer.website = data.get('website', '')
+                            producer.opening_hours = data.get('opening_hours', '')
+                            producer.save()
+
+                        # Photos exploitation (ne pas dupliquer si déjà présentes)
+                        photo_count = producer.photos.count()
+                        producer_photos = [
+                            (f"{data['username']}_photo_{i}.jpg", url)
+                            for i, url in enumerate(data.get('producer_photos', []), 1)
+                            if i > photo_count
+                        ]
+                        product_photos = []
+
+                        # Produits
+                        for pdata in data.get('products', []):
+                            cat_name = pdata.get('category', 'legumes')
+                            cat = category_map.get(cat_name) or get_or_create_category(cat_name)
+                            product, _ = Product.objects.get_or_create(
+                                producer=producer, name=pdata['name'],
+                                defaults={
+                                    'description': pdata.get('description', ''),
+                                    'category': cat,
+                                    'availability_type': pdata.get('availability_type', 'all_year'),
+                                    'availability_start_month': pdata.get('availability_start_month'),
+                                    'availability_end_month': pdata.get('availability_end_month'),
+                                }
+                            )
+                            existing = product.photos.count()
+                            images = []
                             for j, url in enumerate(pdata.get('photos', []), 1):
-                                if product.photos.count() >= len(pdata['photos']):
-                                    break
-                                try:
-                                    img_io = download_image(url)
+                                if j > existing:
                                     fname = f"{data['username']}_{pdata['name'][:20].replace(' ', '_')}_{j}.jpg"
                                     fname = ''.join(c if c.isalnum() or c in '._-' else '_' for c in fname)[:80]
-                                    ProductPhoto.objects.create(
-                                        product=product,
-                                        image_file=ContentFile(img_io.read(), name=fname)
-                                    )
-                                except Exception:
-                                    pass
+                                    images.append((fname, url))
+                            if images:
+                                product_photos.append((product, images))
 
-                    # Modes de vente
-                    SaleMode.objects.filter(producer=producer).delete()
-                    for sm in data.get('sale_modes', []):
-                        sm_obj = SaleMode.objects.create(
-                            producer=producer,
-                            mode_type=sm['mode_type'],
-                            title=sm['title'],
-                            instructions=sm['instructions'],
-                            phone_number=sm.get('phone_number', ''),
-                            order=sm.get('order', 0),
-                        )
-                        for h in sm.get('opening_hours', []):
-                            OpeningHours.objects.create(
-                                sale_mode=sm_obj,
-                                day_of_week=h['day'],
-                                is_closed=h.get('is_closed', False),
-                                opening_time=time.fromisoformat(h['opening']) if not h.get('is_closed') and 'opening' in h else None,
-                                closing_time=time.fromisoformat(h['closing']) if not h.get('is_closed') and 'closing' in h else None,
+                        # Photos préchargées, un bulk_create par propriétaire
+                        if not skip_photos and (producer_photos or product_photos):
+                            photos, errors = seed_photos(downloader, ProducerPhoto, 'producer', producer, producer_photos)
+                            photo_count += len(photos)
+                            for error in errors:
+                                self.stdout.write(self.style.WARNING(f'  Photo {data["name"]}: {error}'))
+                            for product, images in product_photos:
+                                _, errors = seed_photos(downloader, ProductPhoto, 'product', product, images)
+                                for error in errors:
+                                    self.stdout.write(self.style.WARNING(f'  Photo {product.name}: {error}'))
+                            touch_producer_content(producer.id)
+
+                        # Modes de vente
+                        SaleMode.objects.filter(producer=producer).delete()
+                        for sm in data.get('sale_modes', []):
+                            sm_obj = SaleMode.objects.create(
+                                producer=producer,
+                                mode_type=sm['mode_type'],
+                                title=sm['title'],
+                                instructions=sm['instructions'],
+                                phone_number=sm.get('phone_number', ''),
+                                order=sm.get('order', 0),
                             )
+                            for h in sm.get('opening_hours', []):
+                                OpeningHours.objects.create(
+                                    sale_mode=sm_obj,
+                                    day_of_week=h['day'],
+                                    is_closed=h.get('is_closed', False),
+                                    opening_time=time.fromisoformat(h['opening']) if not h.get('is_closed') and 'opening' in h else None,
+                                    closing_time=time.fromisoformat(h['closing']) if not h.get('is_closed') and 'closing' in h else None,
+                                )
 
-                    created_count += 1
-                    self.stdout.write(self.style.SUCCESS(f'OK {data["name"]} ({photo_count} photos exploitation)'))
+                        created_count += 1
+                        self.stdout.write(self.style.SUCCESS(f'OK {data["name"]} ({photo_count} photos exploitation)'))
 
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'ERREUR {data["name"]}: {e}'))
-                import traceback
-                traceback.print_exc()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'ERREUR {data["name"]}: {e}'))
+                    import traceback
+                    traceback.print_exc()
 
         self.stdout.write(self.style.SUCCESS(f'\n{created_count} producteur(s) crees'))
         self.stdout.write('Identifiants: email @example.com, mot de passe: demo123456')
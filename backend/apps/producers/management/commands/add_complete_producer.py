@@ -4,15 +4,13 @@ Usage: python manage.py add_complete_producer
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.db import transaction
 from decimal import Decimal
 from datetime import time
-import requests
-from io import BytesIO
-from PIL import Image
 
 from apps.producers.models import ProducerProfile, ProducerPhoto, SaleMode, OpeningHours
+from apps.producers.seed_images import DEFAULT_WORKERS, ImageDownloader, seed_photos
+from apps.producers.signals import touch_producer_content
 from apps.products.models import Product, ProductCategory, ProductPhoto
 
 User = get_user_model()
@@ -217,37 +215,6 @@ Nous sommes engagés dans une démarche éco-responsable : compostage, rotation
 }
 
 
-def download_image(url, timeout=15):
-    """Télécharge une image depuis une URL."""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, timeout=timeout, headers=headers, stream=True)
-        response.raise_for_status()
-        
-        # Vérifier que c'est bien une image
-        img = Image.open(BytesIO(response.content))
-        
-        # Convertir en RGB si nécessaire
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[-1])
-            else:
-                background.paste(img)
-            img = background
-        
-        # Sauvegarder dans un BytesIO
-        img_io = BytesIO()
-        img.save(img_io, format='JPEG', quality=85, optimize=True)
-        img_io.seek(0)
-        
-        return img_io
-    except Exception as e:
-        raise Exception(f"Erreur lors du téléchargement de l'image {url}: {e}")
-
-
 class Command(BaseCommand):
     help = 'Crée une exploitation complète avec produits, calendrier, modes de vente et photos'
 
@@ -257,6 +224,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Met à jour l\'exploitation si elle existe déjà',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f'Téléchargements simultanés (défaut: {DEFAULT_WORKERS})',
+        )
 
     def handle(self, *args, **options):
         data = COMPLETE_PRODUCER
@@ -332,36 +305,7 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write(self.style.SUCCESS(f'✅ Profil créé: {data["name"]}'))
                 
-                # 3. Ajouter les photos de l'exploitation
-                self.stdout.write('\n📸 Téléchargement des photos de l\'exploitation...')
-                photo_count = 0
-                for i, photo_url in enumerate(data['producer_photos'], 1):
-                    try:
-                        # Vérifier si la photo existe déjà
-                        if ProducerPhoto.objects.filter(
-                            producer=producer,
-                            image_file__icontains=f'{data["username"]}_{i}'
-                        ).exists():
-                            self.stdout.write(f'  ⏭️  Photo {i} existe déjà, ignorée')
-                            continue
-                        
-                        img_io = download_image(photo_url)
-                        filename = f'{data["username"]}_photo_{i}.jpg'
-                        
-                        photo = ProducerPhoto.objects.create(
-                            producer=producer,
-                            image_file=ContentFile(img_io.read(), name=filename)
-                        )
-                        photo_count += 1
-                        self.stdout.write(f'  ✅ Photo {i} téléchargée')
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.WARNING(f'  ⚠️  Erreur photo {i}: {e}')
-                        )
-                
-                self.stdout.write(self.style.SUCCESS(f'✅ {photo_count} photo(s) de l\'exploitation ajoutée(s)'))
-                
-                # 4. Créer les produits avec leurs périodes de disponibilité
+                # 3. Créer les produits avec leurs périodes de disponibilité
                 self.stdout.write('\n🥕 Création des produits...')
                 
                 # Récupérer ou créer les catégories de produits
@@ -370,6 +314,7 @@ class Command(BaseCommand):
                     category_map[cat.name] = cat
                 
                 product_count = 0
+                product_photos = []
                 for product_data in data['products']:
                     try:
                         category = category_map.get(product_data['category'])
@@ -394,26 +339,15 @@ class Command(BaseCommand):
                             product.availability_end_month = product_data.get('availability_end_month')
                             product.save()
                         
-                        # Ajouter les photos du produit
-                        for j, photo_url in enumerate(product_data.get('photos', []), 1):
-                            try:
-                                if ProductPhoto.objects.filter(
-                                    product=product,
-                                    image_file__icontains=f'{product.name.lower().replace(" ", "_")}_{j}'
-                                ).exists():
-                                    continue
-                                
-                                img_io = download_image(photo_url)
-                                filename = f'{product.name.lower().replace(" ", "_")}_{j}.jpg'
-                                
-                                ProductPhoto.objects.create(
-                                    product=product,
-                                    image_file=ContentFile(img_io.read(), name=filename)
-                                )
-                            except Exception as e:
-                                self.stdout.write(
-                                    self.style.WARNING(f'    ⚠️  Erreur photo produit {product.name}: {e}')
-                                )
+                        # Photos du produit manquantes, téléchargées à l'étape 4
+                        existing = product.photos.count()
+                        missing = [
+                            (f'{product.name.lower().replace(" ", "_")}_{j}.jpg', photo_url)
+                            for j, photo_url in enumerate(product_data.get('photos', []), 1)
+                            if j > existing
+                        ]
+                        if missing:
+                            product_photos.append((product, missing))
                         
                         product_count += 1
                         period = 'Toute l\'année' if product_data['availability_type'] == 'all_year' else \
@@ -426,6 +360,37 @@ class Command(BaseCommand):
                 
                 self.stdout.write(self.style.SUCCESS(f'✅ {product_count} produit(s) créé(s)'))
                 
+                # 4. Télécharger les photos (exploitation et produits) en parallèle,
+                # puis un bulk_create par propriétaire
+                self.stdout.write('\n📸 Téléchargement des photos...')
+                # Fichiers nommés par contenu : les photos existantes sont comptées
+                existing = producer.photos.count()
+                producer_photos = [
+                    (f'{data["username"]}_photo_{i}.jpg', photo_url)
+                    for i, photo_url in enumerate(data['producer_photos'], 1)
+                    if i > existing
+                ]
+                if existing:
+                    self.stdout.write(f'  ⏭️  {existing} photo(s) de l\'exploitation déjà présente(s)')
+                with ImageDownloader(workers=options['workers']) as downloader:
+                    downloader.fetch_all(
+                        [url for _, url in producer_photos]
+                        + [url for _, images in product_photos for _, url in images]
+                    )
+                    photos, errors = seed_photos(downloader, ProducerPhoto, 'producer', producer, producer_photos)
+                    photo_count = len(photos)
+                    for error in errors:
+                        self.stdout.write(self.style.WARNING(f'  ⚠️  {error}'))
+                    for product, images in product_photos:
+                        photos, errors = seed_photos(downloader, ProductPhoto, 'product', product, images)
+                        for error in errors:
+                            self.stdout.write(
+                                self.style.WARNING(f'    ⚠️  Erreur photo produit {product.name}: {error}')
+                            )
+                touch_producer_content(producer.id)
+                
+                self.stdout.write(self.style.SUCCESS(f'✅ {photo_count} photo(s) de l\'exploitation ajoutée(s)'))
+                
                 # 5. Créer les modes de vente avec horaires
                 self.stdout.write('\n🏪 Création des modes de vente...')
                 
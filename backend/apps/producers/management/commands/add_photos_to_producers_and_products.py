@@ -3,13 +3,11 @@ Command Django pour ajouter des photos aux exploitations et produits existants.
 Usage: python manage.py add_photos_to_producers_and_products
 """
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
+from django.db import transaction
 from apps.producers.models import ProducerProfile, ProducerPhoto
+from apps.producers.seed_images import DEFAULT_WORKERS, ImageDownloader, seed_photos
+from apps.producers.signals import touch_producer_content
 from apps.products.models import Product, ProductPhoto
-import requests
-from io import BytesIO
-from PIL import Image
-from decimal import Decimal
 
 # URLs d'images Unsplash pour différentes catégories
 PRODUCER_PHOTOS_BY_CATEGORY = {
@@ -93,37 +91,6 @@ PRODUCT_PHOTOS_BY_NAME = {
 }
 
 
-def download_and_save_image(url, max_photos=3):
-    """Télécharge une image depuis une URL et retourne les données."""
-    try:
-        response = requests.get(url, timeout=15, headers={'User-Agent': 'Mozilla/5.0'})
-        response.raise_for_status()
-        
-        # Vérifier que c'est bien une image
-        img = Image.open(BytesIO(response.content))
-        
-        # Convertir en RGB si nécessaire (pour JPEG)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        
-        # Redimensionner si trop grand (max 1200px de largeur)
-        if img.width > 1200:
-            ratio = 1200 / img.width
-            new_height = int(img.height * ratio)
-            img = img.resize((1200, new_height), Image.Resampling.LANCZOS)
-        
-        # Sauvegarder dans un BytesIO
-        img_io = BytesIO()
-        img.save(img_io, format='JPEG', quality=85, optimize=True)
-        img_io.seek(0)
-        
-        return img_io.read()
-    except Exception as e:
-        raise Exception(f"Erreur lors du téléchargement de {url}: {str(e)}")
-
-
 class Command(BaseCommand):
     help = 'Ajoute des photos aux exploitations et produits existants'
 
@@ -150,6 +117,12 @@ class Command(BaseCommand):
             default=3,
             help='Nombre maximum de photos par produit (défaut: 3)',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f'Téléchargements simultanés (défaut: {DEFAULT_WORKERS})',
+        )
 
     def handle(self, *args, **options):
         producers_only = options.get('producers_only', False)
@@ -157,15 +130,16 @@ class Command(BaseCommand):
         max_photos_producer = options.get('max_photos_producer', 5)
         max_photos_product = options.get('max_photos_product', 3)
         
-        # Ajouter des photos aux exploitations
-        if not products_only:
-            self.stdout.write('\n📸 Ajout de photos aux exploitations...')
-            producers = ProducerProfile.objects.all()
-            total_producers = producers.count()
-            self.stdout.write(f'Trouvé {total_producers} exploitation(s)')
-            
-            for producer in producers:
-                try:
+        with ImageDownloader(workers=options['workers'], max_width=1200) as downloader:
+            # Ajouter des photos aux exploitations
+            if not products_only:
+                self.stdout.write('\n📸 Ajout de photos aux exploitations...')
+                producers = ProducerProfile.objects.select_related('user')
+                total_producers = producers.count()
+                self.stdout.write(f'Trouvé {total_producers} exploitation(s)')
+                
+                plan = []
+                for producer in producers:
                     current_photos = producer.photos.count()
                     if current_photos >= max_photos_producer:
                         self.stdout.write(
@@ -174,61 +148,26 @@ class Command(BaseCommand):
                         continue
                     
                     # Choisir les URLs de photos selon la catégorie
-                    category = producer.category
-                    photo_urls = PRODUCER_PHOTOS_BY_CATEGORY.get(category, PRODUCER_PHOTOS_BY_CATEGORY['default'])
+                    photo_urls = PRODUCER_PHOTOS_BY_CATEGORY.get(producer.category, PRODUCER_PHOTOS_BY_CATEGORY['default'])
                     
                     # Ajouter jusqu'à max_photos_producer photos
                     photos_to_add = max_photos_producer - current_photos
-                    added_count = 0
-                    
-                    for i, photo_url in enumerate(photo_urls[:photos_to_add]):
-                        try:
-                            # Vérifier si la photo existe déjà (basé sur l'URL)
-                            url_id = photo_url.split('/')[-2] if '/' in photo_url else str(i)
-                            if ProducerPhoto.objects.filter(
-                                producer=producer,
-                                image_file__contains=url_id[:20]
-                            ).exists():
-                                continue
-                            
-                            # Télécharger et sauvegarder
-                            img_data = download_and_save_image(photo_url)
-                            filename = f"{producer.user.username}_photo_{current_photos + added_count + 1}.jpg"
-                            
-                            ProducerPhoto.objects.create(
-                                producer=producer,
-                                image_file=ContentFile(img_data, name=filename)
-                            )
-                            added_count += 1
-                            
-                        except Exception as e:
-                            self.stdout.write(
-                                self.style.WARNING(f'    ⚠ Erreur photo {i+1}: {e}')
-                            )
-                    
-                    if added_count > 0:
-                        self.stdout.write(
-                            self.style.SUCCESS(f'  ✓ {producer.name}: {added_count} photo(s) ajoutée(s)')
-                        )
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(f'  ⚠ {producer.name}: aucune photo ajoutée')
-                        )
-                        
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ Erreur pour {producer.name}: {e}')
-                    )
-        
-        # Ajouter des photos aux produits
-        if not producers_only:
-            self.stdout.write('\n📸 Ajout de photos aux produits...')
-            products = Product.objects.all()
-            total_products = products.count()
-            self.stdout.write(f'Trouvé {total_products} produit(s)')
+                    plan.append((producer, producer.id, [
+                        (f"{producer.user.username}_photo_{current_photos + i}.jpg", photo_url)
+                        for i, photo_url in enumerate(photo_urls[:photos_to_add], 1)
+                    ]))
+                
+                self._add_photos(downloader, ProducerPhoto, 'producer', plan)
             
-            for product in products:
-                try:
+            # Ajouter des photos aux produits
+            if not producers_only:
+                self.stdout.write('\n📸 Ajout de photos aux produits...')
+                products = Product.objects.select_related('producer__user')
+                total_products = products.count()
+                self.stdout.write(f'Trouvé {total_products} produit(s)')
+                
+                plan = []
+                for product in products:
                     current_photos = product.photos.count()
                     if current_photos >= max_photos_product:
                         self.stdout.write(
@@ -251,52 +190,44 @@ class Command(BaseCommand):
                     
                     # Ajouter jusqu'à max_photos_product photos
                     photos_to_add = max_photos_product - current_photos
-                    added_count = 0
-                    
-                    for i, photo_url in enumerate(photo_urls[:photos_to_add]):
-                        try:
-                            # Vérifier si la photo existe déjà
-                            url_id = photo_url.split('/')[-2] if '/' in photo_url else str(i)
-                            if ProductPhoto.objects.filter(
-                                product=product,
-                                image_file__contains=url_id[:20]
-                            ).exists():
-                                continue
-                            
-                            # Télécharger et sauvegarder
-                            img_data = download_and_save_image(photo_url, max_photos_product)
-                            filename = f"{product.producer.user.username}_{product.name.lower().replace(' ', '_')}_{current_photos + added_count + 1}.jpg"
-                            # Nettoyer le filename des caractères spéciaux
-                            filename = ''.join(c if c.isalnum() or c in '._-' else '_' for c in filename)[:100]
-                            
-                            ProductPhoto.objects.create(
-                                product=product,
-                                image_file=ContentFile(img_data, name=filename)
-                            )
-                            added_count += 1
-                            
-                        except Exception as e:
-                            self.stdout.write(
-                                self.style.WARNING(f'    ⚠ Erreur photo {i+1} pour {product.name}: {e}')
-                            )
-                    
-                    if added_count > 0:
-                        self.stdout.write(
-                            self.style.SUCCESS(f'  ✓ {product.name}: {added_count} photo(s) ajoutée(s)')
-                        )
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(f'  ⚠ {product.name}: aucune photo ajoutée')
-                        )
-                        
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ Erreur pour {product.name}: {e}')
-                    )
+                    images = []
+                    for i, photo_url in enumerate(photo_urls[:photos_to_add], 1):
+                        filename = f"{product.producer.user.username}_{product_name_lower.replace(' ', '_')}_{current_photos + i}.jpg"
+                        # Nettoyer le filename des caractères spéciaux
+                        filename = ''.join(c if c.isalnum() or c in '._-' else '_' for c in filename)[:100]
+                        images.append((filename, photo_url))
+                    plan.append((product, product.producer_id, images))
+                
+                self._add_photos(downloader, ProductPhoto, 'product', plan)
         
         self.stdout.write(self.style.SUCCESS('\n✅ Terminé!'))
 
+    def _add_photos(self, downloader, model, owner_field, plan):
+        """
+        Télécharge toutes les images du plan en parallèle (une fois par URL), puis
+        crée les photos de chaque propriétaire en un bulk_create.
 
-
-
-
+        Args:
+            plan: liste de (propriétaire, id du producteur, [(nom de fichier, URL)])
+        """
+        downloader.fetch_all(url for _, _, images in plan for _, url in images)
+        for owner, producer_id, images in plan:
+            try:
+                with transaction.atomic():
+                    photos, errors = seed_photos(downloader, model, owner_field, owner, images)
+                    if photos:
+                        touch_producer_content(producer_id)
+                for error in errors:
+                    self.stdout.write(self.style.WARNING(f'    ⚠ {error}'))
+                if photos:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'  ✓ {owner.name}: {len(photos)} photo(s) ajoutée(s)')
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.WARNING(f'  ⚠ {owner.name}: aucune photo ajoutée')
+                    )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'  ✗ Erreur pour {owner.name}: {e}')
+                )
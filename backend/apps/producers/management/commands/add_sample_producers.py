@@ -4,13 +4,10 @@ Usage: python manage.py add_sample_producers
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.db import transaction
 from apps.producers.models import ProducerProfile, ProducerPhoto
-import requests
-from io import BytesIO
-from PIL import Image
-import random
+from apps.producers.seed_images import DEFAULT_WORKERS, ImageDownloader, seed_photos
+from apps.producers.signals import touch_producer_content
 
 User = get_user_model()
 
@@ -209,6 +206,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Supprime les exploitations d\'exemple existantes avant d\'en créer de nouvelles',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f'Téléchargements simultanés (défaut: {DEFAULT_WORKERS})',
+        )
 
     def handle(self, *args, **options):
         if options['clear']:
@@ -222,122 +225,92 @@ class Command(BaseCommand):
         self.stdout.write(f'Ajout de {len(EXPLOITATIONS)} exploitations...')
         
         created_count = 0
-        for exp_data in EXPLOITATIONS:
-            try:
-                with transaction.atomic():
-                    # Créer ou récupérer l'utilisateur
-                    user, created = User.objects.get_or_create(
-                        email=exp_data['email'],
-                        defaults={
-                            'username': exp_data['username'],
-                            'is_producer': True,
-                            'is_active': True,
-                        }
-                    )
-                    
-                    if not created:
-                        self.stdout.write(
-                            self.style.WARNING(f'Utilisateur {exp_data["email"]} existe déjà')
+        with ImageDownloader(workers=options['workers']) as downloader:
+            # Toutes les images téléchargées en parallèle avant les écritures
+            downloader.fetch_all(url for exp in EXPLOITATIONS for url in exp.get('photo_urls', []))
+            for exp_data in EXPLOITATIONS:
+                try:
+                    with transaction.atomic():
+                        # Créer ou récupérer l'utilisateur
+                        user, created = User.objects.get_or_create(
+                            email=exp_data['email'],
+                            defaults={
+                                'username': exp_data['username'],
+                                'is_producer': True,
+                                'is_active': True,
+                            }
                         )
-
-                    # Arrondir les coordonnées à 7 décimales maximum
-                    from decimal import Decimal
-                    latitude = round(Decimal(str(exp_data['latitude'])), 7)
-                    longitude = round(Decimal(str(exp_data['longitude'])), 7)
                     
-                    # Créer ou mettre à jour le profil producteur
-                    producer, producer_created = ProducerProfile.objects.get_or_create(
-                        user=user,
-                        defaults={
-                            'name': exp_data['name'],
-                            'category': exp_data['category'],
-                            'description': exp_data['description'],
-                            'address': exp_data['address'],
-                            'latitude': latitude,
-                            'longitude': longitude,
-                            'phone': exp_data.get('phone', ''),
-                            'email_contact': exp_data.get('email_contact', ''),
-                            'website': exp_data.get('website', ''),
-                            'opening_hours': exp_data.get('opening_hours', ''),
-                        }
-                    )
+                        if not created:
+                            self.stdout.write(
+                                self.style.WARNING(f'Utilisateur {exp_data["email"]} existe déjà')
+                            )
+
+                        # Arrondir les coordonnées à 7 décimales maximum
+                        from decimal import Decimal
+                        latitude = round(Decimal(str(exp_data['latitude'])), 7)
+                        longitude = round(Decimal(str(exp_data['longitude'])), 7)
                     
-                    if not producer_created:
-                        # Mettre à jour si déjà existant
-                        producer.name = exp_data['name']
-                        producer.category = exp_data['category']
-                        producer.description = exp_data['description']
-                        producer.address = exp_data['address']
-                        producer.latitude = latitude
-                        producer.longitude = longitude
-                        producer.phone = exp_data.get('phone', '')
-                        producer.email_contact = exp_data.get('email_contact', '')
-                        producer.website = exp_data.get('website', '')
-                        producer.opening_hours = exp_data.get('opening_hours', '')
-                        producer.save()
-                        self.stdout.write(
-                            self.style.WARNING(f'Profil {exp_data["name"]} mis à jour')
+                        # Créer ou mettre à jour le profil producteur
+                        producer, producer_created = ProducerProfile.objects.get_or_create(
+                            user=user,
+                            defaults={
+                                'name': exp_data['name'],
+                                'category': exp_data['category'],
+                                'description': exp_data['description'],
+                                'address': exp_data['address'],
+                                'latitude': latitude,
+                                'longitude': longitude,
+                                'phone': exp_data.get('phone', ''),
+                                'email_contact': exp_data.get('email_contact', ''),
+                                'website': exp_data.get('website', ''),
+                                'opening_hours': exp_data.get('opening_hours', ''),
+                            }
                         )
-
-                    # Ajouter les photos
-                    photo_count = 0
-                    for photo_url in exp_data.get('photo_urls', []):
-                        try:
-                            # Vérifier si la photo existe déjà
-                            if ProducerPhoto.objects.filter(
-                                producer=producer,
-                                image_file__contains=photo_url.split('/')[-1][:20]
-                            ).exists():
-                                continue
-
-                            # Télécharger l'image
-                            response = requests.get(photo_url, timeout=10)
-                            response.raise_for_status()
-                            
-                            # Vérifier que c'est bien une image
-                            img = Image.open(BytesIO(response.content))
-                            
-                            # Convertir en RGB si nécessaire (pour JPEG)
-                            if img.mode in ('RGBA', 'LA', 'P'):
-                                background = Image.new('RGB', img.size, (255, 255, 255))
-                                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                                img = background
-                            
-                            # Sauvegarder dans un BytesIO
-                            img_io = BytesIO()
-                            img.save(img_io, format='JPEG', quality=85)
-                            img_io.seek(0)
-                            
-                            # Créer la photo
-                            filename = f"{exp_data['username']}_{photo_count + 1}.jpg"
-                            photo = ProducerPhoto.objects.create(
-                                producer=producer,
-                                image_file=ContentFile(img_io.read(), name=filename)
-                            )
-                            photo_count += 1
-                            
-                        except Exception as e:
+                    
+                        if not producer_created:
+                            # Mettre à jour si déjà existant
+                            producer.name = exp_data['name']
+                            producer.category = exp_data['category']
+                            producer.description = exp_data['description']
+                            producer.address = exp_data['address']
+                            producer.latitude = latitude
+                            producer.longitude = longitude
+                            producer.phone = exp_data.get('phone', '')
+                            producer.email_contact = exp_data.get('email_contact', '')
+                            producer.website = exp_data.get('website', '')
+                            producer.opening_hours = exp_data.get('opening_hours', '')
+                            producer.save()
                             self.stdout.write(
-                                self.style.WARNING(
-                                    f'Erreur lors du téléchargement de la photo {photo_url} pour {exp_data["name"]}: {e}'
-                                )
+                                self.style.WARNING(f'Profil {exp_data["name"]} mis à jour')
                             )
+
+                        # Ajouter les photos (préchargées ; contenus déjà présents ignorés)
+                        photos, errors = seed_photos(downloader, ProducerPhoto, 'producer', producer, [
+                            (f"{exp_data['username']}_{i}.jpg", photo_url)
+                            for i, photo_url in enumerate(exp_data.get('photo_urls', []), 1)
+                        ])
+                        photo_count = len(photos)
+                        if photos:
+                            touch_producer_content(producer.id)
+                        for error in errors:
+                            self.stdout.write(self.style.WARNING(f'{error} ({exp_data["name"]})'))
                     
-                    created_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'✓ {exp_data["name"]} créé avec {photo_count} photo(s)'
+                        created_count += 1
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'✓ {exp_data["name"]} créé avec {photo_count} photo(s)'
+                            )
                         )
-                    )
                     
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'Erreur lors de la création de {exp_data["name"]}: {e}'
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f'Erreur lors de la création de {exp_data["name"]}: {e}'
+                        )
                     )
-                )
-                import traceback
-                traceback.print_exc()
+                    import traceback
+                    traceback.print_exc()
 
         self.stdout.write(
             self.style.SUCCESS(
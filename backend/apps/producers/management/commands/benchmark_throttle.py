@@ -0,0 +1,101 @@
+"""
+Commande Django pour mesurer le compromis précision / allers-retours du pré-throttle local.
+Usage: python manage.py benchmark_throttle [--requests 20000] [--workers 4] [--batches 0,10,50]
+"""
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import SimpleRateThrottle
+
+from config.throttling import LocalPreThrottle, RedisThrottleMixin
+
+
+class BenchmarkThrottle(RedisThrottleMixin, SimpleRateThrottle):
+    """Throttle dont la clé est directement l'identifiant simulé."""
+    scope = 'benchmark'
+
+    def __init__(self, rate, local_throttle, cache):
+        self.rate = rate
+        self.num_requests, self.duration = self.parse_rate(rate)
+        self.local_throttle = local_throttle
+        self._cache = cache
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def get_cache_key(self, request, view):
+        return request
+
+
+class Command(BaseCommand):
+    help = 'Mesure le pré-throttle local : appels au cache, latence et dépassement de la limite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Nombre de requêtes simulées (défaut: 20000)')
+        parser.add_argument('--idents', type=int, default=20, help='Nombre de clients distincts (défaut: 20)')
+        parser.add_argument('--workers', type=int, default=4, help='Nombre de processus simulés (défaut: 4)')
+        parser.add_argument('--rate', default='500/hour', help='Limite par client (défaut: 500/hour)')
+        parser.add_argument(
+            '--batches',
+            default='0,5,20,50',
+            help='Tailles de lot à comparer, 0 = un appel au cache par requête (défaut: 0,5,20,50)',
+        )
+
+    def handle(self, *args, **options):
+        cache = caches['ratelimit']
+        if isinstance(cache, DummyCache):
+            self.stdout.write(self.style.WARNING(
+                '⚠ Cache ratelimit factice : mesure sur un cache local en mémoire (pas de Redis)'
+            ))
+            cache = LocMemCache('benchmark-throttle', {})
+
+        limit = SimpleRateThrottle.parse_rate(None, options['rate'])[0]
+        self.stdout.write(
+            f"\n📊 {options['requests']} requêtes, {options['idents']} clients, "
+            f"{options['workers']} processus, limite {options['rate']}\n"
+        )
+        self.stdout.write(f"{'lot':>5} {'appels/req':>11} {'µs/req':>8} {'acceptées/client':>17} {'dépassement':>12}")
+
+        for batch in [int(b) for b in options['batches'].split(',')]:
+            result = self.run(cache, options, batch)
+            self.stdout.write(
+                f"{batch:>5} {result['remote_ratio']:>11.3f} {result['us_per_request']:>8.1f} "
+                f"{result['max_accepted']:>17} {result['max_accepted'] - limit:>+12}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Benchmark terminé'))
+
+    def run(self, cache, options, batch):
+        """Rejoue les requêtes en alternant les processus simulés."""
+        run_id = uuid.uuid4().hex[:8]
+        workers = [
+            BenchmarkThrottle(options['rate'], LocalPreThrottle(batch=batch), cache)
+            for _ in range(max(1, options['workers']))
+        ]
+        idents = [f'throttle_bench_{run_id}_{i}' for i in range(max(1, options['idents']))]
+        accepted = dict.fromkeys(idents, 0)
+
+        started = time.perf_counter()
+        for n in range(options['requests']):
+            throttle = workers[n % len(workers)]
+            ident = idents[(n // len(workers)) % len(idents)]
+            if throttle.allow_request(ident, None):
+                accepted[ident] += 1
+        duration = time.perf_counter() - started
+
+        if batch > 0:
+            remote_calls = sum(throttle.local_throttle.stats['remote'] for throttle in workers)
+        else:
+            # Sans pré-throttle, chaque requête fait un appel au cache
+            remote_calls = options['requests']
+
+        return {
+            'remote_ratio': remote_calls / max(1, options['requests']),
+            'us_per_request': duration * 1e6 / max(1, options['requests']),
+            'max_accepted': max(accepted.values()),
+        }
@@ -0,0 +1,86 @@
+"""
+Commande Django pour convertir les photos existantes au stockage adressé par contenu.
+Usage: python manage.py dedupe_photos [--dry-run] [--limit 500]
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.producers.blobs import acquire_blob, share_derivatives
+from apps.producers.models import PHOTO_READY
+from apps.producers.processing import get_photo_models
+from apps.producers.signals import deferred_invalidation
+
+
+class Command(BaseCommand):
+    help = 'Déduplique les photos antérieures : un fichier par contenu, partagé et compté (MediaBlob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les photos à convertir sans rien modifier',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Nombre maximum de photos par modèle',
+        )
+
+    def handle(self, *args, **options):
+        converted = failed = freed = 0
+        # Le contenu servi ne change pas : pas d'invalidation photo par photo
+        with deferred_invalidation():
+            for model in get_photo_models():
+                queryset = model.objects.filter(content_hash='').order_by('pk')
+                if options['limit']:
+                    queryset = queryset[:options['limit']]
+                if options['dry_run']:
+                    self.stdout.write(f'🔍 {model.__name__}: {queryset.count()} photo(s) à convertir')
+                    continue
+
+                self.stdout.write(f'🖼️  {model.__name__}...')
+                for photo in queryset.iterator(chunk_size=100):
+                    old_name = photo.image_file.name
+                    if not old_name or not default_storage.exists(old_name):
+                        self.stdout.write(self.style.WARNING(f'  ⚠️  Photo {photo.pk} : fichier manquant'))
+                        failed += 1
+                        continue
+                    try:
+                        freed += self._convert(photo, old_name)
+                        converted += 1
+                    except Exception as e:
+                        self.stdout.write(self.style.WARNING(f'  ⚠️  Photo {photo.pk} : {e}'))
+                        failed += 1
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {converted} photo(s) convertie(s), {failed} en échec, '
+                f'{freed / (1024 * 1024):.1f} Mo libérés'
+            ))
+
+    def _convert(self, photo, old_name) -> int:
+        """Rattache la photo à son blob ; retourne les octets libérés."""
+        old_derivatives = photo.derivatives or {}
+        with transaction.atomic():
+            with default_storage.open(old_name, 'rb') as f:
+                blob = acquire_blob(f, old_name)
+            photo.image_file = blob.name
+            photo.content_hash = blob.hash
+            update_fields = ['image_file', 'content_hash']
+            if blob.derivatives or old_derivatives:
+                if old_derivatives:
+                    photo.derivatives, photo.placeholder = share_derivatives(blob.hash, old_derivatives, photo.placeholder)
+                else:
+                    photo.derivatives, photo.placeholder = blob.derivatives, blob.placeholder
+                photo.processing_status = PHOTO_READY
+                update_fields += ['derivatives', 'placeholder', 'processing_status']
+            photo.save(update_fields=update_fields)
+
+        # Les déclinaisons de l'ancien fichier sont reprises par le blob ou supprimées
+        # par share_derivatives ; seul l'original reste à effacer
+        size = default_storage.size(old_name)
+        default_storage.delete(old_name)
+        # Premier exemplaire du contenu : copié dans le blob, rien de libéré
+        return size if blob.ref_count > 1 else 0
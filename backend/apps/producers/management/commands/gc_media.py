@@ -0,0 +1,94 @@
+"""
+Commande Django pour supprimer les fichiers média qui ne sont plus référencés.
+Usage: python manage.py gc_media [--dry-run] [--quarantine /var/media-quarantine] [--min-age-hours 24]
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.producers.media_gc import DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_SIZE, collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Supprime (ou met en quarantaine) les fichiers de MEDIA_ROOT qui ne sont référencés par aucune photo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les orphelins sans rien supprimer (-v 2 pour les lister)',
+        )
+        parser.add_argument(
+            '--quarantine',
+            default=None,
+            help='Répertoire où déplacer les orphelins au lieu de les supprimer',
+        )
+        parser.add_argument(
+            '--min-age-hours',
+            type=float,
+            default=24,
+            help='Âge minimal d\'un fichier pour être supprimé (défaut: 24, protège les uploads en cours)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Orphelins retirés par lot (défaut: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Lignes lues par requête pour les références (défaut: {DEFAULT_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        root = settings.MEDIA_ROOT
+        if not os.path.isdir(root):
+            raise CommandError(f'MEDIA_ROOT introuvable : {root}')
+        quarantine = options['quarantine']
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+            if quarantine.startswith(os.path.abspath(root) + os.sep):
+                # Sous MEDIA_ROOT, la quarantaine resterait servie publiquement
+                self.stdout.write(self.style.WARNING('⚠ Quarantaine sous MEDIA_ROOT : fichiers toujours accessibles'))
+
+        def report(name, size):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  🗑️  {name} ({size / 1024:.0f} Ko)')
+
+        mode = 'simulation' if options['dry_run'] else ('quarantaine' if quarantine else 'suppression')
+        self.stdout.write(f'\n🧹 Fichiers média orphelins ({mode})...')
+        stats = collect_garbage(
+            root=root,
+            dry_run=options['dry_run'],
+            quarantine=quarantine,
+            min_age=timedelta(hours=options['min_age_hours']),
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            on_orphan=report,
+        )
+
+        seconds = max(stats['seconds'], 1e-6)
+        self.stdout.write(
+            f'📚 {stats["references"]} chemin(s) référencé(s) en {stats["reference_seconds"]:.1f}s'
+        )
+        self.stdout.write(
+            f'📂 {stats["scanned"]} fichier(s) parcouru(s), {stats["scanned_bytes"] / (1024 * 1024):.1f} Mo '
+            f'en {stats["seconds"]:.1f}s ({stats["scanned"] / seconds:.0f} fichiers/s, '
+            f'{stats["scanned_bytes"] / (1024 * 1024) / seconds:.1f} Mo/s)'
+        )
+        if stats['recent']:
+            self.stdout.write(f'⏳ {stats["recent"]} fichier(s) non référencé(s) trop récent(s), conservé(s)')
+        orphan_mb = stats['orphan_bytes'] / (1024 * 1024)
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {stats["orphans"]} orphelin(s), {orphan_mb:.1f} Mo récupérables'))
+            return
+        action = 'déplacé(s) en quarantaine' if quarantine else 'supprimé(s)'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {stats["removed"]} orphelin(s) {action}, {orphan_mb:.1f} Mo libérés'
+        ))
+        if stats['errors']:
+            self.stdout.write(self.style.WARNING(f'⚠ {stats["errors"]} fichier(s) en erreur'))
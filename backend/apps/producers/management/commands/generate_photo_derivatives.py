@@ -0,0 +1,92 @@
+"""
+Commande Django pour générer les déclinaisons des photos existantes.
+Usage: python manage.py generate_photo_derivatives [--model producer|product] [--force] [--limit 100]
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.producers.models import ProducerPhoto
+from apps.producers.processing import process_photo
+from apps.producers.signals import deferred_invalidation, touch_producer_content
+from apps.products.models import ProductPhoto
+
+
+class Command(BaseCommand):
+    help = 'Génère les déclinaisons (vignettes WebP/JPEG) et placeholders des photos qui n\'en ont pas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['producer', 'product', 'all'],
+            default='all',
+            help='Photos à traiter (défaut: all)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regénère aussi les photos qui ont déjà des déclinaisons et un placeholder',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Nombre maximum de photos par modèle',
+        )
+
+    def handle(self, *args, **options):
+        self.force = options['force']
+        self.touched = set()
+        # Avec --force, un contenu partagé n'est redécliné qu'une fois
+        self.regenerated = set()
+        self.processed = self.failed = 0
+
+        # Une seule invalidation par producteur, à la fin
+        with deferred_invalidation():
+            for label, queryset, producer_of in self._sources(options['model']):
+                if not self.force:
+                    queryset = queryset.filter(Q(derivatives={}) | Q(placeholder=''))
+                queryset = queryset.order_by('pk')
+                if options['limit']:
+                    queryset = queryset[:options['limit']]
+                self._process_photos(label, queryset, producer_of)
+
+        for producer_id in self.touched:
+            touch_producer_content(producer_id)
+        self._report()
+
+    @staticmethod
+    def _sources(model):
+        """(libellé, queryset, producteur d'une photo) des modèles demandés."""
+        sources = []
+        if model in ('producer', 'all'):
+            sources.append(('producteurs', ProducerPhoto.objects.all(), lambda photo: photo.producer_id))
+        if model in ('product', 'all'):
+            sources.append(('produits', ProductPhoto.objects.select_related('product'), lambda photo: photo.product.producer_id))
+        return sources
+
+    def _process_photos(self, label, queryset, producer_of):
+        """Décline les photos d'un modèle, en comptant les succès et les échecs."""
+        self.stdout.write(f'🖼️  Photos {label}...')
+        for photo in queryset.iterator(chunk_size=100):
+            if not photo.image_file or not photo.image_file.storage.exists(photo.image_file.name):
+                self.stdout.write(self.style.WARNING(f'  ⚠️  Photo {photo.pk} : fichier manquant'))
+                self.failed += 1
+                continue
+            try:
+                force = self.force and (not photo.content_hash or photo.content_hash not in self.regenerated)
+                process_photo(photo, force=force)
+                if photo.content_hash:
+                    self.regenerated.add(photo.content_hash)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f'  ⚠️  Photo {photo.pk} : {e}'))
+                self.failed += 1
+                continue
+            self.processed += 1
+            self.touched.add(producer_of(photo))
+
+    def _report(self):
+        """Bilan du traitement."""
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {self.processed} photo(s) traitée(s), {self.failed} en échec, '
+            f'{len(self.touched)} producteur(s) invalidé(s)'
+        ))
@@ -0,0 +1,88 @@
+"""
+Commande Django pour générer un jeu de données synthétique (tests de charge).
+Usage: python manage.py generate_synthetic_data --producers 100000 [--seed 42] [--spread-km 25] [--clear]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.producers.synthetic import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_SPREAD_KM,
+    clear_synthetic_data,
+    generate_synthetic_data,
+)
+from apps.producers.utils import TOP_CITIES
+
+
+class Command(BaseCommand):
+    help = 'Génère des producteurs synthétiques (produits, modes de vente, horaires) autour des grandes villes, sans images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--producers',
+            type=int,
+            default=10000,
+            help='Nombre de producteurs à générer (défaut: 10000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Graine du générateur : même graine, mêmes données (défaut: 42)',
+        )
+        parser.add_argument(
+            '--spread-km',
+            type=float,
+            default=DEFAULT_SPREAD_KM,
+            help=f'Dispersion autour des villes en km, écart type (défaut: {DEFAULT_SPREAD_KM})',
+        )
+        parser.add_argument(
+            '--cities',
+            type=int,
+            default=None,
+            help=f'Nombre de villes utilisées, les plus peuplées d\'abord (défaut: toutes, {len(TOP_CITIES)})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Producteurs insérés par transaction (défaut: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Supprimer d\'abord toutes les données synthétiques existantes',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write('\n🗑️  Suppression des données synthétiques...')
+            deleted = clear_synthetic_data(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {deleted} compte(s) synthétique(s) supprimé(s)'))
+        if options['producers'] <= 0:
+            return
+
+        def report(stats):
+            seconds = max(stats['seconds'], 1e-6)
+            self.stdout.write(
+                f'  📦 {stats["producers"]}/{options["producers"]} producteurs, {stats["rows"]} lignes '
+                f'({stats["rows"] / seconds:.0f} lignes/s)'
+            )
+
+        self.stdout.write(f'\n🧪 Génération de {options["producers"]} producteurs (graine {options["seed"]})...')
+        try:
+            stats = generate_synthetic_data(
+                options['producers'],
+                seed=options['seed'],
+                spread_km=options['spread_km'],
+                cities=options['cities'],
+                batch_size=options['batch_size'],
+                on_batch=report,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {stats["producers"]} producteur(s), {stats["products"]} produit(s), '
+            f'{stats["sale_modes"]} mode(s) de vente, {stats["opening_hours"]} horaire(s) : '
+            f'{stats["rows"]} lignes en {stats["seconds"]:.1f}s'
+        ))
@@ -0,0 +1,119 @@
+"""
+Commande Django pour importer des producteurs en masse (CSV, GeoJSON, NDJSON).
+Usage: python manage.py import_producers producteurs.geojson [--chunk-size 500] [--resume] [--dry-run]
+
+Format d'un enregistrement (ligne NDJSON, properties d'une Feature GeoJSON dont
+la géométrie Point donne les coordonnées, ou colonnes CSV avec products et
+sale_modes en JSON) :
+
+    {"email": "ferme@example.com", "username": "ferme", "name": "Ferme des Prés",
+     "category": "maraîchage", "address": "...", "latitude": 48.1, "longitude": -1.6,
+     "products": [{"name": "Tomates", "category": "legumes", "availability_type": "custom",
+                   "availability_start_month": 6, "availability_end_month": 10}],
+     "sale_modes": [{"mode_type": "on_site", "title": "Vente à la ferme", "instructions": "...",
+                     "opening_hours": [{"day": 5, "opening": "09:00", "closing": "12:00"}]}]}
+
+Les comptes créés n'ont pas de mot de passe utilisable (réinitialisation par le
+producteur).
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.producers.importer import DEFAULT_CHUNK_SIZE, FORMATS, import_producers
+
+
+class Command(BaseCommand):
+    help = 'Importe (crée ou met à jour) des producteurs, produits et modes de vente depuis un fichier CSV, GeoJSON ou NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichier à importer')
+        parser.add_argument(
+            '--format',
+            dest='fmt',
+            choices=FORMATS,
+            default=None,
+            help='Format du fichier (défaut: déduit de l\'extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Enregistrements validés et écrits par transaction (défaut: {DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='Fichier de point de reprise (défaut: <fichier>.checkpoint.json)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Reprendre après le dernier lot enregistré dans le point de reprise',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Valider le fichier sans rien écrire',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint.json'
+        shown_errors = 0
+
+        def report_chunk(stats):
+            seconds = max(stats['seconds'], 1e-6)
+            read = stats['rows'] - stats['skipped']
+            self.stdout.write(
+                f'  📦 {stats["rows"]} enregistrement(s) lu(s), {stats["imported"]} importé(s), '
+                f'{stats["invalid"]} invalide(s) - {read / seconds:.0f} lignes/s'
+            )
+
+        def report_invalid(number, errors):
+            nonlocal shown_errors
+            shown_errors += 1
+            if options['verbosity'] >= 2 or shown_errors <= 20:
+                self.stdout.write(self.style.WARNING(f'  ⚠ Enregistrement {number}: {"; ".join(errors)}'))
+            elif shown_errors == 21:
+                self.stdout.write(self.style.WARNING('  ... (-v 2 pour toutes les erreurs)'))
+
+        mode = ' (simulation)' if options['dry_run'] else ''
+        self.stdout.write(f'\n📥 Import de {path}{mode}...')
+        try:
+            stats = import_producers(
+                path,
+                fmt=options['fmt'],
+                chunk_size=options['chunk_size'],
+                checkpoint=checkpoint,
+                resume=options['resume'],
+                dry_run=options['dry_run'],
+                on_chunk=report_chunk,
+                on_invalid=report_invalid,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self._report(stats, options['dry_run'])
+
+    def _report(self, stats, dry_run):
+        """Bilan de l'import."""
+        if stats['skipped']:
+            self.stdout.write(f'⏭️  {stats["skipped"]} enregistrement(s) déjà importé(s), sauté(s)')
+        seconds = max(stats['seconds'], 1e-6)
+        read = stats['rows'] - stats['skipped']
+        self.stdout.write(
+            f'⏱️  {read} enregistrement(s) en {stats["seconds"]:.1f}s ({read / seconds:.0f} lignes/s)'
+        )
+        if stats['invalid']:
+            self.stdout.write(self.style.WARNING(f'⚠ {stats["invalid"]} enregistrement(s) invalide(s) ignoré(s)'))
+        if stats['duplicates']:
+            self.stdout.write(self.style.WARNING(
+                f'🔁 {stats["duplicates"]} enregistrement(s) remplacé(s) par un suivant du même email'
+            ))
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'✅ {stats["imported"]} enregistrement(s) valide(s)'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {stats["created"]} producteur(s) créé(s), {stats["updated"]} mis à jour, '
+            f'{stats["products"]} produit(s), {stats["sale_modes"]} mode(s) de vente, '
+            f'{stats["opening_hours"]} horaire(s)'
+        ))
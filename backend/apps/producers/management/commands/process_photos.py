@@ -0,0 +1,80 @@
+"""
+Commande Django pour traiter les photos en attente (vérification, déclinaisons).
+Usage: python manage.py process_photos [--workers 4] [--batch-size 20] [--loop --interval 5]
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.producers.processing import DEFAULT_BATCH_SIZE, process_pending_photos
+
+
+def _init_worker():
+    """Initialisation d'un processus du pool (nécessaire hors fork)."""
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Traite la file des photos uploadées avec un pool de processus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Nombre de processus de traitement (défaut: nombre de CPU, 0 = dans ce processus)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Photos réservées à la fois (défaut: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Nombre maximal de photos traitées par passage',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Tourner en continu (worker)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Secondes entre deux passages sans photo avec --loop (défaut: 5)',
+        )
+
+    def handle(self, *args, **options):
+        executor = None
+        if options['workers'] > 0:
+            # Les processus fils n'utilisent pas la base : ne pas leur léguer de connexion
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker)
+            self.stdout.write(f'⚙️  Pool de {options["workers"]} processus')
+
+        try:
+            while True:
+                stats = process_pending_photos(executor, options['batch_size'], options['limit'])
+                done = stats['ready'] + stats['failed']
+                if done:
+                    self.stdout.write(self.style.SUCCESS(f'✅ {stats["ready"]} photo(s) prête(s)'))
+                    if stats['failed']:
+                        self.stdout.write(self.style.WARNING(f'⚠ {stats["failed"]} photo(s) en échec'))
+                elif not options['loop']:
+                    self.stdout.write(self.style.SUCCESS('✅ Aucune photo en attente'))
+
+                if not options['loop']:
+                    return
+                if not done:
+                    time.sleep(options['interval'])
+        finally:
+            if executor is not None:
+                executor.shutdown()
@@ -0,0 +1,76 @@
+"""
+Commande Django pour préchauffer le cache des réponses.
+Usage: python manage.py warm_cache [--pages 3] [--top 50] [--workers 4]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.producers.warmup import warm_cache
+
+
+class Command(BaseCommand):
+    help = 'Préchauffe le cache (listes par catégorie, catégories, fiches producteurs, nearby des grandes villes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--origin',
+            default=None,
+            help='Schéma et hôte des URLs préchauffées (défaut: CACHE_WARM_ORIGIN ou premier ALLOWED_HOSTS)',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=getattr(settings, 'CACHE_WARM_PAGES', 3),
+            help='Nombre de pages de liste par catégorie (défaut: 3)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=getattr(settings, 'CACHE_WARM_TOP', 50),
+            help='Nombre d\'URLs les plus demandées à rejouer (défaut: 50)',
+        )
+        parser.add_argument(
+            '--details',
+            type=int,
+            default=50,
+            help='Nombre de fiches producteur à préchauffer (défaut: 50)',
+        )
+        parser.add_argument(
+            '--cities',
+            type=int,
+            default=10,
+            help='Nombre de villes pour les recherches nearby (défaut: 10)',
+        )
+        parser.add_argument(
+            '--radius',
+            type=int,
+            default=50,
+            help='Rayon des recherches nearby en km (défaut: 50)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'CACHE_WARM_WORKERS', 4),
+            help='Taille du pool de threads (défaut: 4)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('\n🔥 Préchauffage du cache...')
+        report = warm_cache(
+            origin=options['origin'],
+            pages=options['pages'],
+            top=options['top'],
+            details=options['details'],
+            cities=options['cities'],
+            radius_km=options['radius'],
+            workers=options['workers'],
+        )
+
+        for url, duration in report['slowest']:
+            self.stdout.write(f'  ⏱ {duration:.3f}s {url}')
+        for url in report['failed']:
+            self.stdout.write(self.style.WARNING(f'  ⚠ Échec: {url}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ {report['succeeded']}/{report['total']} URL(s) préchauffée(s) en {report['duration']:.2f}s"
+        ))
@@ -0,0 +1,150 @@
+"""
+Ramasse-miettes des fichiers média.
+
+Un fichier de MEDIA_ROOT est référencé s'il est l'original ou une déclinaison d'une
+photo (producteur, produit) ou d'un blob (blobs.py). Les autres sont orphelins :
+fichiers de photos supprimées avant le stockage adressé par contenu, uploads
+interrompus, déclinaisons d'un rendu abandonné...
+
+- références : ensemble des chemins construit par requêtes values_list lues par
+  blocs (iterator), sans instancier les modèles ;
+- fichiers : arborescence parcourue en flux (os.scandir), sans liste complète ;
+- un fichier plus récent que min_age est conservé : il peut appartenir à un upload
+  ou un traitement en cours dont la ligne n'est pas encore validée ;
+- orphelins supprimés, ou déplacés dans un répertoire de quarantaine (même
+  arborescence, pour pouvoir les restaurer), par lots.
+"""
+import logging
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import MediaBlob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_MIN_AGE = timedelta(hours=24)
+
+
+def referenced_media_names(chunk_size: int = DEFAULT_CHUNK_SIZE) -> set:
+    """Chemins (relatifs à MEDIA_ROOT) des originaux et déclinaisons référencés."""
+    from .processing import get_photo_models
+
+    sources = [model.objects.values_list('image_file', 'derivatives') for model in get_photo_models()]
+    sources.append(MediaBlob.objects.values_list('name', 'derivatives'))
+
+    names = set()
+    for queryset in sources:
+        for name, derivatives in queryset.iterator(chunk_size=chunk_size):
+            if name:
+                names.add(name)
+            for by_width in (derivatives or {}).values():
+                names.update(by_width.values())
+    return names
+
+
+def iter_media_files(root: str, exclude=()):
+    """
+    Parcourt l'arborescence en flux.
+
+    Yields:
+        (chemin relatif avec des /, DirEntry)
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Fichiers cachés (.gitkeep...) et liens ignorés
+                    if entry.name.startswith('.') or entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entry.path) not in excluded:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield os.path.relpath(entry.path, root).replace(os.sep, '/'), entry
+        except OSError as e:
+            logger.warning(f'Could not scan {directory}: {e}')
+
+
+def collect_garbage(root: str = None, dry_run: bool = False, quarantine: str = None,
+                    min_age: timedelta = DEFAULT_MIN_AGE, batch_size: int = DEFAULT_BATCH_SIZE,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, on_orphan=None) -> dict:
+    """
+    Supprime (ou met en quarantaine) les fichiers non référencés.
+
+    Args:
+        dry_run: compter sans rien modifier
+        quarantine: répertoire où déplacer les orphelins au lieu de les supprimer
+        min_age: âge minimal d'un fichier pour être considéré
+        on_orphan: appelé avec (chemin relatif, taille) pour chaque orphelin
+
+    Returns:
+        Statistiques : fichiers et octets parcourus, orphelins, fichiers récents
+        ignorés, fichiers retirés, erreurs, durées
+    """
+    root = root or settings.MEDIA_ROOT
+    stats = {
+        'scanned': 0, 'scanned_bytes': 0, 'referenced': 0, 'recent': 0,
+        'orphans': 0, 'orphan_bytes': 0, 'removed': 0, 'errors': 0,
+    }
+    started = time.monotonic()
+    referenced = referenced_media_names(chunk_size)
+    stats['references'] = len(referenced)
+    stats['reference_seconds'] = time.monotonic() - started
+
+    cutoff = time.time() - min_age.total_seconds()
+    batch = []
+    for name, entry in iter_media_files(root, exclude=[quarantine] if quarantine else ()):
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        stats['scanned'] += 1
+        stats['scanned_bytes'] += stat.st_size
+        if name in referenced:
+            stats['referenced'] += 1
+            continue
+        if stat.st_mtime > cutoff:
+            stats['recent'] += 1
+            continue
+        stats['orphans'] += 1
+        stats['orphan_bytes'] += stat.st_size
+        if on_orphan is not None:
+            on_orphan(name, stat.st_size)
+        if not dry_run:
+            batch.append(name)
+            if len(batch) >= batch_size:
+                _remove_batch(root, batch, quarantine, stats)
+                batch = []
+    if batch:
+        _remove_batch(root, batch, quarantine, stats)
+
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def _remove_batch(root: str, names: list, quarantine: str, stats: dict):
+    for name in names:
+        path = os.path.join(root, *name.split('/'))
+        try:
+            if quarantine:
+                target = os.path.join(quarantine, *name.split('/'))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+            stats['removed'] += 1
+        except FileNotFoundError:
+            # Supprimé entre-temps (suppression de blob, dedupe_photos)
+            pass
+        except OSError as e:
+            logger.warning(f'Could not remove orphan media {name}: {e}')
+            stats['errors'] += 1
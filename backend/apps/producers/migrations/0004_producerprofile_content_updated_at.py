@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producers', '0003_alter_producerprofile_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='content_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producers', '0004_producerprofile_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerphoto',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
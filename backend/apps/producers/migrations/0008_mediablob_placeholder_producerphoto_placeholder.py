@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('producers', '0007_mediablob_producerphoto_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='producerphoto',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -1,11 +1,54 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import MinLengthValidator
 from django.core.exceptions import ValidationError
 from apps.auth.models import User
 from .validators import validate_image_file, validate_coordinates
 
+# États du traitement des photos en arrière-plan (voir processing.py)
+PHOTO_PENDING = 'pending'
+PHOTO_PROCESSING = 'processing'
+PHOTO_READY = 'ready'
+PHOTO_FAILED = 'failed'
+PHOTO_STATUS_CHOICES = [
+    (PHOTO_PENDING, 'En attente'),
+    (PHOTO_PROCESSING, 'En cours de traitement'),
+    (PHOTO_READY, 'Prête'),
+    (PHOTO_FAILED, 'Échec'),
+]
 
-class ProducerProfile(models.Model):
+
+class ValidatedSaveMixin:
+    """
+    save() valide l'instance (full_clean) avant d'écrire.
+
+    save(validated=True) : les données viennent d'être validées (serializer,
+    validators.validate_batch) ; seul clean() est rejoué, pour les invariants du
+    modèle, sans requête. Ni clean_fields ni les requêtes d'unicité : les
+    contraintes de la base restent le dernier rempart.
+    """
+
+    def save(self, *args, validated=False, **kwargs):
+        if validated:
+            self.clean()
+        else:
+            self.full_clean()
+        super().save(*args, **kwargs)
+
+
+class AtomicPhotoSaveMixin:
+    """
+    save() dans une transaction : la référence au blob prise en pre_save
+    (signals.store_photo_blob) est annulée si l'écriture de la photo échoue. Un
+    nouveau fichier déjà écrit reste alors orphelin, jusqu'au passage de gc_media.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class ProducerProfile(ValidatedSaveMixin, models.Model):
     """Profil d'un producteur local."""
     CATEGORY_CHOICES = [
         ('maraîchage', 'Maraîchage'),
@@ -50,6 +93,9 @@ class ProducerProfile(models.Model):
     opening_hours = models.TextField(blank=True, max_length=500, verbose_name="Horaires d'ouverture")
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Date de la dernière modification d'un objet embarqué dans la représentation
+    # (produits, photos, modes de vente, horaires, compte) ; sert au calcul des ETags
+    content_updated_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
@@ -63,16 +109,26 @@ class ProducerProfile(models.Model):
         validate_coordinates(self.latitude, self.longitude)
         super().clean()
 
-    def save(self, *args, **kwargs):
-        """Override save to call clean."""
-        self.full_clean()
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name
 
 
-class ProducerPhoto(models.Model):
+class MediaBlob(models.Model):
+    """Fichier image stocké une seule fois, partagé par les photos de même contenu (voir blobs.py)."""
+    hash = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    # Déclinaisons du contenu, reprises par chaque nouvelle photo identique
+    derivatives = models.JSONField(default=dict, blank=True)
+    placeholder = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} réf.)"
+
+
+class ProducerPhoto(AtomicPhotoSaveMixin, models.Model):
     """Photo d'une exploitation."""
     producer = models.ForeignKey(
         ProducerProfile,
@@ -84,6 +140,19 @@ class ProducerPhoto(models.Model):
         upload_to='producers/%Y/%m/%d/',
         validators=[validate_image_file]
     )
+    # Déclinaisons redimensionnées (voir images.py)
+    derivatives = models.JSONField(default=dict, blank=True)
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PHOTO_STATUS_CHOICES,
+        default=PHOTO_PENDING,
+        db_index=True
+    )
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    # SHA-256 du fichier (MediaBlob), vide pour les photos antérieures
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Image minuscule en data URI, affichée pendant le chargement (voir images.py)
+    placeholder = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
@@ -96,7 +165,7 @@ class ProducerPhoto(models.Model):
         return f"Photo de {self.producer.name}"
 
 
-class SaleMode(models.Model):
+class SaleMode(ValidatedSaveMixin, models.Model):
     """Mode de vente d'un producteur."""
     TYPE_CHOICES = [
         ('on_site', 'Vente sur place / point de vente'),
@@ -207,16 +276,11 @@ class SaleMode(models.Model):
             validate_coordinates(self.location_latitude, self.location_longitude)
         super().clean()
 
-    def save(self, *args, **kwargs):
-        """Override save to call clean."""
-        self.full_clean()
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return f"{self.get_mode_type_display()} - {self.title} ({self.producer.name})"
 
 
-class OpeningHours(models.Model):
+class OpeningHours(ValidatedSaveMixin, models.Model):
     """Horaires d'ouverture pour un mode de vente."""
     DAYS_OF_WEEK = [
         (0, 'Lundi'),
@@ -275,11 +339,6 @@ class OpeningHours(models.Model):
                 )
         super().clean()
 
-    def save(self, *args, **kwargs):
-        """Override save to call clean."""
-        self.full_clean()
-        super().save(*args, **kwargs)
-
     def __str__(self):
         if self.is_closed:
             return f"{self.get_day_of_week_display()} - Fermé"
@@ -0,0 +1,157 @@
+"""
+Upload groupé de photos (producteurs et produits).
+
+Une requête multipart porte plusieurs fichiers dans le champ image_files :
+
+- les fichiers sont validés en parallèle (en-tête, voir validators.py) ; ceux
+  refusés pendant la réception (uploadhandlers.py) sont rapportés tels quels ;
+- la limite de photos est vérifiée sous verrou de la ligne propriétaire : deux
+  uploads simultanés ne peuvent pas la dépasser ;
+- les blobs sont acquis en une fois (blobs.acquire_blobs) et les photos créées par
+  un seul bulk_create. bulk_create n'envoie ni pre_save ni post_save : stockage
+  adressé par contenu, invalidation du cache et réveil du worker sont faits ici.
+
+Le résultat est rendu fichier par fichier (nom du fichier, photo créée ou erreurs) :
+fichiers reçus dans l'ordre d'envoi, puis fichiers refusés pendant la réception.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from .blobs import acquire_blobs
+from .models import PHOTO_PENDING, PHOTO_READY
+from .processing import enqueue_photo
+from .signals import touch_producer_content
+from .uploadhandlers import ImageUploadHandler, get_upload_errors
+from .validators import validate_image_file
+
+BATCH_FIELD = 'image_files'
+BATCH_WORKERS = 4
+
+
+class ImageUploadMixin:
+    """
+    Vues recevant des photos : les actions listées dans image_upload_actions lisent
+    le corps avec ImageUploadHandler (uploadhandlers.py) au lieu des handlers Django
+    (FILE_UPLOAD_HANDLERS), qui restent ceux des autres vues.
+    """
+    image_upload_actions = ()
+
+    def initialize_request(self, request, *args, **kwargs):
+        drf_request = super().initialize_request(request, *args, **kwargs)
+        # self.action est défini par super() ; le corps n'est pas encore lu
+        if self.action in self.image_upload_actions:
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return drf_request
+
+
+def batch_throttle_cost(photo_cost: int) -> int:
+    """
+    Coût de throttling d'un envoi groupé (throttle_costs des vues) : le nombre de
+    fichiers n'est connu qu'après lecture du corps, le maximum autorisé est compté.
+    """
+    return photo_cost * getattr(settings, 'PHOTO_BATCH_MAX_FILES', 10)
+
+
+def check_photo_file(file) -> list:
+    """Erreurs de validation d'un fichier (liste vide s'il est valide)."""
+    try:
+        validate_image_file(file)
+    except DjangoValidationError as e:
+        return e.messages
+    return []
+
+
+def create_photos(model, owner_field: str, owner, files: list, executor=None) -> list:
+    """
+    Crée des photos en un bulk_create, fichiers passés par le stockage adressé par
+    contenu (blobs.acquire_blobs) ; les photos à traiter rejoignent la file.
+
+    À appeler dans une transaction. Sans post_save : l'appelant invalide le cache
+    du producteur (touch_producer_content).
+    """
+    blobs = acquire_blobs([(file, file.name) for file in files], executor)
+    photos = model.objects.bulk_create([
+        model(**{
+            owner_field: owner,
+            'image_file': blob.name,
+            'content_hash': blob.hash,
+            'derivatives': blob.derivatives,
+            'placeholder': blob.placeholder,
+            'processing_status': PHOTO_READY if blob.derivatives and blob.placeholder else PHOTO_PENDING,
+        })
+        for blob in blobs
+    ])
+    for photo in photos:
+        enqueue_photo(photo)
+    return photos
+
+
+def upload_photos(request, serializer_class, owner_field: str, owner, producer_id, limit: int = None,
+                  limit_message: str = None) -> list:
+    """
+    Crée les photos d'un upload groupé.
+
+    Args:
+        serializer_class: serializer des photos (son modèle est créé)
+        owner_field: champ du propriétaire sur le modèle (producer, product)
+        owner: instance propriétaire, verrouillée pendant l'écriture si limit est donné
+        producer_id: producteur dont le cache est invalidé
+        limit: nombre maximal de photos du propriétaire
+
+    Returns:
+        Un résultat par fichier : {'file_name', 'created', 'photo' ou 'errors'}
+    """
+    model = serializer_class.Meta.model
+    files = request.FILES.getlist(BATCH_FIELD)
+    rejected = get_upload_errors(request, BATCH_FIELD)
+    max_files = getattr(settings, 'PHOTO_BATCH_MAX_FILES', 10)
+    if not files and not rejected:
+        raise ValidationError({BATCH_FIELD: ['Aucun fichier envoyé.']})
+    if len(files) + len(rejected) > max_files:
+        raise ValidationError({BATCH_FIELD: [f'{max_files} fichiers maximum par envoi.']})
+
+    results = [{'file_name': file.name, 'created': False} for file in files]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(files), BATCH_WORKERS))) as executor:
+        valid = []
+        for index, errors in enumerate(executor.map(check_photo_file, files)):
+            if errors:
+                results[index]['errors'] = errors
+            else:
+                valid.append(index)
+
+        with transaction.atomic():
+            if limit is not None:
+                # Verrou du propriétaire : le comptage vaut jusqu'au commit
+                type(owner).objects.select_for_update().filter(pk=owner.pk).first()
+                slots = max(0, limit - model.objects.filter(**{owner_field: owner}).count())
+                for index in valid[slots:]:
+                    results[index]['errors'] = [limit_message or f'Le nombre maximum de photos ({limit}) a été atteint.']
+                valid = valid[:slots]
+
+            photos = create_photos(model, owner_field, owner, [files[index] for index in valid], executor)
+            if photos:
+                touch_producer_content(producer_id)
+
+    for index, photo in zip(valid, photos):
+        results[index]['created'] = True
+        results[index]['photo'] = serializer_class(photo, context={'request': request}).data
+    results += [
+        {'file_name': file_name, 'created': False, 'errors': [message]}
+        for _, file_name, message in rejected
+    ]
+    return results
+
+
+def batch_status(results: list) -> int:
+    """201 si tout est créé, 400 si rien ne l'est, 207 sinon."""
+    created = sum(1 for result in results if result['created'])
+    if created == len(results):
+        return status.HTTP_201_CREATED
+    if created == 0:
+        return status.HTTP_400_BAD_REQUEST
+    return status.HTTP_207_MULTI_STATUS
@@ -0,0 +1,218 @@
+"""
+Traitement des photos en arrière-plan.
+
+L'upload enregistre l'original et crée la photo à l'état pending : la requête ne
+décode ni ne redimensionne rien. La table des photos sert de file d'attente :
+
+- claim_photos réserve un lot (pending → processing, horodaté ; une réservation
+  plus ancienne que PHOTO_PROCESSING_TIMEOUT est reprise, worker mort) ;
+- render_photo fait le travail CPU (vérification, orientation, suppression des
+  EXIF, déclinaisons, placeholder) sans accès à la base, dans un processus du pool ;
+- finish_photo enregistre le résultat (ready ou failed) et invalide le cache.
+
+Une photo dont le contenu a déjà été traité (même content_hash, voir blobs.py)
+reprend les déclinaisons et le placeholder existants sans rendu.
+
+La commande process_photos consomme la file avec un ProcessPoolExecutor. En
+développement, un thread local réveillé après chaque upload traite la file sans
+pool (PHOTO_PROCESSING_WORKER).
+"""
+import logging
+import threading
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .blobs import known_derivatives, replace_derivatives, share_derivatives
+from .images import delete_derivatives, generate_derivatives, save_derivatives, verify_image
+from .models import PHOTO_FAILED, PHOTO_PENDING, PHOTO_PROCESSING, ProducerPhoto
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 20
+
+_worker_thread = None
+_worker_wakeup = threading.Event()
+
+
+def get_photo_models():
+    from apps.products.models import ProductPhoto
+    return [ProducerPhoto, ProductPhoto]
+
+
+def enqueue_photo(photo):
+    """
+    Signale une photo en attente : le worker local est réveillé après le commit.
+
+    Une photo créée est déjà dans la file (pending par défaut) ; un contenu connu
+    arrive prêt (voir blobs.py).
+    """
+    if photo.processing_status == PHOTO_PENDING and getattr(settings, 'PHOTO_PROCESSING_WORKER', True):
+        transaction.on_commit(wake_worker)
+
+
+def claim_photos(model, limit: int) -> list:
+    """
+    Réserve des photos à traiter.
+
+    Returns:
+        Liste de (pk, nom du fichier original, hash du contenu)
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'PHOTO_PROCESSING_TIMEOUT', 300))
+    with transaction.atomic():
+        queryset = model.objects.filter(
+            Q(processing_status=PHOTO_PENDING)
+            | Q(processing_status=PHOTO_PROCESSING, processing_started_at__lt=stale)
+        ).order_by('pk')
+        if connection.features.has_select_for_update_skip_locked:
+            # Plusieurs workers : chacun prend des lignes différentes
+            queryset = queryset.select_for_update(skip_locked=True)
+        claimed = list(queryset.values_list('pk', 'image_file', 'content_hash')[:limit])
+        if claimed:
+            model.objects.filter(pk__in=[pk for pk, _, _ in claimed]).update(
+                processing_status=PHOTO_PROCESSING, processing_started_at=now
+            )
+    return claimed
+
+
+def render_photo(name: str) -> tuple:
+    """
+    Travail CPU sur une photo, sans accès à la base (exécuté dans le pool).
+
+    Returns:
+        (déclinaisons, placeholder)
+    """
+    verify_image(default_storage, name)
+    return generate_derivatives(default_storage, name)
+
+
+def complete_photo(photo, rendered: tuple, replace: bool = False):
+    """Enregistre un rendu (déclinaisons, placeholder), partagé avec les photos de même contenu."""
+    derivatives, placeholder = rendered
+    if not photo.content_hash:
+        save_derivatives(photo, derivatives, placeholder)
+    elif replace:
+        replace_derivatives(photo.content_hash, derivatives, placeholder)
+        save_derivatives(photo, derivatives, placeholder, delete_previous=False)
+    else:
+        save_derivatives(photo, *share_derivatives(photo.content_hash, derivatives, placeholder), delete_previous=False)
+
+
+def finish_photo(model, pk, rendered=None, error=None, shared=False):
+    """Enregistre le résultat du traitement d'une photo."""
+    photo = model.objects.filter(pk=pk).first()
+    if photo is None:
+        # Photo supprimée pendant le traitement
+        if not shared and rendered:
+            delete_derivatives(rendered[0])
+        return
+    if error is not None:
+        logger.warning(f'Processing failed for {model.__name__} {pk}: {error}')
+        photo.processing_status = PHOTO_FAILED
+        photo.processing_started_at = None
+        photo.save(update_fields=['processing_status', 'processing_started_at'])
+        return
+    complete_photo(photo, rendered)
+
+
+def process_photo(photo, force: bool = False) -> dict:
+    """
+    (Re)génère les déclinaisons d'une photo dans le processus courant.
+
+    Sans force, un contenu déjà traité n'est pas redécliné.
+    """
+    if not force:
+        known = known_derivatives([photo.content_hash]).get(photo.content_hash)
+        if known:
+            save_derivatives(photo, *known, delete_previous=False)
+            return photo.derivatives
+    complete_photo(photo, render_photo(photo.image_file.name), replace=force)
+    return photo.derivatives
+
+
+def _render_serial(to_render) -> list:
+    """Rendu dans le processus courant : [(pk, déclinaisons, erreur)]."""
+    results = []
+    for pk, name in to_render:
+        try:
+            results.append((pk, render_photo(name), None))
+        except Exception as e:
+            results.append((pk, None, e))
+    return results
+
+
+def _render_pool(executor, to_render) -> list:
+    """Rendu via un pool, dans l'ordre de fin : [(pk, déclinaisons, erreur)]."""
+    results = []
+    futures = {executor.submit(render_photo, name): pk for pk, name in to_render}
+    for future in as_completed(futures):
+        try:
+            results.append((futures[future], future.result(), None))
+        except Exception as e:
+            results.append((futures[future], None, e))
+    return results
+
+
+def _process_claimed(model, claimed: list, executor, stats: dict):
+    """Termine un lot de photos réservées et met à jour les statistiques."""
+    # Contenus déjà déclinés : aucun rendu
+    known = known_derivatives(digest for _, _, digest in claimed)
+    for pk, _, digest in claimed:
+        if digest in known:
+            finish_photo(model, pk, known[digest], shared=True)
+            stats['ready'] += 1
+    to_render = [(pk, name) for pk, name, digest in claimed if digest not in known]
+
+    results = _render_serial(to_render) if executor is None else _render_pool(executor, to_render)
+    for pk, rendered, error in results:
+        finish_photo(model, pk, rendered, error)
+        stats['failed' if error is not None else 'ready'] += 1
+
+
+def process_pending_photos(executor=None, batch_size: int = DEFAULT_BATCH_SIZE, limit: int = None) -> dict:
+    """
+    Traite les photos en attente, dans le processus courant ou via un pool.
+
+    Returns:
+        Nombre de photos prêtes et en échec
+    """
+    stats = {'ready': 0, 'failed': 0}
+    remaining = limit
+    for model in get_photo_models():
+        while remaining is None or remaining > 0:
+            claimed = claim_photos(model, batch_size if remaining is None else min(batch_size, remaining))
+            if not claimed:
+                break
+            if remaining is not None:
+                remaining -= len(claimed)
+            _process_claimed(model, claimed, executor, stats)
+    return stats
+
+
+def wake_worker():
+    """Réveille le thread de traitement, en le démarrant si besoin."""
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=_run_worker, name='photo-processing', daemon=True)
+        _worker_thread.start()
+    _worker_wakeup.set()
+
+
+def _run_worker():
+    """Boucle du thread local : traite la file puis se rendort."""
+    interval = getattr(settings, 'PHOTO_PROCESSING_INTERVAL', 60)
+    while True:
+        _worker_wakeup.wait(interval)
+        _worker_wakeup.clear()
+        try:
+            process_pending_photos()
+        except Exception as e:
+            logger.error(f'Photo processing worker failed: {e}', exc_info=True)
+        finally:
+            connection.close()
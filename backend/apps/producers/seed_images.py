@@ -0,0 +1,177 @@
+"""
+Téléchargement des images des commandes de peuplement (add_*_producers...).
+
+- une seule requests.Session : connexions keep-alive réutilisées, pool dimensionné
+  sur le nombre de threads, quelques nouvelles tentatives sur les erreurs
+  transitoires ;
+- téléchargements en parallèle dans un pool de threads borné ; une URL n'est
+  téléchargée qu'une fois par commande (les mêmes images reviennent souvent) ;
+- SEED_IMAGE_BASE_URL remplace le schéma et l'hôte des URLs : les commandes
+  peuvent viser un serveur HTTP local (tests, environnement sans accès réseau).
+
+L'écriture des photos se fait ensuite en un bulk_create par propriétaire
+(photo_uploads.create_photos), dans la transaction du producteur.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .blobs import hash_file
+from .photo_uploads import create_photos
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 15
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def build_session(workers: int = DEFAULT_WORKERS) -> requests.Session:
+    """Session HTTP partagée, une connexion gardée ouverte par thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=workers,
+        pool_maxsize=workers,
+        max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def rewrite_url(url: str) -> str:
+    """Applique SEED_IMAGE_BASE_URL (schéma et hôte) à une URL."""
+    base = getattr(settings, 'SEED_IMAGE_BASE_URL', '')
+    if not base:
+        return url
+    target = urlsplit(base)
+    parts = urlsplit(url)
+    return urlunsplit((target.scheme, target.netloc, target.path.rstrip('/') + parts.path, parts.query, ''))
+
+
+def to_jpeg(content: bytes, max_width: int = None) -> bytes:
+    """Vérifie l'image et la réencode en JPEG RGB (fond blanc sous la transparence)."""
+    img = Image.open(BytesIO(content))
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, int(img.height * max_width / img.width)), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=85, optimize=True)
+    return output.getvalue()
+
+
+class ImageDownloader:
+    """
+    Télécharge des images en parallèle avec une session partagée.
+
+    Usage:
+        with ImageDownloader(workers=8) as downloader:
+            images = downloader.fetch_all(urls)
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout: int = DEFAULT_TIMEOUT, max_width: int = None):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_width = max_width
+        self.session = None
+        self.executor = None
+        self._cache = {}
+
+    def __enter__(self):
+        self.session = build_session(self.workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def fetch(self, url: str) -> bytes:
+        """Télécharge une image ; lève une exception en cas d'échec."""
+        response = self.session.get(rewrite_url(url), timeout=self.timeout)
+        response.raise_for_status()
+        return to_jpeg(response.content, self.max_width)
+
+    def _fetch_result(self, url: str) -> tuple:
+        try:
+            return self.fetch(url), None
+        except Exception as e:
+            logger.debug(f'Could not download {url}: {e}')
+            return None, f'Erreur lors du téléchargement de {url}: {e}'
+
+    def fetch_all(self, urls) -> dict:
+        """
+        Télécharge les URLs pas encore vues, en parallèle.
+
+        Returns:
+            url → (contenu JPEG ou None, message d'erreur ou None)
+        """
+        urls = list(dict.fromkeys(urls))
+        missing = [url for url in urls if url not in self._cache]
+        for url, result in zip(missing, self.executor.map(self._fetch_result, missing)):
+            self._cache[url] = result
+        return {url: self._cache[url] for url in urls}
+
+
+def photo_files(images: list, existing_hashes=()) -> list:
+    """
+    Fichiers à créer pour un propriétaire, sans les contenus qu'il a déjà.
+
+    Args:
+        images: liste de (nom de fichier, contenu)
+        existing_hashes: content_hash des photos existantes du propriétaire
+
+    Returns:
+        ContentFile hachés (hash_file ne relit pas le contenu ensuite)
+    """
+    seen = set(existing_hashes)
+    files = []
+    for name, content in images:
+        file = ContentFile(content, name=name)
+        file.content_hash = hash_file(file)[0]
+        if file.content_hash in seen:
+            continue
+        seen.add(file.content_hash)
+        files.append(file)
+    return files
+
+
+def seed_photos(downloader: ImageDownloader, model, owner_field: str, owner, images: list) -> tuple:
+    """
+    Crée les photos d'un propriétaire à partir d'URLs, en un bulk_create.
+
+    Les URLs déjà passées à downloader.fetch_all ne sont pas retéléchargées : pour
+    paralléliser entre propriétaires, tout précharger d'abord. À appeler dans la
+    transaction du producteur, puis touch_producer_content.
+
+    Args:
+        images: liste de (nom de fichier, URL)
+
+    Returns:
+        (photos créées, messages d'erreur)
+    """
+    downloaded = downloader.fetch_all(url for _, url in images)
+    errors = [downloaded[url][1] for _, url in images if downloaded[url][1]]
+    existing = model.objects.filter(**{owner_field: owner}).exclude(content_hash='').values_list('content_hash', flat=True)
+    files = photo_files(
+        [(name, downloaded[url][0]) for name, url in images if downloaded[url][0] is not None],
+        existing,
+    )
+    if not files:
+        return [], errors
+    return create_photos(model, owner_field, owner, files, downloader.executor), errors
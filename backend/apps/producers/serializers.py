@@ -1,16 +1,74 @@
 from rest_framework import serializers
+from rest_framework.serializers import raise_errors_on_nested_writes
 from decimal import Decimal
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from .images import thumbnail_name
 from .models import ProducerProfile, ProducerPhoto, SaleMode, OpeningHours
-from .validators import validate_coordinates
+from .processing import enqueue_photo
+from .signals import deferred_invalidation, touch_producer_content
+from .uploadhandlers import get_upload_errors
+from .validators import validate_batch, validate_coordinates
 from apps.auth.serializers import UserSerializer
 from apps.products.models import Product
 
-class ProducerPhotoSerializer(serializers.ModelSerializer):
+
+class PhotoDerivativesSerializer(serializers.ModelSerializer):
+    """
+    Base des serializers de photos : déclinaisons générées en arrière-plan après
+    l'upload (processing_status), exposées sous forme de srcset par format, de
+    vignette pour les listes et de placeholder (data URI) à afficher en attendant.
+    """
+    # FileField et non ImageField : pas de décodage complet dans la requête, seul
+    # l'en-tête est validé (validate_image_file, uploadhandlers.py)
+    image_file = serializers.FileField()
+    srcset = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+
+    def to_internal_value(self, data):
+        # Fichiers refusés pendant la réception : absents de request.FILES
+        request = self.context.get('request')
+        rejected = get_upload_errors(request, 'image_file') if request is not None else []
+        if rejected:
+            raise serializers.ValidationError({'image_file': [message for _, _, message in rejected]})
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        photo = super().create(validated_data)
+        enqueue_photo(photo)
+        return photo
+
+    def _media_url(self, obj, name):
+        url = obj.image_file.storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_srcset(self, obj):
+        """Ex: {"webp": "…_160.webp 160w, …_480.webp 480w", "jpeg": "…"}"""
+        return {
+            fmt: ', '.join(
+                f'{self._media_url(obj, name)} {width}w'
+                for width, name in sorted(names.items(), key=lambda item: int(item[0]))
+            )
+            for fmt, names in (obj.derivatives or {}).items() if names
+        }
+
+    def get_thumbnail(self, obj):
+        """Petite déclinaison pour les cartes, l'original à défaut."""
+        name = thumbnail_name(obj.derivatives)
+        if name:
+            return self._media_url(obj, name)
+        if obj.image_file:
+            return self._media_url(obj, obj.image_file.name)
+        return None
+
+
+class ProducerPhotoSerializer(PhotoDerivativesSerializer):
     """Serializer pour les photos de producteurs."""
     class Meta:
         model = ProducerPhoto
-        fields = ('id', 'image_file', 'created_at')
-        read_only_fields = ('id', 'created_at')
+        fields = ('id', 'image_file', 'thumbnail', 'srcset', 'placeholder', 'processing_status', 'created_at')
+        read_only_fields = ('id', 'placeholder', 'processing_status', 'created_at')
 
     def validate_image_file(self, value):
         """Validate image file in serializer."""
@@ -65,7 +123,46 @@ class ProductSimpleSerializer(serializers.ModelSerializer):
         return ProductPhotoSerializer(photos, many=True).data
 
 
-class ProducerProfileSerializer(serializers.ModelSerializer):
+class ValidatedModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer qui enregistre par save(validated=True) : les données viennent
+    d'être validées, full_clean ne les revalide pas (voir models.ValidatedSaveMixin).
+
+    Le serializer doit donc couvrir ce que clean_fields et validate_unique
+    vérifieraient (bornes, format, unicité) ; clean() reste exécuté.
+    """
+
+    def create(self, validated_data):
+        raise_errors_on_nested_writes('create', self, validated_data)
+        instance = self.Meta.model(**validated_data)
+        instance.save(validated=True)
+        return instance
+
+    def update(self, instance, validated_data):
+        raise_errors_on_nested_writes('update', self, validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(validated=True)
+        return instance
+
+
+def validate_opening_days(opening_hours):
+    """Un seul horaire par jour : unique_together vérifié sans requête, avant l'écriture."""
+    days = [hours['day_of_week'] for hours in opening_hours or []]
+    if len(days) != len(set(days)):
+        raise serializers.ValidationError({'opening_hours': 'Un seul horaire par jour de la semaine.'})
+
+
+def create_opening_hours(sale_mode, opening_hours):
+    """Crée les horaires validés d'un mode de vente en un bulk_create (sans post_save)."""
+    OpeningHours.objects.bulk_create(validate_batch(
+        (OpeningHours(sale_mode=sale_mode, **hours_data) for hours_data in opening_hours),
+        exclude=['sale_mode'],
+        unique=False,
+    ))
+
+
+class ProducerProfileSerializer(ValidatedModelSerializer):
     """Serializer pour les profils de producteurs."""
     user = UserSerializer(read_only=True)
     photos = ProducerPhotoSerializer(many=True, read_only=True)
@@ -95,14 +192,18 @@ class ProducerProfileSerializer(serializers.ModelSerializer):
     def get_sale_modes(self, obj):
         """Return sale modes - safely handle missing table."""
         try:
-            sale_modes = obj.sale_modes.all().prefetch_related('opening_hours')
+            if 'sale_modes' in getattr(obj, '_prefetched_objects_cache', {}):
+                # Déjà préchargés avec leurs horaires (action me)
+                sale_modes = obj.sale_modes.all()
+            else:
+                sale_modes = obj.sale_modes.all().prefetch_related('opening_hours')
             return SaleModeSerializer(sale_modes, many=True).data
         except Exception:
             # If sale_modes table doesn't exist, return empty list
             return []
 
 
-class ProducerProfileCreateSerializer(serializers.ModelSerializer):
+class ProducerProfileCreateSerializer(ValidatedModelSerializer):
     """Serializer pour créer un profil producteur."""
     # Utiliser CharField pour arrondir avant la conversion en Decimal
     latitude = serializers.CharField()
@@ -230,7 +331,7 @@ class SaleModeSerializer(serializers.ModelSerializer):
         return data
 
 
-class SaleModeCreateSerializer(serializers.ModelSerializer):
+class SaleModeCreateSerializer(ValidatedModelSerializer):
     """Serializer pour créer un mode de vente."""
     opening_hours = OpeningHoursSerializer(many=True, required=False)
     location_latitude = serializers.CharField(required=False, allow_blank=True)
@@ -251,8 +352,9 @@ class SaleModeCreateSerializer(serializers.ModelSerializer):
             return None
         try:
             lat_float = float(value)
+            validate_coordinates(lat_float, 0)
             return Decimal(str(round(lat_float, 7)))
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, DjangoValidationError):
             raise serializers.ValidationError("Latitude invalide.")
 
     def validate_location_longitude(self, value):
@@ -261,8 +363,9 @@ class SaleModeCreateSerializer(serializers.ModelSerializer):
             return None
         try:
             lng_float = float(value)
-            return Decimal(str(round(lng_float, 11)))
-        except (ValueError, TypeError):
+            validate_coordinates(0, lng_float)
+            return Decimal(str(round(lng_float, 7)))
+        except (ValueError, TypeError, DjangoValidationError):
             raise serializers.ValidationError("Longitude invalide.")
 
     def validate(self, data):
@@ -273,22 +376,22 @@ class SaleModeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 'phone_number': 'Le numéro de téléphone est obligatoire pour les commandes par téléphone.'
             })
+        validate_opening_days(data.get('opening_hours'))
         
         return data
 
     def create(self, validated_data):
         """Create sale mode with opening hours."""
         opening_hours_data = validated_data.pop('opening_hours', [])
-        sale_mode = SaleMode.objects.create(**validated_data)
-        
-        # Create opening hours
-        for hours_data in opening_hours_data:
-            OpeningHours.objects.create(sale_mode=sale_mode, **hours_data)
-        
+        # Une seule invalidation du producteur, après les horaires
+        with transaction.atomic(), deferred_invalidation():
+            sale_mode = super().create(validated_data)
+            create_opening_hours(sale_mode, opening_hours_data)
+        touch_producer_content(sale_mode.producer_id)
         return sale_mode
 
 
-class SaleModeUpdateSerializer(serializers.ModelSerializer):
+class SaleModeUpdateSerializer(ValidatedModelSerializer):
     """Serializer pour mettre à jour un mode de vente."""
     opening_hours = OpeningHoursSerializer(many=True, required=False)
     location_latitude = serializers.CharField(required=False, allow_blank=True, allow_null=True)
@@ -309,8 +412,9 @@ class SaleModeUpdateSerializer(serializers.ModelSerializer):
             return None
         try:
             lat_float = float(value)
+            validate_coordinates(lat_float, 0)
             return Decimal(str(round(lat_float, 7)))
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, DjangoValidationError):
             raise serializers.ValidationError("Latitude invalide.")
 
     def validate_location_longitude(self, value):
@@ -319,8 +423,9 @@ class SaleModeUpdateSerializer(serializers.ModelSerializer):
             return None
         try:
             lng_float = float(value)
-            return Decimal(str(round(lng_float, 11)))
-        except (ValueError, TypeError):
+            validate_coordinates(0, lng_float)
+            return Decimal(str(round(lng_float, 7)))
+        except (ValueError, TypeError, DjangoValidationError):
             raise serializers.ValidationError("Longitude invalide.")
 
     def validate(self, data):
@@ -333,6 +438,7 @@ class SaleModeUpdateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'phone_number': 'Le numéro de téléphone est obligatoire pour les commandes par téléphone.'
                 })
+        validate_opening_days(data.get('opening_hours'))
         
         return data
 
@@ -340,18 +446,12 @@ class SaleModeUpdateSerializer(serializers.ModelSerializer):
         """Update sale mode with opening hours."""
         opening_hours_data = validated_data.pop('opening_hours', None)
         
-        # Update sale mode fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update opening hours if provided
-        if opening_hours_data is not None:
-            # Delete existing opening hours
-            instance.opening_hours.all().delete()
-            # Create new ones
-            for hours_data in opening_hours_data:
-                OpeningHours.objects.create(sale_mode=instance, **hours_data)
-        
+        with transaction.atomic(), deferred_invalidation():
+            instance = super().update(instance, validated_data)
+            # Horaires fournis : remplacent les existants
+            if opening_hours_data is not None:
+                instance.opening_hours.all().delete()
+                create_opening_hours(instance, opening_hours_data)
+        touch_producer_content(instance.producer_id)
         return instance
 
@@ -0,0 +1,166 @@
+"""
+Signaux d'invalidation du cache.
+
+Les réponses des producteurs embarquent produits, photos, modes de vente et compte
+utilisateur : toute écriture sur ces objets doit invalider le détail du producteur
+et les listes, et mettre à jour son horodatage de contenu (utilisé par les ETags).
+Les fichiers des photos passent par le stockage adressé par contenu (blobs.py).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.products.models import Product, ProductCategory, ProductPhoto
+from .blobs import acquire_blob, release_blob
+from .cache import (
+    invalidate_categories_cache,
+    invalidate_owner_cache,
+    invalidate_producer_cache,
+    invalidate_producers_cache,
+)
+from .images import delete_derivatives
+from .models import PHOTO_PENDING, PHOTO_READY, ProducerProfile, ProducerPhoto, SaleMode, OpeningHours
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Suspend les invalidations par objet dans le thread courant.
+
+    Pour les suppressions ou imports en masse : l'appelant invalide une seule fois
+    à la fin (invalidate_producer_cache, touch_producer_content).
+    """
+    previous = getattr(_state, 'deferred', False)
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = previous
+
+
+def invalidation_deferred() -> bool:
+    return getattr(_state, 'deferred', False)
+
+
+def touch_producer_content(producer_id):
+    """Marque le contenu d'un producteur comme modifié et invalide son cache."""
+    if invalidation_deferred():
+        return
+    if producer_id:
+        ProducerProfile.objects.filter(pk=producer_id).update(content_updated_at=timezone.now())
+    invalidate_producer_cache(producer_id)
+
+
+@receiver(post_save, sender=ProducerProfile)
+def invalidate_owner_on_create(sender, instance, created, **kwargs):
+    """Un nouveau profil change l'association utilisateur → producteur."""
+    if created:
+        invalidate_owner_cache(instance.user_id)
+
+
+@receiver(post_delete, sender=ProducerProfile)
+def invalidate_owner_on_delete(sender, instance, **kwargs):
+    invalidate_owner_cache(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=ProducerPhoto)
+@receiver([post_save, post_delete], sender=SaleMode)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_for_producer_child(sender, instance, **kwargs):
+    """Invalide le cache du producteur propriétaire."""
+    touch_producer_content(instance.producer_id)
+
+
+@receiver([post_save, post_delete], sender=ProductPhoto)
+def invalidate_for_product_photo(sender, instance, **kwargs):
+    """Invalide le cache du producteur du produit."""
+    if invalidation_deferred():
+        return
+    producer_id = Product.objects.filter(pk=instance.product_id).values_list('producer_id', flat=True).first()
+    touch_producer_content(producer_id)
+
+
+@receiver([post_save, post_delete], sender=OpeningHours)
+def invalidate_for_opening_hours(sender, instance, **kwargs):
+    """Invalide le cache du producteur du mode de vente."""
+    if invalidation_deferred():
+        return
+    producer_id = SaleMode.objects.filter(pk=instance.sale_mode_id).values_list('producer_id', flat=True).first()
+    touch_producer_content(producer_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_for_user(sender, instance, update_fields=None, **kwargs):
+    """Le compte est embarqué dans la représentation du producteur."""
+    if invalidation_deferred() or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+    producer_id = ProducerProfile.objects.filter(user=instance).values_list('id', flat=True).first()
+    if producer_id:
+        touch_producer_content(producer_id)
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+def invalidate_for_category(sender, instance, **kwargs):
+    """Invalide la liste des catégories et les producteurs qui l'utilisent."""
+    invalidate_categories_cache()
+    # Le détail de chaque producteur concerné change d'ETag : son corps aussi
+    producer_ids = set(
+        Product.objects.filter(category=instance).values_list('producer_id', flat=True)
+    )
+    ProducerProfile.objects.filter(pk__in=producer_ids).update(content_updated_at=timezone.now())
+    invalidate_producers_cache(producer_ids)
+
+
+@receiver(pre_save, sender=ProducerPhoto)
+@receiver(pre_save, sender=ProductPhoto)
+def store_photo_blob(sender, instance, **kwargs):
+    """
+    Enregistre un nouveau fichier de photo dans le stockage adressé par contenu.
+
+    Couvre tous les chemins de création (API, commandes de seed, admin) : un contenu
+    déjà connu n'est pas réécrit et reprend ses déclinaisons. Les photos
+    s'enregistrent dans une transaction (AtomicPhotoSaveMixin) : une écriture qui
+    échoue annule la référence prise ici.
+    """
+    image_file = instance.image_file
+    if not image_file or image_file._committed:
+        return
+
+    previous = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).values('content_hash', 'derivatives').first()
+
+    blob = acquire_blob(image_file.file, image_file.name)
+    instance.image_file = blob.name
+    instance.content_hash = blob.hash
+    instance.derivatives = blob.derivatives
+    instance.placeholder = blob.placeholder
+    instance.processing_status = PHOTO_READY if blob.derivatives and blob.placeholder else PHOTO_PENDING
+    instance.processing_started_at = None
+
+    # Remplacement du fichier d'une photo existante : l'ancienne référence est
+    # rendue même pour un contenu identique (acquire_blob vient d'en prendre une)
+    if previous:
+        if previous['content_hash']:
+            release_blob(previous['content_hash'])
+        elif previous['derivatives']:
+            old_derivatives = previous['derivatives']
+            transaction.on_commit(lambda: delete_derivatives(old_derivatives))
+
+
+@receiver(post_delete, sender=ProducerPhoto)
+@receiver(post_delete, sender=ProductPhoto)
+def delete_photo_files(sender, instance, **kwargs):
+    """Libère le blob de la photo ; pour une photo antérieure, supprime ses déclinaisons."""
+    if instance.content_hash:
+        release_blob(instance.content_hash)
+    elif instance.derivatives:
+        derivatives, storage = instance.derivatives, instance.image_file.storage
+        transaction.on_commit(lambda: delete_derivatives(derivatives, storage))
@@ -0,0 +1,268 @@
+"""
+Jeu de données synthétique pour les tests de charge (nearby, recherche, listes).
+
+Producteurs répartis autour des grandes villes françaises (densité proportionnelle
+à leur population, dispersion gaussienne), avec produits saisonniers, modes de
+vente et horaires. Le générateur aléatoire est initialisé par une graine : même
+graine et même nombre de producteurs, même jeu de données.
+
+Les lignes sont insérées par lots avec bulk_create, sans full_clean() par ligne ni
+signaux (valeurs valides par construction), un lot par transaction ; pas d'images.
+Les comptes synthétiques sont reconnaissables à leur domaine (SYNTHETIC_DOMAIN) et
+supprimés par clear_synthetic_data.
+"""
+import math
+import random
+import time
+from datetime import time as day_time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from apps.auth.models import User
+from apps.products.models import Product, ProductCategory
+from .models import OpeningHours, ProducerProfile, SaleMode
+from .signals import deferred_invalidation
+from .utils import TOP_CITIES
+
+SYNTHETIC_DOMAIN = 'synthetic.invalid'
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_SPREAD_KM = 25
+KM_PER_DEGREE = 111.32
+
+# Catégorie du producteur → produits (nom, catégorie de produit, saison ou None)
+CATALOG = {
+    'maraîchage': [
+        ('Tomates', 'legumes', (6, 10)), ('Courgettes', 'legumes', (6, 9)), ('Salades', 'legumes', None),
+        ('Carottes', 'legumes', (5, 3)), ('Poireaux', 'legumes', (9, 4)), ('Potimarrons', 'legumes', (9, 1)),
+        ('Fraises', 'fruits', (5, 7)), ('Pommes de terre', 'legumes', None),
+    ],
+    'arboriculture': [
+        ('Pommes', 'fruits', (8, 4)), ('Poires', 'fruits', (8, 11)), ('Cerises', 'fruits', (5, 7)),
+        ('Abricots', 'fruits', (6, 8)), ('Jus de pomme', 'autre', None), ('Prunes', 'fruits', (7, 9)),
+    ],
+    'apiculture': [
+        ('Miel de fleurs', 'miel', None), ('Miel d\'acacia', 'miel', (5, 12)), ('Miel de châtaignier', 'miel', (7, 12)),
+        ('Pollen', 'miel', None), ('Pain d\'épices', 'pain', None),
+    ],
+    'élevage': [
+        ('Colis de bœuf', 'viande', None), ('Agneau', 'viande', (3, 6)), ('Poulet fermier', 'viande', None),
+        ('Œufs', 'autre', None), ('Lait cru', 'autre', None),
+    ],
+    'fromagerie': [
+        ('Tomme', 'autre', None), ('Fromage frais', 'autre', (3, 10)), ('Yaourts', 'autre', None),
+        ('Beurre', 'autre', None), ('Crème', 'autre', None),
+    ],
+    'boulangerie': [
+        ('Pain au levain', 'pain', None), ('Baguette tradition', 'pain', None), ('Brioche', 'pain', None),
+        ('Farine T80', 'cereales', None),
+    ],
+    'céréaliculture': [
+        ('Farine de blé', 'cereales', None), ('Lentilles', 'cereales', None), ('Flocons d\'avoine', 'cereales', None),
+        ('Huile de colza', 'autre', None),
+    ],
+    'brasserie': [('Bière blonde', 'biere', None), ('Bière ambrée', 'biere', None), ('Bière de saison', 'biere', (4, 9))],
+    'viticulture': [('Vin rouge', 'autre', None), ('Vin blanc', 'autre', None), ('Rosé', 'autre', (4, 9)), ('Jus de raisin', 'autre', None)],
+    'charcuterie': [('Saucisson sec', 'viande', None), ('Jambon sec', 'viande', None), ('Pâté', 'viande', None)],
+    'pêche': [('Huîtres', 'autre', (9, 4)), ('Moules', 'autre', (7, 1)), ('Poisson du jour', 'autre', None)],
+    'distillerie': [('Eau-de-vie', 'autre', None), ('Liqueur', 'autre', None)],
+    'autre': [('Confitures', 'autre', None), ('Œufs', 'autre', None), ('Plants potagers', 'autre', (3, 6))],
+}
+# Poids des catégories de producteurs (le maraîchage domine)
+CATEGORY_WEIGHTS = {
+    'maraîchage': 30, 'élevage': 15, 'arboriculture': 10, 'apiculture': 8, 'fromagerie': 8,
+    'viticulture': 8, 'boulangerie': 5, 'céréaliculture': 4, 'charcuterie': 4, 'brasserie': 3,
+    'pêche': 2, 'distillerie': 1, 'autre': 2,
+}
+
+NAME_PREFIXES = ['Ferme', 'Domaine', 'Les Jardins', 'Le Verger', 'La Bergerie', 'Le Mas', 'Le Clos', 'La Fermette']
+NAME_SUFFIXES = ['des Prés', 'du Moulin', 'de la Source', 'des Tilleuls', 'du Bocage', 'des Collines',
+                 'de la Vallée', 'du Vieux Chêne', 'des Sablons', 'de la Garenne']
+STREETS = ['route des Champs', 'chemin du Moulin', 'rue de l\'Église', 'lieu-dit les Granges', 'route de la Forêt']
+
+
+def _pick_location(rng, cities, cum_weights, spread_km: float) -> tuple:
+    """Position autour d'une ville tirée selon sa population."""
+    city, lat, lon, _ = rng.choices(cities, cum_weights=cum_weights)[0]
+    lat += rng.gauss(0, spread_km) / KM_PER_DEGREE
+    lon += rng.gauss(0, spread_km) / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+    return city, round(lat, 7), round(lon, 7)
+
+
+def _opening_hours(rng, open_days: set, start: int, end: int) -> list:
+    return [
+        OpeningHours(
+            day_of_week=day,
+            is_closed=day not in open_days,
+            opening_time=day_time(start) if day in open_days else None,
+            closing_time=day_time(end) if day in open_days else None,
+        )
+        for day in range(7)
+    ]
+
+
+def _sale_modes(rng, city: str) -> list:
+    """Modes de vente d'un producteur : [(SaleMode, [OpeningHours])]."""
+    modes = []
+    weekdays = set(rng.sample(range(6), rng.randint(2, 5)))
+    modes.append((
+        SaleMode(mode_type='on_site', title='Vente à la ferme', instructions='Merci de respecter les horaires.', order=0),
+        _opening_hours(rng, weekdays, rng.choice([8, 9, 10]), rng.choice([12, 17, 18, 19])),
+    ))
+    if rng.random() < 0.6:
+        modes.append((
+            SaleMode(mode_type='market', title=f'Marché de {city}', instructions='Stand à l\'entrée du marché.',
+                     market_info='Le matin, place du marché', order=1),
+            _opening_hours(rng, {rng.choice([2, 5, 6])}, 7, 13),
+        ))
+    if rng.random() < 0.2:
+        modes.append((
+            SaleMode(mode_type='vending_machine', title='Distributeur', instructions='Paiement par carte.',
+                     is_24_7=True, order=2),
+            [],
+        ))
+    if rng.random() < 0.3:
+        modes.append((
+            SaleMode(mode_type='phone_order', title='Commande par téléphone', instructions='Appeler la veille.',
+                     phone_number=f'06 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}',
+                     order=3),
+            _opening_hours(rng, weekdays, 9, 18),
+        ))
+    return modes
+
+
+def _producer(rng, index: int, seed: int, cities, cum_weights, spread_km: float, categories: dict,
+              password: str) -> tuple:
+    """Un producteur et ses objets, non enregistrés."""
+    category = rng.choices(list(CATEGORY_WEIGHTS), weights=list(CATEGORY_WEIGHTS.values()))[0]
+    city, lat, lon = _pick_location(rng, cities, cum_weights, spread_km)
+    username = f'synth-{seed}-{index}'
+    user = User(email=f'{username}@{SYNTHETIC_DOMAIN}', username=username, is_producer=True, password=password)
+    producer = ProducerProfile(
+        name=f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} ({city})',
+        description=f'Exploitation de {category} près de {city}.',
+        category=category,
+        address=f'{rng.randint(1, 120)} {rng.choice(STREETS)}, {city}',
+        latitude=lat,
+        longitude=lon,
+        phone=f'0{rng.randint(1, 5)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}',
+    )
+    catalog = CATALOG[category]
+    products = []
+    for name, product_category, season in rng.sample(catalog, rng.randint(1, len(catalog))):
+        products.append(Product(
+            name=name,
+            description=f'{name} de la ferme',
+            category=categories.get(product_category),
+            availability_type='custom' if season else 'all_year',
+            availability_start_month=season[0] if season else None,
+            availability_end_month=season[1] if season else None,
+        ))
+    return user, producer, products, _sale_modes(rng, city)
+
+
+def _insert_batch(batch: list, stats: dict):
+    """Insère un lot de producteurs générés (clés primaires renvoyées par l'insertion)."""
+    users = User.objects.bulk_create([user for user, _, _, _ in batch])
+    for user, (_, producer, _, _) in zip(users, batch):
+        producer.user_id = user.pk
+    producers = ProducerProfile.objects.bulk_create([producer for _, producer, _, _ in batch])
+
+    products, sale_modes = [], []
+    for producer, (_, _, producer_products, producer_sale_modes) in zip(producers, batch):
+        for product in producer_products:
+            product.producer_id = producer.pk
+            products.append(product)
+        for sale_mode, hours in producer_sale_modes:
+            sale_mode.producer_id = producer.pk
+            sale_modes.append((sale_mode, hours))
+    Product.objects.bulk_create(products)
+    SaleMode.objects.bulk_create([sale_mode for sale_mode, _ in sale_modes])
+    hours = []
+    for sale_mode, sale_mode_hours in sale_modes:
+        for hour in sale_mode_hours:
+            hour.sale_mode_id = sale_mode.pk
+            hours.append(hour)
+    OpeningHours.objects.bulk_create(hours)
+
+    stats['producers'] += len(producers)
+    stats['products'] += len(products)
+    stats['sale_modes'] += len(sale_modes)
+    stats['opening_hours'] += len(hours)
+    stats['rows'] += 2 * len(producers) + len(products) + len(sale_modes) + len(hours)
+
+
+def generate_synthetic_data(count: int, seed: int = 42, spread_km: float = DEFAULT_SPREAD_KM, cities: int = None,
+                            batch_size: int = DEFAULT_BATCH_SIZE, on_batch=None) -> dict:
+    """
+    Génère count producteurs synthétiques.
+
+    Args:
+        seed: graine du générateur (même graine, mêmes données)
+        spread_km: écart type de la dispersion autour des villes
+        cities: nombre de villes utilisées (les plus peuplées ; toutes par défaut)
+        on_batch: appelé avec les statistiques après chaque lot
+
+    Returns:
+        Statistiques : producteurs, produits, modes de vente, horaires, lignes, durée
+    """
+    if not connection.features.can_return_rows_from_bulk_insert:
+        raise ValueError('Base non prise en charge : bulk_create doit renvoyer les clés primaires')
+    if User.objects.filter(email__startswith=f'synth-{seed}-', email__endswith=f'@{SYNTHETIC_DOMAIN}').exists():
+        raise ValueError(f'Des données synthétiques existent déjà pour la graine {seed} (les supprimer d\'abord)')
+
+    rng = random.Random(seed)
+    selected = sorted(TOP_CITIES, key=lambda c: -c[3])[:cities] if cities else TOP_CITIES
+    cum_weights = list(accumulate(city[3] for city in selected))
+    categories = {category.name: category for category in ProductCategory.objects.all()}
+    # Mot de passe inutilisable commun : pas de hachage par compte
+    password = make_password(None)
+
+    stats = {'producers': 0, 'products': 0, 'sale_modes': 0, 'opening_hours': 0, 'rows': 0}
+    started = time.monotonic()
+    with deferred_invalidation():
+        for offset in range(0, count, batch_size):
+            batch = [
+                _producer(rng, index, seed, selected, cum_weights, spread_km, categories, password)
+                for index in range(offset, min(offset + batch_size, count))
+            ]
+            with transaction.atomic():
+                _insert_batch(batch, stats)
+            stats['seconds'] = time.monotonic() - started
+            if on_batch is not None:
+                on_batch(stats)
+    stats['seconds'] = time.monotonic() - started
+    return stats
+
+
+def clear_synthetic_data(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Supprime les comptes synthétiques et leurs données, par lots.
+
+    Returns:
+        Nombre de comptes supprimés
+    """
+    users = User.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}')
+    querysets = [
+        OpeningHours.objects.filter(sale_mode__producer__user__in=users),
+        SaleMode.objects.filter(producer__user__in=users),
+        Product.objects.filter(producer__user__in=users),
+        ProducerProfile.objects.filter(user__in=users),
+    ]
+    deleted = 0
+    with deferred_invalidation():
+        for queryset in querysets:
+            while True:
+                ids = list(queryset.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    queryset.model.objects.filter(pk__in=ids).delete()
+        while True:
+            ids = list(users.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted += User.objects.filter(pk__in=ids).delete()[1].get(User._meta.label, 0)
+    return deleted
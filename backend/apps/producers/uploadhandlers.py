@@ -0,0 +1,139 @@
+"""
+Réception des uploads d'images au fil de l'eau.
+
+ImageUploadHandler remplace les handlers Django (mémoire puis fichier temporaire)
+pour les actions d'upload de photos (photo_uploads.ImageUploadMixin) :
+
+- requête plus grosse que MAX_UPLOAD_REQUEST_SIZE : refusée avant lecture du corps ;
+- fichier dont l'extension n'est pas autorisée, ou dont la taille annoncée dépasse
+  MAX_UPLOAD_SIZE : ignoré sans être stocké ;
+- premiers Ko : format reconnu par les octets magiques, dimensions lues dans
+  l'en-tête (validators.sniff_image_header) ; un faux fichier est ignoré aussitôt ;
+- fichier au-delà de MAX_UPLOAD_SIZE : ignoré dès que la limite est franchie ;
+- le contenu est haché (SHA-256) pendant la réception, pour le stockage adressé
+  par contenu (blobs.py) ;
+- requête au-delà de FILE_UPLOAD_MAX_MEMORY_SIZE : fichiers écrits sur disque au
+  lieu de rester en mémoire du worker.
+
+Les fichiers ignorés sont listés dans request.upload_errors (nom du champ, nom du
+fichier, message) : les serializers de photos les renvoient en erreur de validation.
+Le décodage complet reste fait en arrière-plan (processing.py).
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile, TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.http.multipartparser import MultiPartParserError
+
+from .validators import (
+    IMAGE_HEADER_LIMIT,
+    max_upload_size,
+    sniff_image_header,
+    validate_image_extension,
+    validate_upload_size,
+)
+
+
+def get_upload_errors(request, field_name=None) -> list:
+    """Fichiers refusés pendant la réception (tous, ou ceux d'un champ)."""
+    errors = getattr(request, 'upload_errors', None) or []
+    return [error for error in errors if field_name is None or error[0] == field_name]
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Handler d'upload validant l'en-tête des images avant de stocker le corps."""
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        max_request = getattr(settings, 'MAX_UPLOAD_REQUEST_SIZE', None)
+        if max_request and content_length > max_request:
+            raise MultiPartParserError(
+                f'Request body exceeds maximum allowed size of {max_request / (1024 * 1024):.1f} MB'
+            )
+        self.in_memory = content_length <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        if self.request is not None and not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = []
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+        self.head = bytearray()
+        self.image_info = None
+        self.file = BytesIO()
+        try:
+            validate_image_extension(file_name)
+            if content_length:
+                validate_upload_size(content_length)
+        except ValidationError as e:
+            self._reject(e)
+
+        if not getattr(self, 'in_memory', True):
+            self.file = TemporaryUploadedFile(file_name, content_type, 0, charset, content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        try:
+            if self.received > max_upload_size():
+                validate_upload_size(self.received)
+            if self.image_info is None:
+                self.head += raw_data
+                self.image_info = sniff_image_header(bytes(self.head), complete=len(self.head) >= IMAGE_HEADER_LIMIT)
+                if self.image_info is not None:
+                    self.head = None
+        except ValidationError as e:
+            self._reject(e)
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+        # Données consommées : aucun autre handler ne les reçoit
+        return None
+
+    def file_complete(self, file_size):
+        if self.image_info is None:
+            # Fichier plus court que l'en-tête attendu
+            try:
+                self.image_info = sniff_image_header(bytes(self.head or b''), complete=True)
+            except ValidationError as e:
+                self._record(e)
+                self._discard()
+                return None
+
+        self.file.seek(0)
+        if isinstance(self.file, TemporaryUploadedFile):
+            uploaded = self.file
+            uploaded.size = file_size
+        else:
+            uploaded = InMemoryUploadedFile(
+                file=self.file,
+                field_name=self.field_name,
+                name=self.file_name,
+                content_type=self.content_type,
+                size=file_size,
+                charset=self.charset,
+                content_type_extra=self.content_type_extra,
+            )
+        uploaded.content_hash = self.hasher.hexdigest()
+        uploaded.image_format, uploaded.image_width, uploaded.image_height = self.image_info
+        return uploaded
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _record(self, error):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = []
+            self.request.upload_errors.append((self.field_name, self.file_name, ' '.join(error.messages)))
+
+    def _reject(self, error):
+        """Ignore le reste du fichier (le parseur le lit sans le transmettre)."""
+        self._record(error)
+        self._discard()
+        raise SkipFile()
+
+    def _discard(self):
+        # Un fichier temporaire est supprimé à la fermeture
+        self.file.close()
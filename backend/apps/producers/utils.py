@@ -4,6 +4,32 @@ Utilitaires pour les producteurs.
 from math import radians, cos, sin, asin, sqrt
 
 
+# Principales villes françaises : (nom, latitude, longitude, population)
+# Utilisées pour le préchauffage du cache nearby.
+TOP_CITIES = [
+    ('Paris', 48.8566, 2.3522, 2_133_000),
+    ('Marseille', 43.2965, 5.3698, 873_000),
+    ('Lyon', 45.7640, 4.8357, 522_000),
+    ('Toulouse', 43.6047, 1.4442, 504_000),
+    ('Nice', 43.7102, 7.2620, 342_000),
+    ('Nantes', 47.2184, -1.5536, 320_000),
+    ('Montpellier', 43.6108, 3.8767, 302_000),
+    ('Strasbourg', 48.5734, 7.7521, 291_000),
+    ('Bordeaux', 44.8378, -0.5792, 261_000),
+    ('Lille', 50.6292, 3.0573, 236_000),
+    ('Rennes', 48.1173, -1.6778, 222_000),
+    ('Reims', 49.2583, 4.0317, 180_000),
+    ('Toulon', 43.1242, 5.9280, 180_000),
+    ('Saint-Étienne', 45.4397, 4.3872, 173_000),
+    ('Le Havre', 49.4944, 0.1079, 166_000),
+    ('Grenoble', 45.1885, 5.7245, 158_000),
+    ('Dijon', 47.3220, 5.0415, 159_000),
+    ('Angers', 47.4784, -0.5632, 157_000),
+    ('Clermont-Ferrand', 45.7772, 3.0870, 147_000),
+    ('Tours', 47.3941, 0.6848, 137_000),
+]
+
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calcule la distance entre deux points en kilomètres en utilisant la formule de Haversine.
@@ -2,36 +2,159 @@
 Validators for producer-related models and serializers.
 """
 import os
-from django.core.exceptions import ValidationError
+import re
+import struct
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.conf import settings
-from PIL import Image
 
+# Instances per uniqueness query in batch validation (SQLite caps query parameters)
+UNIQUE_CHECK_CHUNK = 500
+# Max bytes read to find the dimensions (large EXIF/ICC blocks included)
+IMAGE_HEADER_LIMIT = 256 * 1024
+IMAGE_FORMAT_EXTENSIONS = {
+    'JPEG': ('jpg', 'jpeg'),
+    'PNG': ('png',),
+    'WEBP': ('webp',),
+}
 
-def validate_image_file(value):
-    """
-    Validate uploaded image file.
-    """
-    # Check file size
-    max_size = settings.FILE_UPLOAD_MAX_MEMORY_SIZE
-    if value.size > max_size:
+
+def max_upload_size():
+    return getattr(settings, 'MAX_UPLOAD_SIZE', settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+
+
+def validate_upload_size(size):
+    max_size = max_upload_size()
+    if size > max_size:
         raise ValidationError(
             f'File size exceeds maximum allowed size of {max_size / (1024 * 1024):.1f} MB'
         )
 
-    # Check file extension
-    ext = os.path.splitext(value.name)[1][1:].lower()
+
+def validate_image_extension(name):
+    ext = os.path.splitext(name or '')[1][1:].lower()
     if ext not in settings.ALLOWED_IMAGE_EXTENSIONS:
         raise ValidationError(
             f'File extension "{ext}" is not allowed. Allowed extensions: {", ".join(settings.ALLOWED_IMAGE_EXTENSIONS)}'
         )
 
-    # Validate image format
-    try:
-        img = Image.open(value)
-        img.verify()
-    except Exception as e:
-        raise ValidationError(f'Invalid image file: {str(e)}')
 
+# JPEG markers without a length field (TEM, RSTn, SOI) and start-of-frame markers
+JPEG_STANDALONE_MARKERS = frozenset([0x01, *range(0xD0, 0xD9)])
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _sniff_jpeg(head: bytes):
+    """Dimensions from the first SOFn segment, skipping the segments before it."""
+    position = 2
+    while position + 4 <= len(head):
+        if head[position] != 0xFF:
+            raise ValidationError('Invalid image file: corrupt JPEG marker')
+        marker = head[position + 1]
+        if marker == 0xFF:
+            position += 1
+        elif marker in JPEG_STANDALONE_MARKERS:
+            position += 2
+        elif marker in JPEG_SOF_MARKERS:
+            if position + 9 > len(head):
+                return None
+            height, width = struct.unpack('>HH', head[position + 5:position + 9])
+            return width, height
+        else:
+            position += 2 + struct.unpack('>H', head[position + 2:position + 4])[0]
+    return None
+
+
+def _sniff_png(head: bytes):
+    """Dimensions from the IHDR chunk, always the first one."""
+    if len(head) < 24:
+        return None
+    if head[12:16] != b'IHDR':
+        raise ValidationError('Invalid image file: missing PNG header chunk')
+    return struct.unpack('>II', head[16:24])
+
+
+def _sniff_webp(head: bytes):
+    """Dimensions from the first chunk: VP8 (lossy), VP8L (lossless) or VP8X (extended)."""
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    raise ValidationError('Invalid image file: corrupt WebP header')
+
+
+# (magic bytes, format, sniffer returning (width, height) or None if more bytes are needed)
+IMAGE_SIGNATURES = (
+    (re.compile(rb'\xff\xd8\xff'), 'JPEG', _sniff_jpeg),
+    (re.compile(rb'\x89PNG\r\n\x1a\n'), 'PNG', _sniff_png),
+    (re.compile(rb'RIFF.{4}WEBP', re.DOTALL), 'WEBP', _sniff_webp),
+)
+
+
+def sniff_image_header(head: bytes, complete: bool = False):
+    """
+    Identify an image from its first bytes, without decoding pixels.
+
+    Args:
+        head: beginning of the file
+        complete: True if head holds the whole file (or the read limit)
+
+    Returns:
+        (format, width, height), or None if more bytes are needed
+    """
+    if len(head) < 12 and not complete:
+        return None
+    for signature, image_format, sniff in IMAGE_SIGNATURES:
+        if signature.match(head):
+            break
+    else:
+        raise ValidationError('Invalid image file: unsupported or unrecognized format')
+
+    allowed = settings.ALLOWED_IMAGE_EXTENSIONS
+    if not any(ext in allowed for ext in IMAGE_FORMAT_EXTENSIONS[image_format]):
+        raise ValidationError(f'Image format {image_format} is not allowed')
+
+    size = sniff(head)
+    if size is None:
+        if not complete:
+            return None
+        raise ValidationError('Invalid image file: truncated header')
+    width, height = size
+    if not width or not height:
+        raise ValidationError('Invalid image file: missing dimensions')
+
+    max_pixels = getattr(settings, 'MAX_IMAGE_PIXELS', 40_000_000)
+    if width * height > max_pixels:
+        raise ValidationError(
+            f'Image dimensions {width}x{height} exceed the maximum of {max_pixels // 1_000_000} megapixels'
+        )
+    return image_format, width, height
+
+
+def validate_image_file(value):
+    """
+    Validate uploaded image file.
+
+    Only the header is inspected (format, dimensions); the full decode is done by the
+    background processor (apps/producers/processing.py). Files received through
+    ImageUploadHandler were already sniffed while streaming.
+    """
+    validate_upload_size(value.size)
+    validate_image_extension(value.name)
+
+    if getattr(value, 'image_format', None):
+        return value
+
+    value.seek(0)
+    head = value.read(IMAGE_HEADER_LIMIT)
+    value.seek(0)
+    sniff_image_header(head, complete=True)
     return value
 
 
@@ -45,3 +168,108 @@ def validate_coordinates(latitude, longitude):
         raise ValidationError('Longitude must be between -180 and 180')
     return True
 
+
+def clean_instance(instance, exclude=None):
+    """
+    full_clean() without the uniqueness and constraint checks: field validation and
+    clean(), no database query. Errors of both steps are reported together.
+    """
+    errors = {}
+    try:
+        instance.clean_fields(exclude=exclude)
+    except ValidationError as e:
+        errors = e.update_error_dict(errors)
+    try:
+        instance.clean()
+    except ValidationError as e:
+        errors = e.update_error_dict(errors)
+    if errors:
+        raise ValidationError(errors)
+
+
+def _unique_errors(instances: list, exclude=None) -> dict:
+    """
+    Uniqueness errors of a batch of instances of the same model, by index (error
+    dicts, as built by validate_unique()).
+
+    Each unique field set is checked against the other instances of the batch and
+    against the database with one query per UNIQUE_CHECK_CHUNK instances (instead
+    of one query per instance and per check in full_clean). A row matching an
+    instance's own primary key (bulk_update) is not a conflict.
+    """
+    model = type(instances[0])
+    unique_checks, _ = instances[0]._get_unique_checks(exclude=exclude, include_meta_constraints=True)
+    errors = {}
+    for model_class, field_names in unique_checks:
+        if field_names == (model._meta.pk.name,):
+            continue
+        attnames = [model._meta.get_field(name).attname for name in field_names]
+        # Same keys as validate_unique(): the field, or NON_FIELD_ERRORS for a field set
+        field = field_names[0] if len(field_names) == 1 else NON_FIELD_ERRORS
+        keys = {}
+        for index, instance in enumerate(instances):
+            key = tuple(getattr(instance, attname) for attname in attnames)
+            if any(value is None for value in key):
+                continue
+            if key in keys:
+                errors.setdefault(index, {}).setdefault(field, []).append(
+                    instance.unique_error_message(model_class, field_names)
+                )
+            else:
+                keys[key] = index
+        items = list(keys.items())
+        for start in range(0, len(items), UNIQUE_CHECK_CHUNK):
+            chunk = dict(items[start:start + UNIQUE_CHECK_CHUNK])
+            # Superset of the conflicting rows (one IN per field), exact match below
+            rows = model_class._default_manager.filter(**{
+                f'{attname}__in': {key[position] for key in chunk}
+                for position, attname in enumerate(attnames)
+            }).values_list('pk', *attnames)
+            for pk, *values in rows:
+                index = chunk.get(tuple(values))
+                if index is not None and pk != instances[index].pk:
+                    errors.setdefault(index, {}).setdefault(field, []).append(
+                        instances[index].unique_error_message(model_class, field_names)
+                    )
+    return errors
+
+
+def batch_errors(instances, exclude=None, unique: bool = True) -> dict:
+    """
+    Validate instances meant for bulk_create() / bulk_update().
+
+    Same checks as full_clean() on each instance, with the uniqueness checks
+    batched (see _unique_errors). unique=False skips them when the database
+    constraint or the caller already guarantees uniqueness.
+
+    Returns:
+        index → ValidationError, for the invalid instances only
+    """
+    instances = list(instances)
+    errors = {}
+    for index, instance in enumerate(instances):
+        try:
+            clean_instance(instance, exclude)
+        except ValidationError as e:
+            errors[index] = e.update_error_dict({})
+    if unique and instances:
+        for index, unique_errors in _unique_errors(instances, exclude).items():
+            for field, messages in unique_errors.items():
+                errors.setdefault(index, {}).setdefault(field, []).extend(messages)
+    return {index: ValidationError(error_dict) for index, error_dict in errors.items()}
+
+
+def validate_batch(instances, exclude=None, unique: bool = True) -> list:
+    """
+    Like batch_errors(), raising a ValidationError keyed by instance index.
+
+    Returns:
+        the instances, ready for bulk_create() / bulk_update()
+    """
+    instances = list(instances)
+    errors = batch_errors(instances, exclude, unique)
+    if errors:
+        raise ValidationError({
+            str(index): error.messages for index, error in sorted(errors.items())
+        })
+    return instances
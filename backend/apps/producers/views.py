@@ -6,9 +6,6 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticate
 from django_filters.rest_framework import DjangoFilterBackend
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
 from .models import ProducerProfile, ProducerPhoto, SaleMode
 from .serializers import (
     ProducerProfileSerializer,
@@ -19,23 +16,39 @@ from .serializers import (
     SaleModeUpdateSerializer
 )
 from .permissions import IsProducerOwner
+from .export import EXPORT_FORMATS, accepts_gzip, export_response
+from .photo_uploads import ImageUploadMixin, batch_status, batch_throttle_cost, upload_photos
 from .utils import get_producers_near_location
-from .cache import cache_response, cache_nearby_response, invalidate_producer_cache
+from .cache import cache_response, cache_nearby_response, invalidate_producer_cache, get_owned_producer_id
+from .etags import (
+    conditional_etag,
+    producer_detail_etag,
+    producer_list_etag,
+    sale_mode_detail_etag,
+    sale_mode_list_etag
+)
 
 logger = logging.getLogger(__name__)
 
 
-class ProducerProfileViewSet(viewsets.ModelViewSet):
+class ProducerProfileViewSet(ImageUploadMixin, viewsets.ModelViewSet):
     """ViewSet pour gérer les profils de producteurs."""
     queryset = ProducerProfile.objects.all().select_related('user').prefetch_related(
         'photos'
     )
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # Lectures authentifiées sans requête sur l'utilisateur (TokenUser)
+    stateless_auth = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category']
     search_fields = ['name', 'description', 'address']
     ordering_fields = ['created_at', 'name']
     ordering = ['-created_at']
+    # Coût des actions pour le throttling pondéré (voir config.throttling)
+    throttle_costs = {
+        'nearby': 5, 'search': 2, 'photos': 10, 'photos_batch': batch_throttle_cost(10), 'export': 20,
+    }
+    image_upload_actions = ('photos', 'photos_batch')
     
     def get_queryset(self):
         """Filtrer par catégories multiples si le paramètre 'categories' est présent."""
@@ -62,14 +75,14 @@ class ProducerProfileViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated()]
         return super().get_permissions()
 
-    @method_decorator(cache_page(300))  # Cache 5 minutes
-    @method_decorator(vary_on_headers('Authorization'))
+    @conditional_etag(producer_list_etag)
+    @cache_response('producers_list')  # Cache 5 minutes
     def list(self, request, *args, **kwargs):
         """Liste des producteurs avec cache."""
         return super().list(request, *args, **kwargs)
 
-    @method_decorator(cache_page(600))  # Cache 10 minutes
-    @method_decorator(vary_on_headers('Authorization'))
+    @conditional_etag(producer_detail_etag)
+    @cache_response('producer_detail')  # Cache 10 minutes
     def retrieve(self, request, *args, **kwargs):
         """Détail d'un producteur avec cache."""
         return super().retrieve(request, *args, **kwargs)
@@ -118,7 +131,7 @@ class ProducerProfileViewSet(viewsets.ModelViewSet):
     def photos(self, request, pk=None):
         """Ajouter une photo à un producteur."""
         producer = self.get_object()
-        serializer = ProducerPhotoSerializer(data=request.data)
+        serializer = ProducerPhotoSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             try:
                 serializer.save(producer=producer)
@@ -129,10 +142,62 @@ class ProducerProfileViewSet(viewsets.ModelViewSet):
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], url_path='photos/batch',
+            permission_classes=[IsAuthenticated, IsProducerOwner])
+    def photos_batch(self, request, pk=None):
+        """Ajouter plusieurs photos en une requête (champ image_files), résultat par fichier."""
+        producer = self.get_object()
+        results = upload_photos(request, ProducerPhotoSerializer, 'producer', producer, producer.id)
+        logger.info(
+            f"{sum(r['created'] for r in results)}/{len(results)} photo(s) uploaded for producer "
+            f"{producer.id} by user {request.user.id}"
+        )
+        return Response({'results': results}, status=batch_status(results))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def me(self, request):
+        """
+        Profil producteur de l'utilisateur connecté, avec produits, modes de vente
+        et photos préchargés.
+        """
+        producer_id = get_owned_producer_id(request.user.pk)
+        producer = None
+        if producer_id:
+            producer = ProducerProfile.objects.select_related('user').prefetch_related(
+                'photos', 'products__category', 'products__photos', 'sale_modes__opening_hours'
+            ).filter(pk=producer_id).first()
+        if producer is None:
+            return Response(
+                {'error': 'Aucun profil producteur pour cet utilisateur.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(ProducerProfileSerializer(producer, context=self.get_serializer_context()).data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export en flux de tous les producteurs (voir export.py).
+
+        Query params:
+            - output (str, optional): geojson (défaut) ou ndjson
+            - gzip (bool, optional): force ou désactive la compression ; par défaut
+              selon Accept-Encoding
+            - category, categories, search: mêmes filtres que la liste
+        """
+        fmt = request.query_params.get('output', 'geojson')
+        if fmt not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Format d'export inconnu. Formats possibles : {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, fmt, compress=accepts_gzip(request))
+
     # Note: L'action 'search' a été supprimée car redondante.
     # La recherche est gérée par les filtres DRF (search_fields) dans getProducers()
     
     @action(detail=False, methods=['get'])
+    @cache_nearby_response()
     def nearby(self, request):
         """
         Récupérer les producteurs proches d'une position avec distances.
@@ -242,11 +307,12 @@ class ProducerProfileViewSet(viewsets.ModelViewSet):
             )
 
 
-class ProducerPhotoViewSet(viewsets.ModelViewSet):
+class ProducerPhotoViewSet(ImageUploadMixin, viewsets.ModelViewSet):
     """ViewSet pour gérer les photos de producteurs."""
     queryset = ProducerPhoto.objects.all().select_related('producer')
     serializer_class = ProducerPhotoSerializer
     permission_classes = [IsAuthenticated]
+    image_upload_actions = ('create', 'update', 'partial_update')
 
     def get_permissions(self):
         if self.action == 'destroy':
@@ -271,6 +337,8 @@ class SaleModeViewSet(viewsets.ModelViewSet):
     """ViewSet pour gérer les modes de vente."""
     queryset = SaleMode.objects.all().select_related('producer').prefetch_related('opening_hours')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # Lectures authentifiées sans requête sur l'utilisateur (TokenUser)
+    stateless_auth = True
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -292,6 +360,16 @@ class SaleModeViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(producer_id=producer_id)
         return queryset
 
+    @conditional_etag(sale_mode_list_etag)
+    def list(self, request, *args, **kwargs):
+        """Liste des modes de vente (requête conditionnelle)."""
+        return super().list(request, *args, **kwargs)
+
+    @conditional_etag(sale_mode_detail_etag)
+    def retrieve(self, request, *args, **kwargs):
+        """Détail d'un mode de vente (requête conditionnelle)."""
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """Créer un mode de vente pour un producteur."""
         producer_id = kwargs.get('producer_id')
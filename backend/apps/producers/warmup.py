@@ -0,0 +1,180 @@
+"""
+Préchauffage du cache des réponses.
+
+Après un déploiement, un vidage du cache ou un redémarrage de Redis, les premières
+requêtes paient le coût complet (requêtes SQL, sérialisation). Le préchauffage rejoue
+en interne les URLs les plus demandées et les pages les plus probables pour
+recalculer leurs entrées de cache.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve
+
+from .cache import CACHE_REFRESH_META_KEY, frequency_recorder
+from .models import ProducerProfile
+from .utils import TOP_CITIES
+
+logger = logging.getLogger(__name__)
+
+WARM_LOCK_KEY = 'cache_warm:lock'
+
+_periodic_thread = None
+
+
+def get_default_origin() -> str:
+    """Origine (schéma + hôte) utilisée pour les URLs préchauffées."""
+    origin = getattr(settings, 'CACHE_WARM_ORIGIN', '')
+    if origin:
+        return origin.rstrip('/')
+    hosts = [h for h in settings.ALLOWED_HOSTS if h and not h.startswith('.') and h != '*']
+    return f"http://{hosts[0] if hosts else 'localhost'}"
+
+
+def build_warm_targets(origin: str, pages: int = 3, top: int = 50, details: int = 50,
+                       cities: int = 10, radius_km: int = 50) -> list:
+    """
+    Construit la liste ordonnée et dédoublonnée des URLs à préchauffer.
+
+    Args:
+        origin: Schéma et hôte des URLs (ex: https://monpanierlocal.fr)
+        pages: Nombre de pages de liste par catégorie
+        top: Nombre d'URLs issues des fréquences de requêtes enregistrées
+        details: Nombre de fiches producteur (les plus récentes)
+        cities: Nombre de villes pour les recherches nearby
+        radius_km: Rayon des recherches nearby
+
+    Returns:
+        Liste d'URLs absolues
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+
+    def url(path, **params):
+        query = urlencode(params)
+        return f'{origin}{path}?{query}' if query else f'{origin}{path}'
+
+    def list_pages(count, **params):
+        last_page = min(pages, max(1, -(-count // page_size)))
+        # La page 1 est demandée sans paramètre page par le frontend
+        return [url('/api/producers/', **params)] + [
+            url('/api/producers/', **params, page=n) for n in range(2, last_page + 1)
+        ]
+
+    targets = [url('/api/products/categories/')]
+    targets += list_pages(ProducerProfile.objects.count())
+    category_counts = ProducerProfile.objects.values('category').annotate(total=Count('id'))
+    for row in category_counts.order_by('-total'):
+        targets += list_pages(row['total'], categories=row['category'])
+
+    # URLs réellement demandées, des plus fréquentes aux moins fréquentes
+    targets += [recorded for recorded, _ in frequency_recorder.top(top) if recorded.startswith(origin)]
+
+    detail_ids = ProducerProfile.objects.order_by('-created_at').values_list('id', flat=True)[:details]
+    targets += [url(f'/api/producers/{producer_id}/') for producer_id in detail_ids]
+
+    for _, lat, lng, _ in TOP_CITIES[:cities]:
+        targets.append(url(
+            '/api/producers/nearby/', latitude=round(lat, 2), longitude=round(lng, 2), radius_km=radius_km
+        ))
+
+    return list(dict.fromkeys(targets))
+
+
+def warm_url(url: str):
+    """
+    Recalcule l'entrée de cache d'une URL en appelant directement sa vue.
+
+    Le throttling est désactivé pour ces appels internes.
+
+    Returns:
+        Tuple (url, code HTTP ou None en cas d'erreur, durée en secondes)
+    """
+    started = time.monotonic()
+    parts = urlsplit(url)
+    try:
+        path = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        request = RequestFactory().get(path, secure=parts.scheme == 'https', HTTP_HOST=parts.netloc)
+        request.META[CACHE_REFRESH_META_KEY] = True
+        match = resolve(parts.path)
+        view = match.func
+        if hasattr(view, 'cls') and hasattr(view, 'actions'):
+            view = view.cls.as_view(view.actions, **{**view.initkwargs, 'throttle_classes': ()})
+        response = view(request, *match.args, **match.kwargs)
+        status_code = response.status_code
+    except Exception as e:
+        logger.warning(f'Cache warm failed for {url}: {e}')
+        status_code = None
+    finally:
+        # Chaque thread a sa propre connexion à la base
+        connection.close()
+    return url, status_code, time.monotonic() - started
+
+
+def warm_cache(origin: str = None, pages: int = 3, top: int = 50, details: int = 50,
+               cities: int = 10, radius_km: int = 50, workers: int = 4) -> dict:
+    """
+    Préchauffe le cache avec un pool de threads borné.
+
+    Returns:
+        Rapport : nombre d'URLs, succès, échecs, durée totale et URLs les plus lentes
+    """
+    started = time.monotonic()
+    origin = origin or get_default_origin()
+    targets = build_warm_targets(origin, pages, top, details, cities, radius_km)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='cache-warm') as executor:
+        results = list(executor.map(warm_url, targets))
+
+    failed = [url for url, status_code, _ in results if status_code != 200]
+    report = {
+        'total': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': failed,
+        'duration': round(time.monotonic() - started, 3),
+        'slowest': [
+            (url, round(duration, 3))
+            for url, _, duration in sorted(results, key=lambda r: r[2], reverse=True)[:5]
+        ],
+    }
+    logger.info(
+        f"Cache warmed: {report['succeeded']}/{report['total']} URLs in {report['duration']}s"
+    )
+    return report
+
+
+def start_periodic_warmer(interval: int):
+    """
+    Démarre un thread de préchauffage périodique dans le processus courant.
+
+    Avec plusieurs workers gunicorn, un verrou dans le cache garantit qu'un seul
+    processus préchauffe par intervalle.
+    """
+    global _periodic_thread
+    if _periodic_thread is not None or interval <= 0:
+        return _periodic_thread
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                if cache.add(WARM_LOCK_KEY, 1, interval):
+                    warm_cache(
+                        pages=getattr(settings, 'CACHE_WARM_PAGES', 3),
+                        top=getattr(settings, 'CACHE_WARM_TOP', 50),
+                        workers=getattr(settings, 'CACHE_WARM_WORKERS', 4),
+                    )
+            except Exception as e:
+                logger.error(f'Periodic cache warm failed: {e}', exc_info=True)
+
+    _periodic_thread = threading.Thread(target=run, name='cache-warmer', daemon=True)
+    _periodic_thread.start()
+    logger.info(f'Periodic cache warmer started (every {interval}s)')
+    return _periodic_thread
@@ -0,0 +1,29 @@
+"""
+Fonctions d'ETag des produits et catégories (voir apps.producers.etags).
+"""
+import hashlib
+
+from apps.producers.etags import queryset_stamps
+
+# Un produit embarque son producteur (nom, catégorie), sa catégorie et ses photos :
+# les modifications de ces objets mettent à jour content_updated_at du producteur.
+PRODUCT_STAMP_FIELDS = ('updated_at', 'producer__updated_at', 'producer__content_updated_at')
+
+
+def product_list_etag(view, request, *args, **kwargs):
+    """Liste des produits (éventuellement d'un seul producteur)."""
+    return queryset_stamps(view.get_queryset(), *PRODUCT_STAMP_FIELDS)
+
+
+def product_detail_etag(view, request, pk=None, **kwargs):
+    """Un produit et ses objets embarqués."""
+    stamps = queryset_stamps(view.get_queryset().filter(pk=pk), *PRODUCT_STAMP_FIELDS)
+    return stamps if stamps[0] else None
+
+
+def category_list_etag(view, request, *args, **kwargs):
+    """
+    Catégories : table petite et sans horodatage, l'ETag porte sur son contenu.
+    """
+    rows = view.get_queryset().values_list('id', 'name', 'icon', 'display_name', 'order')
+    return (hashlib.md5(repr(list(rows)).encode()).hexdigest(),)
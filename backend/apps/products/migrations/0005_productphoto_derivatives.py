@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_rename_products_pr_category_created_idx_products_pr_categor_905dc3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productphoto',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+def mark_processed_photos_ready(apps, schema_editor):
+    """Les photos déjà déclinées n'ont pas à repasser par la file."""
+    Photo = apps.get_model('products', 'ProductPhoto')
+    Photo.objects.exclude(derivatives={}).update(processing_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_productphoto_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productphoto',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productphoto',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours de traitement'), ('ready', 'Prête'), ('failed', 'Échec')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_processed_photos_ready, migrations.RunPython.noop),
+    ]
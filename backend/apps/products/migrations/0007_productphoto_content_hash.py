@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_productphoto_processing_started_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productphoto',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
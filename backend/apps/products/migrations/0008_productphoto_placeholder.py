@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_productphoto_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productphoto',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.validators import MinLengthValidator
-from apps.producers.models import ProducerProfile
+from apps.producers.models import AtomicPhotoSaveMixin, ProducerProfile, PHOTO_PENDING, PHOTO_STATUS_CHOICES
 
 
 class ProductCategory(models.Model):
@@ -101,7 +101,11 @@ class Product(models.Model):
         return f"{self.name} - {self.producer.name}"
 
 
-class ProductPhoto(models.Model):
+# Nombre maximal de photos par produit
+MAX_PRODUCT_PHOTOS = 5
+
+
+class ProductPhoto(AtomicPhotoSaveMixin, models.Model):
     """Photo d'un produit."""
     product = models.ForeignKey(
         Product,
@@ -113,6 +117,19 @@ class ProductPhoto(models.Model):
         upload_to='products/',
         verbose_name="Photo"
     )
+    # Déclinaisons redimensionnées (voir apps.producers.images)
+    derivatives = models.JSONField(default=dict, blank=True)
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PHOTO_STATUS_CHOICES,
+        default=PHOTO_PENDING,
+        db_index=True
+    )
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+    # SHA-256 du fichier (apps.producers.blobs), vide pour les photos antérieures
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Image minuscule en data URI, affichée pendant le chargement (voir images.py)
+    placeholder = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
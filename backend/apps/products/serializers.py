@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.producers.serializers import PhotoDerivativesSerializer
 from .models import Product, ProductCategory, ProductPhoto
 
 
@@ -17,12 +18,12 @@ class ProductCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class ProductPhotoSerializer(serializers.ModelSerializer):
+class ProductPhotoSerializer(PhotoDerivativesSerializer):
     """Serializer pour les photos de produits."""
     class Meta:
         model = ProductPhoto
-        fields = ('id', 'image_file', 'created_at')
-        read_only_fields = ('id', 'created_at')
+        fields = ('id', 'image_file', 'thumbnail', 'srcset', 'placeholder', 'processing_status', 'created_at')
+        read_only_fields = ('id', 'placeholder', 'processing_status', 'created_at')
 
     def validate_image_file(self, value):
         """Validate image file in serializer."""
@@ -5,30 +5,50 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticate
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError
-from .models import Product, ProductCategory, ProductPhoto
+from django.db import transaction
+from .models import MAX_PRODUCT_PHOTOS, Product, ProductCategory, ProductPhoto
 from .serializers import (
     ProductSerializer, ProductCreateSerializer, ProductUpdateSerializer,
     ProductCategorySerializer, ProductPhotoSerializer
 )
 from .permissions import IsProductOwner
 from apps.producers.models import ProducerProfile
+from apps.producers.cache import cache_response
+from apps.producers.etags import conditional_etag
+from apps.producers.photo_uploads import ImageUploadMixin, batch_status, batch_throttle_cost, upload_photos
+from .etags import category_list_etag, product_detail_etag, product_list_etag
 import logging
 
 logger = logging.getLogger(__name__)
 
+PHOTO_LIMIT_MESSAGE = f'Le nombre maximum de photos ({MAX_PRODUCT_PHOTOS}) a été atteint pour ce produit.'
+
 
 class ProductCategoryViewSet(ReadOnlyModelViewSet):
     """ViewSet pour les catégories de produits (lecture seule)."""
     queryset = ProductCategory.objects.all()
     serializer_class = ProductCategorySerializer
     permission_classes = [AllowAny]
+    # Lectures authentifiées sans requête sur l'utilisateur (TokenUser)
+    stateless_auth = True
+
+    @conditional_etag(category_list_etag)
+    @cache_response('categories_list')  # Cache 1 heure
+    def list(self, request, *args, **kwargs):
+        """Liste des catégories avec cache."""
+        return super().list(request, *args, **kwargs)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ImageUploadMixin, viewsets.ModelViewSet):
     """ViewSet pour gérer les produits."""
     queryset = Product.objects.all().select_related('producer', 'category').prefetch_related('photos')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # Lectures authentifiées sans requête sur l'utilisateur (TokenUser)
+    stateless_auth = True
     serializer_class = ProductSerializer
+    # Coût des actions pour le throttling pondéré (voir config.throttling)
+    throttle_costs = {'photos': 10, 'photos_batch': batch_throttle_cost(10)}
+    image_upload_actions = ('photos', 'photos_batch')
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -50,6 +70,16 @@ class ProductViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(producer_id=producer_id)
         return queryset
 
+    @conditional_etag(product_list_etag)
+    def list(self, request, *args, **kwargs):
+        """Liste des produits (requête conditionnelle)."""
+        return super().list(request, *args, **kwargs)
+
+    @conditional_etag(product_detail_etag)
+    def retrieve(self, request, *args, **kwargs):
+        """Détail d'un produit (requête conditionnelle)."""
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """Créer un produit pour un producteur."""
         producer_id = kwargs.get('producer_id')
@@ -84,18 +114,18 @@ class ProductViewSet(viewsets.ModelViewSet):
         """Ajouter une photo à un produit (maximum 5 photos)."""
         product = self.get_object()
         
-        # Vérifier la limite de 5 photos
-        current_photo_count = product.photos.count()
-        if current_photo_count >= 5:
-            return Response(
-                {'error': 'Le nombre maximum de photos (5) a été atteint pour ce produit.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        serializer = ProductPhotoSerializer(data=request.data)
+        serializer = ProductPhotoSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             try:
-                serializer.save(product=product)
+                with transaction.atomic():
+                    # Vérifier la limite de 5 photos (verrou : pas de dépassement par uploads simultanés)
+                    Product.objects.select_for_update().filter(pk=product.pk).first()
+                    if product.photos.count() >= MAX_PRODUCT_PHOTOS:
+                        return Response(
+                            {'error': PHOTO_LIMIT_MESSAGE},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+                    serializer.save(product=product)
                 logger.info(f"Photo uploaded for product {product.id} by user {request.user.id}")
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except ValidationError as e:
@@ -103,12 +133,28 @@ class ProductViewSet(viewsets.ModelViewSet):
                 return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'], url_path='photos/batch',
+            permission_classes=[IsAuthenticated, IsProductOwner])
+    def photos_batch(self, request, pk=None, producer_id=None, **kwargs):
+        """Ajouter plusieurs photos à un produit en une requête (champ image_files, maximum 5 au total)."""
+        product = self.get_object()
+        results = upload_photos(
+            request, ProductPhotoSerializer, 'product', product, product.producer_id,
+            limit=MAX_PRODUCT_PHOTOS, limit_message=PHOTO_LIMIT_MESSAGE
+        )
+        logger.info(
+            f"{sum(r['created'] for r in results)}/{len(results)} photo(s) uploaded for product "
+            f"{product.id} by user {request.user.id}"
+        )
+        return Response({'results': results}, status=batch_status(results))
+
 
-class ProductPhotoViewSet(viewsets.ModelViewSet):
+class ProductPhotoViewSet(ImageUploadMixin, viewsets.ModelViewSet):
     """ViewSet pour gérer les photos de produits."""
     queryset = ProductPhoto.objects.all().select_related('product')
     serializer_class = ProductPhotoSerializer
     permission_classes = [IsAuthenticated]
+    image_upload_actions = ('create', 'update', 'partial_update')
 
     def get_permissions(self):
         if self.action == 'destroy':
@@ -0,0 +1,71 @@
+"""
+Service des fichiers média.
+
+Django autorise la requête puis délègue l'envoi à nginx (X-Accel-Redirect vers une
+location internal) : sendfile fait le travail, pas Python. Sans nginx
+(MEDIA_ACCEL_REDIRECT vide, développement), le fichier est servi par FileResponse.
+
+Les chemins ne changent jamais de contenu (répertoires datés, ou hash du contenu
+pour le stockage adressé par contenu) : réponses cacheables un an, immutable.
+L'ETag reprend le format de nginx (mtime-taille en hexadécimal), identique quelle
+que soit la voie d'envoi.
+"""
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+# Répertoires servis publiquement (photos des producteurs et des produits)
+MEDIA_PUBLIC_PREFIXES = ('photos/', 'producers/', 'products/')
+
+
+def can_access_media(request, name: str) -> bool:
+    """Contrôle d'accès à un fichier média (point d'extension)."""
+    return name.startswith(MEDIA_PUBLIC_PREFIXES) and not any(part.startswith('.') for part in name.split('/'))
+
+
+def media_etag(stat) -> str:
+    """ETag au format de nginx pour un fichier statique."""
+    return quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+
+
+@require_safe
+def serve_media(request, path):
+    """Sert un fichier de MEDIA_ROOT après autorisation."""
+    # Chemin non normalisé (.., //) : refusé avant le contrôle d'accès
+    if posixpath.normpath(path) != path or not can_access_media(request, path):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = media_etag(stat)
+    headers = {
+        'Cache-Control': f'public, max-age={getattr(settings, "MEDIA_CACHE_MAX_AGE", 31536000)}, immutable',
+        'ETag': etag,
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        response = HttpResponseNotModified()
+    elif getattr(settings, 'MEDIA_ACCEL_REDIRECT', ''):
+        content_type, _ = mimetypes.guess_type(full_path)
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        # nginx envoie le fichier ; Content-Type et Cache-Control sont conservés
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + quote(path)
+    else:
+        response = FileResponse(open(full_path, 'rb'))
+    for header, value in headers.items():
+        response[header] = value
+    return response
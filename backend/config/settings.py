@@ -151,6 +151,19 @@ else:
 # En développement local: DummyCache (pas de Redis requis)
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CACHE_TTL = config('CACHE_TTL', default=300, cast=int)
+# Compression des réponses mises en cache : 'zlib' (défaut), 'lz4' (si installé) ou 'none'
+CACHE_COMPRESSION = config('CACHE_COMPRESSION', default='zlib')
+CACHE_COMPRESS_MIN_BYTES = config('CACHE_COMPRESS_MIN_BYTES', default=1024, cast=int)
+# Entrées périmées servies pendant leur recalcul, et regroupement des requêtes identiques
+CACHE_STALE_GRACE = config('CACHE_STALE_GRACE', default=60, cast=int)
+CACHE_COALESCE_WAIT = config('CACHE_COALESCE_WAIT', default=2.0, cast=float)
+CACHE_COALESCE_LOCK_TIMEOUT = config('CACHE_COALESCE_LOCK_TIMEOUT', default=10, cast=int)
+# Préchauffage du cache (commande warm_cache et thread périodique si intervalle > 0)
+CACHE_WARM_INTERVAL = config('CACHE_WARM_INTERVAL', default=0, cast=int)
+CACHE_WARM_ORIGIN = config('CACHE_WARM_ORIGIN', default='')
+CACHE_WARM_PAGES = config('CACHE_WARM_PAGES', default=3, cast=int)
+CACHE_WARM_TOP = config('CACHE_WARM_TOP', default=50, cast=int)
+CACHE_WARM_WORKERS = config('CACHE_WARM_WORKERS', default=4, cast=int)
 
 if USE_LOCAL_DEV:
     CACHES = {
@@ -163,6 +176,11 @@ if USE_LOCAL_DEV:
         'ratelimit': {
             'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
         },
+        # La liste noire des tokens doit conserver ses entrées, même en local
+        'tokens': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tokens',
+        },
     }
     SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 else:
@@ -200,6 +218,15 @@ else:
             'KEY_PREFIX': 'mpl_rl',
             'TIMEOUT': 3600,
         },
+        'tokens': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL.replace('/0', '/3') if '/0' in REDIS_URL else REDIS_URL + '/3',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+            'KEY_PREFIX': 'mpl_tok',
+            'TIMEOUT': None,
+        },
     }
     SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
     SESSION_CACHE_ALIAS = 'sessions'
@@ -240,11 +267,38 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Médias servis par config/media.py. Derrière nginx : envoi délégué par
+# X-Accel-Redirect vers cette location internal (vide : fichier envoyé par Django)
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+# Chemins immuables (répertoires datés, hash du contenu) : cache d'un an
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=31536000, cast=int)
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = config('MAX_UPLOAD_SIZE_MB', default=10, cast=int) * 1024 * 1024
-DATA_UPLOAD_MAX_MEMORY_SIZE = FILE_UPLOAD_MAX_MEMORY_SIZE
+# Taille maximale d'un fichier, contrôlée pendant la réception (apps/producers/uploadhandlers.py)
+MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE_MB', default=10, cast=int) * 1024 * 1024
+# Corps de requête multipart maximal, refusé avant lecture (plusieurs photos par requête)
+MAX_UPLOAD_REQUEST_SIZE = config('MAX_UPLOAD_REQUEST_SIZE_MB', default=55, cast=int) * 1024 * 1024
+# Au-delà, les fichiers reçus sont écrits dans un fichier temporaire et non gardés en mémoire
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE_KB', default=2560, cast=int) * 1024
+# Champs hors fichiers (JSON, formulaires)
+DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE_KB', default=2560, cast=int) * 1024
+# Handlers Django par défaut : les actions d'upload de photos installent
+# ImageUploadHandler pour leur requête (photo_uploads.ImageUploadMixin)
+# Nombre maximal de fichiers par upload groupé (photos/batch/)
+PHOTO_BATCH_MAX_FILES = config('PHOTO_BATCH_MAX_FILES', default=10, cast=int)
+# Nombre maximal de pixels d'une image (lu dans l'en-tête, protège contre les bombes de décompression)
+MAX_IMAGE_PIXELS = config('MAX_IMAGE_PIXELS', default=40_000_000, cast=int)
 ALLOWED_IMAGE_EXTENSIONS = config('ALLOWED_IMAGE_EXTENSIONS', default='jpg,jpeg,png,webp', cast=lambda v: [s.strip() for s in v.split(',')])
+# Traitement des photos en arrière-plan (apps/producers/processing.py) : commande
+# process_photos (pool de processus, service photo-processing) ; en développement, thread local réveillé après
+# chaque upload (PHOTO_PROCESSING_WORKER, à désactiver quand la commande tourne)
+PHOTO_PROCESSING_WORKER = config('PHOTO_PROCESSING_WORKER', default=DEBUG, cast=bool)
+PHOTO_PROCESSING_INTERVAL = config('PHOTO_PROCESSING_INTERVAL', default=60, cast=int)
+# Réservation abandonnée (worker arrêté) reprise au bout de N secondes
+PHOTO_PROCESSING_TIMEOUT = config('PHOTO_PROCESSING_TIMEOUT', default=300, cast=int)
+# Commandes de peuplement (add_*_producers) : schéma et hôte substitués à ceux des
+# URLs d'images (serveur local, tests). Vide : URLs d'origine
+SEED_IMAGE_BASE_URL = config('SEED_IMAGE_BASE_URL', default='')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -252,7 +306,7 @@ AUTH_USER_MODEL = 'custom_auth.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -267,21 +321,50 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_CLASSES': [
         'config.throttling.RedisAnonRateThrottle',
         'config.throttling.RedisUserRateThrottle',
+        'config.throttling.RedisBurstAnonRateThrottle',
+        'config.throttling.RedisBurstUserRateThrottle',
+        'config.throttling.RedisHeavyAnonRateThrottle',
+        'config.throttling.RedisHeavyUserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '200/hour',
         'user': '2000/hour',
         'burst_anon': '20/minute',
         'burst_user': '100/minute',
+        # Budgets en unités de coût des requêtes coûteuses (throttle_costs des vues)
+        'heavy_anon': '60/minute',
+        'heavy_user': '300/minute',
     },
     'EXCEPTION_HANDLER': 'config.exceptions.custom_exception_handler',
 }
 
+# Throttling (config/throttling.py)
+# Pré-throttle local : coût reporté à Redis par lots de N unités ou toutes les T ms (0 = désactivé)
+THROTTLE_LOCAL_BATCH = config('THROTTLE_LOCAL_BATCH', default=0, cast=int)
+THROTTLE_LOCAL_INTERVAL_MS = config('THROTTLE_LOCAL_INTERVAL_MS', default=250, cast=int)
+# Redis injoignable : laisser passer (True) ou refuser (False) les requêtes
+THROTTLE_FAIL_OPEN = config('THROTTLE_FAIL_OPEN', default=True, cast=bool)
+
+# Durée de cache des utilisateurs authentifiés (apps/auth/authentication.py)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+# Suppression des comptes en arrière-plan (apps/auth/deletion.py) : commande
+# process_account_deletions --loop (service account-deletions), ou thread local réveillé à chaque
+# demande (ACCOUNT_DELETION_WORKER, défaut: DEBUG ; à désactiver quand la commande tourne)
+ACCOUNT_DELETION_WORKER = config('ACCOUNT_DELETION_WORKER', default=DEBUG, cast=bool)
+ACCOUNT_DELETION_INTERVAL = config('ACCOUNT_DELETION_INTERVAL', default=300, cast=int)
+# Réservation d'un compte par un worker reprise au-delà de ce délai (secondes)
+ACCOUNT_DELETION_TIMEOUT = config('ACCOUNT_DELETION_TIMEOUT', default=3600, cast=int)
+# Liste noire des tokens (apps/auth/blacklist.py) : filtre de Bloom local par processus
+TOKEN_BLOOM_CAPACITY = config('TOKEN_BLOOM_CAPACITY', default=100000, cast=int)
+TOKEN_BLOOM_ERROR_RATE = config('TOKEN_BLOOM_ERROR_RATE', default=0.001, cast=float)
+TOKEN_BLOOM_REFRESH_INTERVAL = config('TOKEN_BLOOM_REFRESH_INTERVAL', default=2, cast=float)
+TOKEN_BLOOM_REBUILD_INTERVAL = config('TOKEN_BLOOM_REBUILD_INTERVAL', default=3600, cast=int)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=config('JWT_ACCESS_TOKEN_LIFETIME_HOURS', default=1, cast=int)),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_TOKEN_LIFETIME_DAYS', default=7, cast=int)),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True,  # Liste noire Redis (apps/auth/blacklist.py)
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -312,12 +395,16 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
 
+# Le frontend lit l'ETag pour ses requêtes conditionnelles (If-None-Match)
+CORS_EXPOSE_HEADERS = ['ETag']
+
 # ============================================================================
 # SECURITY SETTINGS
 # ============================================================================
@@ -1,13 +1,297 @@
 """
 Custom throttling classes using Redis cache.
+
+Algorithme de fenêtre glissante approchée : deux compteurs (fenêtre fixe courante et
+précédente), le précédent étant pondéré par la part de la fenêtre glissante qui le
+recouvre. La mémoire est constante par identifiant (un hash Redis de trois champs),
+au lieu de la liste de tous les horodatages stockée par SimpleRateThrottle.
+
+Avec Redis, la vérification et l'incrément sont faits par un script Lua atomique :
+un seul aller-retour, sans course entre lecture et écriture. Avec un autre cache
+(développement, tests), le même algorithme est appliqué en Python.
+
+Optionnellement (THROTTLE_LOCAL_BATCH > 0), une couche locale au processus accepte
+les requêtes loin de la limite sans appel à Redis et reporte leur coût en lot au
+prochain appel (toutes les THROTTLE_LOCAL_BATCH unités ou THROTTLE_LOCAL_INTERVAL_MS).
+Près de la limite, chaque requête est vérifiée dans Redis. Le dépassement global est
+borné par environ (nombre de processus - 1) × THROTTLE_LOCAL_BATCH par fenêtre.
 """
+import logging
+import math
+import threading
+from collections import Counter
+
 from rest_framework.throttling import SimpleRateThrottle
+from django.conf import settings
 from django.core.cache import caches
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1] : hash du compteur (w = index de la fenêtre courante, c = compte courant,
+#           p = compte de la fenêtre précédente)
+# ARGV : limite, durée de la fenêtre (s), maintenant (s), coût de la requête,
+#        unités déjà servies localement (ajoutées sans condition)
+# Retour : {acceptée (0/1), attente en ms, compte estimé × 1000}
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local served = tonumber(ARGV[5]) or 0
+local current = math.floor(now / window)
+local state = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local w = tonumber(state[1]) or current
+local c = tonumber(state[2]) or 0
+local p = tonumber(state[3]) or 0
+if w ~= current then
+    if w == current - 1 then p = c else p = 0 end
+    c = 0
+    w = current
+end
+c = c + served
+local elapsed = (now - current * window) / window
+local estimate = p * (1 - elapsed) + c
+local allowed = 0
+local wait = 0
+if estimate + cost <= limit then
+    allowed = 1
+    c = c + cost
+    estimate = estimate + cost
+elseif cost > limit then
+    wait = window
+elseif c + cost <= limit then
+    wait = (1 - (limit - c - cost) / p - elapsed) * window
+else
+    wait = (2 - elapsed - (limit - cost) / c) * window
+end
+if allowed == 1 or served > 0 then
+    redis.call('HSET', KEYS[1], 'w', w, 'c', c, 'p', p)
+    redis.call('EXPIRE', KEYS[1], window * 2)
+end
+return {allowed, math.ceil(math.max(wait, 0) * 1000), math.floor(estimate * 1000)}
+"""
+
+_script = None
+
+
+def sliding_window(state, limit: int, window: int, now: float, cost: int = 1, served: int = 0):
+    """
+    Version Python du script Lua (caches sans Redis).
+
+    Args:
+        state: Tuple (fenêtre, compte courant, compte précédent) ou None
+        limit: Nombre de requêtes (unités de coût) autorisées par fenêtre
+        window: Durée de la fenêtre en secondes
+        now: Horodatage courant en secondes
+        cost: Coût de la requête
+        served: Unités déjà servies localement, ajoutées sans condition
+
+    Returns:
+        Tuple (acceptée, nouvel état, attente en secondes, compte estimé)
+    """
+    current = int(now // window)
+    w, c, p = state or (current, 0, 0)
+    if w != current:
+        p = c if w == current - 1 else 0
+        c, w = 0, current
+    c += served
+    elapsed = (now - current * window) / window
+    estimate = p * (1 - elapsed) + c
+    if estimate + cost <= limit:
+        return True, (w, c + cost, p), 0.0, estimate + cost
+    if cost > limit:
+        wait = window
+    elif c + cost <= limit:
+        wait = (1 - (limit - c - cost) / p - elapsed) * window
+    else:
+        wait = (2 - elapsed - (limit - cost) / c) * window
+    return False, (w, c, p), math.ceil(max(wait, 0) * 1000) / 1000, estimate
+
+
+def get_request_cost(request, view) -> int:
+    """
+    Coût d'une requête, déclaré par la vue dans throttle_costs.
+
+    Les clés sont des noms d'action ('nearby', 'photos'...) ; la clé 'search'
+    s'applique aux requêtes portant un paramètre search non vide.
+
+    Usage:
+        class ProducerProfileViewSet(viewsets.ModelViewSet):
+            throttle_costs = {'nearby': 5, 'search': 2, 'photos': 10}
+    """
+    costs = getattr(view, 'throttle_costs', None)
+    if not costs:
+        return 1
+    cost = costs.get(getattr(view, 'action', None), 1)
+    if 'search' in costs and request.query_params.get('search'):
+        cost = max(cost, costs['search'])
+    return cost
+
+
+def get_redis_client(cache):
+    """Client Redis du cache s'il s'agit de django-redis, None sinon."""
+    client = getattr(cache, 'client', None)
+    if client is None or not hasattr(client, 'get_client'):
+        return None
+    return client.get_client(write=True)
+
+
+class _LocalState:
+    """État local d'un identifiant : dernier compte connu et coût non encore reporté."""
+    __slots__ = ('estimate', 'synced_at', 'pending')
+
+    def __init__(self, estimate, synced_at):
+        self.estimate = estimate
+        self.synced_at = synced_at
+        self.pending = 0
+
+
+class LocalPreThrottle:
+    """
+    Pré-throttle en mémoire du processus, synchronisé par lots avec le cache.
+
+    Une requête est acceptée localement si le dernier compte connu, augmenté du coût
+    non reporté et d'une marge d'un lot, reste sous la limite, et si la dernière
+    synchronisation est récente. Sinon, le coût en attente est reporté et la requête
+    vérifiée dans le cache (un seul appel).
+    """
+    MAX_KEYS = 10000
+
+    def __init__(self, batch: int = None, interval_ms: int = None):
+        self._batch = batch
+        self._interval_ms = interval_ms
+        self._states = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    @property
+    def batch(self) -> int:
+        if self._batch is not None:
+            return self._batch
+        return getattr(settings, 'THROTTLE_LOCAL_BATCH', 0)
+
+    @property
+    def interval(self) -> float:
+        if self._interval_ms is not None:
+            return self._interval_ms / 1000
+        return getattr(settings, 'THROTTLE_LOCAL_INTERVAL_MS', 250) / 1000
+
+    def check(self, throttle, key, cost):
+        """Même contrat que RedisThrottleMixin.check."""
+        batch = self.batch
+        now = throttle.now
+        with self._lock:
+            state = self._states.get(key)
+            if (state is not None
+                    and state.pending + cost <= batch
+                    and now - state.synced_at < self.interval
+                    and state.estimate + state.pending + cost + batch <= throttle.num_requests):
+                state.pending += cost
+                self.stats['local'] += 1
+                return True, 0.0
+            served = 0
+            if state is not None:
+                served, state.pending = state.pending, 0
+
+        allowed, wait, estimate = throttle.remote_check(key, cost, served)
+
+        with self._lock:
+            self.stats['remote'] += 1
+            state = self._states.get(key)
+            if state is None:
+                if len(self._states) >= self.MAX_KEYS:
+                    self._prune(now)
+                self._states[key] = _LocalState(estimate, now)
+            else:
+                state.estimate, state.synced_at = estimate, now
+        return allowed, wait
+
+    def _prune(self, now):
+        """Oublie les identifiants sans coût en attente ou inactifs (verrou tenu)."""
+        expired = [
+            key for key, state in self._states.items()
+            if not state.pending or now - state.synced_at > self.interval
+        ]
+        for key in expired:
+            del self._states[key]
+
+
+local_prethrottle = LocalPreThrottle()
+
 
 class RedisThrottleMixin:
-    """Mixin pour utiliser le cache Redis pour le throttling."""
-    cache = caches['ratelimit']
+    """
+    Mixin pour utiliser le cache Redis pour le throttling (fenêtre glissante).
+
+    Avec weighted = True, chaque requête consomme son coût (get_request_cost) au lieu
+    d'une unité : la limite du scope est alors un budget d'unités de coût.
+    """
+    cost = 1
+    weighted = False
+    local_throttle = local_prethrottle
+
+    @property
+    def cache(self):
+        return caches['ratelimit']
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        allowed, self._wait = self.check(self.key, self.get_cost(request, view))
+        return allowed
+
+    def get_cost(self, request, view):
+        return get_request_cost(request, view) if self.weighted else self.cost
+
+    def check(self, key, cost):
+        """Vérifie et consomme le coût pour la clé. Retourne (acceptée, attente)."""
+        if self.local_throttle is not None and self.local_throttle.batch > 0:
+            return self.local_throttle.check(self, key, cost)
+        allowed, wait, _ = self.remote_check(key, cost)
+        return allowed, wait
+
+    def remote_check(self, key, cost, served=0):
+        """
+        Vérification dans le cache partagé.
+
+        Returns:
+            Tuple (acceptée, attente en secondes, compte estimé)
+        """
+        try:
+            redis_client = get_redis_client(self.cache)
+            if redis_client is None:
+                state = self.cache.get(key)
+                allowed, state, wait, estimate = sliding_window(
+                    state, self.num_requests, self.duration, self.now, cost, served
+                )
+                if allowed or served:
+                    self.cache.set(key, state, self.duration * 2)
+                return allowed, wait, estimate
+
+            global _script
+            if _script is None:
+                _script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+            allowed, wait_ms, estimate = _script(
+                keys=[self.cache.make_key(key)],
+                args=[self.num_requests, self.duration, f'{self.now:.6f}', cost, served],
+                client=redis_client,
+            )
+            return bool(allowed), wait_ms / 1000, estimate / 1000
+        except Exception as e:
+            # Cache indisponible : politique configurable (ouverte par défaut)
+            logger.warning(f'Throttle check failed for {key}: {e}')
+            if getattr(settings, 'THROTTLE_FAIL_OPEN', True):
+                return True, 0.0, 0
+            return False, 1.0, self.num_requests
+
+    def wait(self):
+        return getattr(self, '_wait', None) or None
 
 
 class RedisAnonRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
@@ -17,7 +301,7 @@ class RedisAnonRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
     def get_cache_key(self, request, view):
         if request.user and request.user.is_authenticated:
             return None  # Ne pas throttle les utilisateurs authentifiés
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': self.get_ident(request)
@@ -33,7 +317,7 @@ class RedisUserRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
             ident = request.user.pk
         else:
             ident = self.get_ident(request)
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': ident
@@ -47,7 +331,7 @@ class RedisBurstAnonRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
     def get_cache_key(self, request, view):
         if request.user and request.user.is_authenticated:
             return None
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': self.get_ident(request)
@@ -63,10 +347,49 @@ class RedisBurstUserRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
             ident = request.user.pk
         else:
             ident = self.get_ident(request)
-        
+
         return self.cache_format % {
             'scope': self.scope,
             'ident': ident
         }
 
 
+class RedisHeavyAnonRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
+    """
+    Budget pondéré des requêtes coûteuses des utilisateurs anonymes.
+
+    Seules les requêtes de coût > 1 le consomment : les requêtes légères ne sont
+    jamais bloquées par l'usage des requêtes lourdes.
+    """
+    scope = 'heavy_anon'
+    weighted = True
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        if get_request_cost(request, view) <= 1:
+            return None
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class RedisHeavyUserRateThrottle(RedisThrottleMixin, SimpleRateThrottle):
+    """Budget pondéré des requêtes coûteuses des utilisateurs authentifiés."""
+    scope = 'heavy_user'
+    weighted = True
+
+    def get_cache_key(self, request, view):
+        if get_request_cost(request, view) <= 1:
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': ident
+        }
@@ -2,13 +2,14 @@
 URL configuration for MonPanierLocal project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
 from apps.producers.views import ProducerPhotoViewSet
 from rest_framework.routers import DefaultRouter
 from .health import health_check, readiness_check, cache_stats, clear_cache
+from .media import serve_media
 
 router = DefaultRouter()
 router.register(r'photos', ProducerPhotoViewSet, basename='photo')
@@ -25,11 +26,12 @@ urlpatterns = [
     path('ready/', readiness_check, name='readiness_check'),
     path('api/cache/stats/', cache_stats, name='cache_stats'),
     path('api/cache/clear/', clear_cache, name='clear_cache'),
+    # Médias : autorisation puis envoi par nginx (X-Accel-Redirect) ou par Django
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', serve_media, name='media'),
 ]
 
-# Serve media files in development
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Customize admin site
@@ -5,7 +5,7 @@ echo "🚀 Démarrage du backend Django..."
 
 # Créer les dossiers media nécessaires avec les bonnes permissions
 echo "📁 Création des dossiers media..."
-mkdir -p /app/media/producers /app/media/products
+mkdir -p /app/media/producers /app/media/products /app/media/photos
 chown -R appuser:appuser /app/media
 chmod -R 755 /app/media
 
@@ -77,6 +77,12 @@ except Exception as e:
     print(f'⚠️ Cache Redis: {e} (le backend démarre quand même)')
 " || echo "⚠️ Vérification de santé échouée, le backend démarre quand même"
 
+# Préchauffer le cache en arrière-plan (optionnel, n'attend pas gunicorn)
+if [ "${WARM_CACHE_ON_START:-False}" = "True" ]; then
+  echo "🔥 Préchauffage du cache en arrière-plan..."
+  runuser -u appuser -- python manage.py warm_cache > /dev/null 2>&1 &
+fi
+
 echo "✅ Backend prêt"
 
 # Exécuter la commande passée en argument (gunicorn) en tant qu'appuser
@@ -6,10 +6,13 @@ os.environ.setdefault("USE_LOCAL_DEV", "True")
 os.environ.setdefault("DEBUG", "True")
 os.environ["ALLOWED_HOSTS"] = "localhost,127.0.0.1,testserver"
 
+from decimal import Decimal
+
 import pytest
 from rest_framework.test import APIClient
 
 from apps.auth.models import User
+from apps.producers.models import ProducerProfile
 
 
 @pytest.fixture
@@ -40,6 +43,20 @@ def producer_user(db):
     )
 
 
+@pytest.fixture
+def producer_profile(producer_user, db):
+    """Profil producteur de test."""
+    return ProducerProfile.objects.create(
+        user=producer_user,
+        name="Ferme Test",
+        description="Une ferme de test",
+        category="maraîchage",
+        address="10 rue Test, 75001 Paris",
+        latitude=Decimal("48.8566"),
+        longitude=Decimal("2.3522"),
+    )
+
+
 @pytest.fixture
 def auth_client(api_client, user):
     """Client API authentifié (User.USERNAME_FIELD=email)."""
@@ -1,6 +1,31 @@
 """Tests unitaires API Auth."""
+import io
+from datetime import timedelta
+from decimal import Decimal
+
 import pytest
-from django.urls import reverse
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.auth.authentication import USER_CACHE_KEY
+from apps.auth.blacklist import BloomFilter
+from apps.auth.deletion import claim_accounts, process_pending_deletions, request_account_deletion
+from apps.auth.models import User
+from apps.producers.models import ProducerPhoto, ProducerProfile, SaleMode
+from apps.products.models import Product, ProductPhoto
+from tests.test_photos_api import make_image_file
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-auth"},
+    "sessions": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "ratelimit": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "tokens": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-tokens"},
+}
 
 
 @pytest.mark.django_db
@@ -180,8 +205,11 @@ class TestAuthDeleteAccount:
             format="json",
         )
         assert response.status_code == 200
-        from apps.auth.models import User
-        assert not User.objects.filter(email=user.email).exists()
+        # Compte désactivé immédiatement, données supprimées en arrière-plan
+        user.refresh_from_db()
+        assert not user.is_active
+        assert user.deletion_requested_at is not None
+        assert auth_client.get("/api/auth/me/").status_code == 401
 
     def test_delete_account_wrong_password(self, auth_client):
         """Mot de passe incorrect."""
@@ -230,3 +258,167 @@ class TestAuthTokenRefresh:
         )
         assert response.status_code == 200
         assert "access" in response.data
+
+
+def user_queries(queries):
+    """Requêtes SQL portant sur la table des utilisateurs."""
+    return [q for q in queries if 'FROM "custom_auth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestStatelessAuth:
+    """Authentification JWT sans requête utilisateur en lecture."""
+
+    def test_public_read_uses_token_user(self, auth_client):
+        """GET sur une vue stateless_auth : aucune requête sur la table utilisateurs."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = auth_client.get("/api/products/categories/")
+        assert response.status_code == 200
+        assert user_queries(ctx.captured_queries) == []
+
+    def test_me_served_from_cache_and_invalidated(self, auth_client, user):
+        """Utilisateur complet mis en cache, invalidé par PATCH /me/."""
+        with override_settings(CACHES=LOCMEM_CACHES):
+            auth_client.get("/api/auth/me/")
+            with CaptureQueriesContext(connection) as ctx:
+                auth_client.get("/api/auth/me/")
+            assert user_queries(ctx.captured_queries) == []
+
+            auth_client.patch("/api/auth/me/", {"username": "camille"}, format="json")
+            response = auth_client.get("/api/auth/me/")
+            assert response.data["username"] == "camille"
+
+    def test_cached_user_has_no_password_hash(self, auth_client, user):
+        """Le hash du mot de passe n'est pas stocké dans le cache partagé."""
+        with override_settings(CACHES=LOCMEM_CACHES):
+            auth_client.get("/api/auth/me/")
+            cached = caches["default"].get(USER_CACHE_KEY.format(user_id=user.pk))
+            assert "password" in cached.get_deferred_fields()
+            # Champ relu à la demande : confirmation par mot de passe toujours possible
+            response = auth_client.post("/api/auth/change-password/", {
+                "old_password": "TestPass123!", "new_password": "NewPass456!x", "new_password_confirm": "NewPass456!x",
+            }, format="json")
+            assert response.status_code == 200
+            user.refresh_from_db()
+            assert user.check_password("NewPass456!x")
+
+    def test_deactivated_user_rejected(self, auth_client, user):
+        """Un compte désactivé n'est plus servi depuis le cache."""
+        with override_settings(CACHES=LOCMEM_CACHES):
+            auth_client.get("/api/auth/me/")
+            user.is_active = False
+            user.save()
+            response = auth_client.get("/api/auth/me/")
+            assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestTokenBlacklist:
+    """Liste noire des tokens (rotation et déconnexion)."""
+
+    def login(self, api_client, user):
+        response = api_client.post(
+            "/api/auth/login/",
+            {"email": user.email, "password": "TestPass123!"},
+            format="json",
+        )
+        return response.data
+
+    def test_rotated_refresh_token_is_revoked(self, api_client, user):
+        """Un refresh token déjà utilisé est refusé."""
+        refresh = self.login(api_client, user)["refresh"]
+        first = api_client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+        assert first.status_code == 200
+        assert first.data["refresh"] != refresh
+        reused = api_client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json")
+        assert reused.status_code == 401
+        rotated = api_client.post("/api/auth/token/refresh/", {"refresh": first.data["refresh"]}, format="json")
+        assert rotated.status_code == 200
+
+    def test_logout_revokes_access_and_refresh(self, api_client, user):
+        """Après déconnexion, ni le token d'accès ni le refresh token ne sont acceptés."""
+        tokens = self.login(api_client, user)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = api_client.post("/api/auth/logout/", {"refresh": tokens["refresh"]}, format="json")
+        assert response.status_code == 200
+        assert api_client.get("/api/auth/me/").status_code == 401
+        api_client.credentials()
+        refreshed = api_client.post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json")
+        assert refreshed.status_code == 401
+
+    def test_delete_account_revokes_refresh(self, api_client, user):
+        """Après une demande de suppression, le refresh token ne donne plus de token d'accès."""
+        tokens = self.login(api_client, user)
+        rotated = api_client.post("/api/auth/token/refresh/", {"refresh": tokens["refresh"]}, format="json").data
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {rotated['access']}")
+        response = api_client.post(
+            "/api/auth/delete-account/", {"password": "TestPass123!", "refresh": rotated["refresh"]}, format="json"
+        )
+        assert response.status_code == 200
+        api_client.credentials()
+        refreshed = api_client.post("/api/auth/token/refresh/", {"refresh": rotated["refresh"]}, format="json")
+        assert refreshed.status_code == 401
+
+    def test_refresh_refused_for_inactive_account(self, api_client, user):
+        """Compte désactivé ou en cours de suppression : refresh token refusé même non révoqué."""
+        refresh = self.login(api_client, user)["refresh"]
+        User.objects.filter(pk=user.pk).update(deletion_requested_at=timezone.now())
+        assert api_client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json").status_code == 401
+
+        refresh = self.login(api_client, user)["refresh"]
+        User.objects.filter(pk=user.pk).update(deletion_requested_at=None, is_active=False)
+        assert api_client.post("/api/auth/token/refresh/", {"refresh": refresh}, format="json").status_code == 401
+
+    def test_bloom_filter(self):
+        """Pas de faux négatif, taux de faux positifs proche de la cible."""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"revoked-{i}")
+        assert all(f"revoked-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+class TestAccountDeletion:
+    """Suppression effective des comptes en attente (par lots, images comprises)."""
+
+    def test_pending_account_deleted_with_media(self, producer_user, django_capture_on_commit_callbacks):
+        producer = ProducerProfile.objects.create(
+            user=producer_user, name="Ferme à supprimer", category="maraîchage",
+            address="10 rue Test", latitude=Decimal("48.8566"), longitude=Decimal("2.3522"),
+        )
+        producer_photo = ProducerPhoto.objects.create(producer=producer, image_file=make_image_file("p.jpg"))
+        products = [Product.objects.create(producer=producer, name=f"Produit {i}") for i in range(5)]
+        product_photo = ProductPhoto.objects.create(product=products[0], image_file=make_image_file("q.jpg"))
+        SaleMode.objects.create(
+            producer=producer, mode_type="on_site", title="Vente", instructions="Sur place"
+        )
+        files = [producer_photo.image_file.name, product_photo.image_file.name]
+
+        request_account_deletion(producer_user)
+        # Fichiers partagés (blobs) effacés après le commit de chaque lot
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("process_account_deletions", batch_size=2, stdout=io.StringIO())
+
+        assert not User.objects.filter(pk=producer_user.pk).exists()
+        assert not ProducerProfile.objects.filter(pk=producer.pk).exists()
+        assert not Product.objects.filter(producer_id=producer.pk).exists()
+        assert not any(default_storage.exists(name) for name in files)
+
+        # Idempotent : un nouveau passage ne fait rien
+        call_command("process_account_deletions", stdout=io.StringIO())
+
+    def test_claimed_account_not_processed_twice(self, user, producer_user):
+        """Un compte réservé par un worker n'est pas repris par un autre ; une réservation périmée l'est."""
+        request_account_deletion(user)
+        request_account_deletion(producer_user)
+        assert claim_accounts(limit=1) == [user.pk]
+        # Un second worker ne voit que le compte restant
+        assert process_pending_deletions() == 1
+        assert User.objects.filter(pk=user.pk).exists()
+        assert not User.objects.filter(pk=producer_user.pk).exists()
+
+        User.objects.filter(pk=user.pk).update(deletion_started_at=timezone.now() - timedelta(hours=2))
+        assert process_pending_deletions() == 1
+        assert not User.objects.filter(pk=user.pk).exists()
@@ -0,0 +1,221 @@
+"""Tests du cache des réponses (corps rendus et compressés)."""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.producers import cache as cache_module
+from apps.producers.cache import (
+    RequestFrequencyRecorder,
+    _wait_for_payload,
+    compress_body,
+    decompress_body,
+    get_cache_key,
+    invalidate_producer_cache,
+    versioned_scope,
+)
+from apps.producers.models import ProducerProfile
+from apps.products.models import Product, ProductCategory
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-tokens'},
+}
+
+
+@pytest.fixture
+def locmem_cache():
+    """Cache local en mémoire (le DummyCache des tests ne stocke rien)."""
+    with override_settings(CACHES=LOCMEM_CACHES):
+        cache.clear()
+        yield cache
+        cache.clear()
+
+
+class TestCompression:
+    """Compression des corps mis en cache."""
+
+    def test_roundtrip_zlib(self):
+        body = b'{"results": []}' * 200
+        codec, data = compress_body(body)
+        assert codec == 'zlib'
+        assert len(data) < len(body)
+        assert decompress_body(codec, data) == body
+
+    def test_small_body_not_compressed(self):
+        codec, data = compress_body(b'{}')
+        assert codec == 'none'
+        assert data == b'{}'
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    """Mise en cache des listes et détails producteurs."""
+
+    def test_hit_serves_same_bytes_with_etag(self, api_client, locmem_cache, producer_profile):
+        first = api_client.get("/api/producers/")
+        assert first.status_code == 200
+        assert first.has_header("ETag")
+        second = api_client.get("/api/producers/")
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second["ETag"] == first["ETag"]
+        assert second["Content-Type"] == first["Content-Type"]
+
+    def test_hit_with_if_none_match_returns_304(self, api_client, locmem_cache, producer_profile):
+        first = api_client.get(f"/api/producers/{producer_profile.id}/")
+        second = api_client.get(
+            f"/api/producers/{producer_profile.id}/", HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        assert second.status_code == 304
+
+    def test_hit_without_if_none_match_runs_no_query(self, api_client, locmem_cache, producer_profile):
+        """Hit du cache sans If-None-Match : aucune requête, ETag repris de l'entrée."""
+        for url in ("/api/producers/?search=Ferme", f"/api/producers/{producer_profile.id}/"):
+            first = api_client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = api_client.get(url)
+            assert len(queries) == 0, url
+            assert second["ETag"] == first["ETag"]
+            assert api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code == 304
+
+    def test_child_write_invalidates_detail(self, api_client, locmem_cache, producer_profile):
+        api_client.get(f"/api/producers/{producer_profile.id}/")
+        Product.objects.create(producer=producer_profile, name="Radis")
+        response = api_client.get(f"/api/producers/{producer_profile.id}/")
+        assert [p["name"] for p in response.json()["products"]] == ["Radis"]
+
+    def test_category_rename_refreshes_detail(self, api_client, locmem_cache, producer_profile):
+        """Renommer une catégorie change l'ETag et le corps mis en cache du détail."""
+        category = ProductCategory.objects.create(name="agrumes", display_name="Agrumes", icon="citrus")
+        Product.objects.create(producer=producer_profile, name="Oranges", category=category)
+        url = f"/api/producers/{producer_profile.id}/"
+        first = api_client.get(url)
+        category.display_name = "Agrumes de saison"
+        category.save()
+
+        second = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 200
+        assert second.json()["products"][0]["category"]["display_name"] == "Agrumes de saison"
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=second["ETag"]).status_code == 304
+
+    def test_invalidation_keeps_other_entries(self, api_client, locmem_cache, producer_profile):
+        """Sans delete_pattern, l'invalidation change de génération au lieu de vider le cache."""
+        url = f"/api/producers/{producer_profile.id}/"
+        api_client.get(url)
+        cache.set("tests:other", 1, 60)
+        ProducerProfile.objects.filter(pk=producer_profile.pk).update(name="Renommée")
+        invalidate_producer_cache(producer_profile.id)
+        assert cache.get("tests:other") == 1
+        assert api_client.get(url).json()["name"] == "Renommée"
+
+    def test_query_params_are_part_of_key(self, api_client, locmem_cache, producer_profile):
+        all_producers = api_client.get("/api/producers/").json()
+        filtered = api_client.get("/api/producers/", {"categories": "apiculture"}).json()
+        assert all_producers["count"] == 1
+        assert filtered["count"] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWarmCache:
+    """Préchauffage du cache (les vues sont appelées depuis un pool de threads)."""
+
+    def test_warm_cache_fills_list_and_detail(self, locmem_cache, producer_profile):
+        from apps.producers.warmup import warm_cache
+
+        report = warm_cache(origin="http://testserver", pages=1, top=0, details=5, cities=2, workers=2)
+        assert report["failed"] == []
+        assert report["succeeded"] == report["total"]
+        origin = "http://testserver"
+        list_scope = versioned_scope("producers_list", "producers_list")
+        detail_scope = versioned_scope("producer_detail", f"producer_detail:{producer_profile.id}")
+        assert cache.get(get_cache_key(list_scope, origin=origin, query=None)) is not None
+        assert cache.get(get_cache_key(detail_scope, origin=origin, query=None)) is not None
+
+
+@pytest.mark.django_db
+class TestCacheStats:
+    """Métriques par espace de noms exposées sur /api/cache/stats/."""
+
+    def test_namespace_counters(self, api_client, locmem_cache, producer_profile):
+        before = api_client.get("/api/cache/stats/").data["cache"]["namespaces"]["producers_list"]
+        api_client.get("/api/producers/")
+        api_client.get("/api/producers/")
+        after = api_client.get("/api/cache/stats/").data["cache"]["namespaces"]["producers_list"]
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 1
+        assert after["sets"] - before["sets"] == 1
+        assert after["set_bytes"] > before["set_bytes"]
+        assert "hit_rate" in after and "avg_get_ms" in after
+
+    def test_flush_error_keeps_counts(self, monkeypatch):
+        """Une erreur Redis pendant la fusion remet les compteurs en attente."""
+        class FailingClient:
+            def pipeline(self, transaction=False):
+                raise ConnectionError("redis indisponible")
+
+        monkeypatch.setattr(cache_module, "get_redis_client", lambda: FailingClient())
+        recorder = RequestFrequencyRecorder(flush_interval=3600)
+        recorder.record("/api/producers/")
+        recorder.record("/api/producers/")
+        recorder.flush()
+        assert recorder._pending["/api/producers/"] == 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRequestCoalescing:
+    """Regroupement des requêtes identiques simultanées."""
+
+    def test_concurrent_nearby_computed_once(self, locmem_cache, producer_profile, monkeypatch):
+        import threading
+        import time
+        from django.db import connection
+        from rest_framework.test import APIClient
+        from apps.producers import views
+
+        calls = []
+        original = views.get_producers_near_location
+
+        def slow_scan(*args, **kwargs):
+            calls.append(1)
+            time.sleep(0.3)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(views, "get_producers_near_location", slow_scan)
+        statuses = []
+
+        def fetch():
+            response = APIClient().get(
+                "/api/producers/nearby/", {"latitude": 48.86, "longitude": 2.35, "radius_km": 20}
+            )
+            statuses.append(response.status_code)
+            connection.close()
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert statuses == [200] * 5
+        assert len(calls) == 1
+
+    def test_wait_ignores_other_format(self, locmem_cache):
+        """Une entrée d'un ancien format n'est pas prise pour un résultat frais."""
+        cache.set("tests:old-format", ("ancien", "format"), 60)
+        assert _wait_for_payload("tests:old-format", 0.05) is None
+
+    def test_stale_entry_served_while_locked(self, api_client, locmem_cache, producer_profile):
+        first = api_client.get("/api/producers/")
+        key = get_cache_key(versioned_scope("producers_list", "producers_list"), origin="http://testserver", query=None)
+        cache.set(key, cache.get(key)._replace(fresh_until=0), 60)
+        # Un autre worker détient le verrou de recalcul
+        cache.add(f"lock:{key}", 1, 10)
+        ProducerProfile.objects.filter(pk=producer_profile.pk).update(name="Renommée")
+
+        second = api_client.get("/api/producers/")
+        assert second.status_code == 200
+        assert second.content == first.content
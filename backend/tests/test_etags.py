@@ -0,0 +1,65 @@
+"""Tests des requêtes conditionnelles (ETag / If-None-Match)."""
+import pytest
+
+from apps.producers.models import SaleMode
+from apps.products.models import Product, ProductCategory
+
+
+def revalidate(api_client, url, **extra):
+    """Premier GET puis GET conditionnel avec l'ETag reçu."""
+    first = api_client.get(url, **extra)
+    assert first.status_code == 200
+    assert first.has_header("ETag")
+    second = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"], **extra)
+    return first, second
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """304 sans sérialisation tant que la ressource n'a pas changé."""
+
+    def test_producer_detail_304(self, api_client, producer_profile):
+        first, second = revalidate(api_client, f"/api/producers/{producer_profile.id}/")
+        assert second.status_code == 304
+        assert second["ETag"] == first["ETag"]
+        assert second.content == b""
+
+    def test_producer_list_304_and_filters_in_etag(self, api_client, producer_profile):
+        first, second = revalidate(api_client, "/api/producers/")
+        assert second.status_code == 304
+        filtered = api_client.get("/api/producers/?categories=élevage", HTTP_IF_NONE_MATCH=first["ETag"])
+        assert filtered.status_code == 200
+
+    def test_categories_304(self, api_client, db):
+        ProductCategory.objects.get_or_create(
+            name="legumes", defaults={"display_name": "Légumes", "icon": "carrot"}
+        )
+        _, second = revalidate(api_client, "/api/products/categories/")
+        assert second.status_code == 304
+
+    def test_sale_modes_and_products_304(self, api_client, producer_profile):
+        SaleMode.objects.create(
+            producer=producer_profile, mode_type="on_site", title="Vente à la ferme",
+            instructions="Sur place, le samedi matin",
+        )
+        product = Product.objects.create(producer=producer_profile, name="Carottes")
+        for url in (
+            f"/api/producers/{producer_profile.id}/sale-modes/",
+            f"/api/producers/{producer_profile.id}/products/",
+            f"/api/products/{product.id}/",
+        ):
+            _, second = revalidate(api_client, url)
+            assert second.status_code == 304, url
+
+    def test_child_write_changes_producer_etag(self, api_client, producer_profile):
+        url = f"/api/producers/{producer_profile.id}/"
+        first = api_client.get(url)
+        Product.objects.create(producer=producer_profile, name="Radis")
+        second = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert second.status_code == 200
+        assert second["ETag"] != first["ETag"]
+        assert any(p["name"] == "Radis" for p in second.json()["products"])
+
+    def test_unknown_producer_still_404(self, api_client, db):
+        response = api_client.get("/api/producers/999999/", HTTP_IF_NONE_MATCH='"abc"')
+        assert response.status_code == 404
@@ -1,13 +1,20 @@
 """Tests unitaires - Photos producteurs et produits (affichage, modification, acces public)."""
 import io
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
 from decimal import Decimal
 
 import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
 from PIL import Image
 
 from apps.auth.models import User
-from apps.producers.models import ProducerProfile, ProducerPhoto
+from apps.producers.models import MediaBlob, ProducerProfile, ProducerPhoto
+from apps.producers.processing import claim_photos, process_pending_photos
+from apps.producers.validators import sniff_image_header
 from apps.products.models import Product, ProductCategory, ProductPhoto
 
 
@@ -20,6 +27,16 @@ def make_image_file(name="test.jpg", size=(100, 100)):
     return SimpleUploadedFile(name, buf.read(), content_type="image/jpeg")
 
 
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """
+    MEDIA_ROOT temporaire pour tous les tests du module (le repertoire media du
+    depot contient les images de seed).
+    """
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    return tmp_path / "media"
+
+
 @pytest.fixture
 def producer_with_photo(db, producer_user):
     """Producteur avec une photo."""
@@ -218,3 +235,624 @@ class TestPhotosProduitModification:
         )
         assert response.status_code == 204
         assert not ProductPhoto.objects.filter(id=photo.id).exists()
+
+
+@pytest.mark.django_db
+class TestPhotosDeclinaisons:
+    """Vignettes et srcset generes par le traitement en arriere-plan."""
+
+    def test_upload_genere_declinaisons(self, auth_producer_client, producer_with_photo):
+        """Une photo de 1200 px est declinee en 160/480/1024, WebP et JPEG."""
+        img = make_image_file("large.jpg", size=(1200, 800))
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": img},
+            format="multipart",
+        )
+        assert response.status_code == 201
+        assert response.data["processing_status"] == "pending"
+        assert response.data["srcset"] == {}
+        process_pending_photos()
+
+        photo = ProducerPhoto.objects.get(id=response.data["id"])
+        assert photo.processing_status == "ready"
+        assert set(photo.derivatives) == {"webp", "jpeg"}
+        assert sorted(photo.derivatives["webp"], key=int) == ["160", "480", "1024"]
+        storage = photo.image_file.storage
+        with storage.open(photo.derivatives["webp"]["480"]) as f:
+            derived = Image.open(f)
+            assert derived.format == "WEBP"
+            assert derived.size == (480, 320)
+
+        response = auth_producer_client.get(f"/api/producers/{producer_with_photo.id}/")
+        data = next(p for p in response.data["photos"] if p["id"] == photo.id)
+        assert data["srcset"]["webp"].endswith("1024w")
+        assert "_480.webp" in data["thumbnail"]
+
+    def test_petite_image_non_agrandie(self, auth_producer_client, product_with_photo):
+        """Une image plus petite que 160 px donne une seule declinaison a sa taille."""
+        pid = product_with_photo.producer_id
+        response = auth_producer_client.post(
+            f"/api/producers/{pid}/products/{product_with_photo.id}/photos/",
+            {"image_file": make_image_file("small.jpg", size=(100, 100))},
+            format="multipart",
+        )
+        assert response.status_code == 201
+        process_pending_photos()
+        photo = ProductPhoto.objects.get(id=response.data["id"])
+        assert list(photo.derivatives["jpeg"]) == ["100"]
+
+    def test_suppression_efface_declinaisons(
+        self, auth_producer_client, producer_with_photo, django_capture_on_commit_callbacks
+    ):
+        """Les fichiers derives sont supprimes avec la photo."""
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": make_image_file("gone.jpg", size=(500, 500))},
+            format="multipart",
+        )
+        process_pending_photos()
+        photo = ProducerPhoto.objects.get(id=response.data["id"])
+        storage = photo.image_file.storage
+        names = [name for names in photo.derivatives.values() for name in names.values()]
+        assert names and all(storage.exists(name) for name in names)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = auth_producer_client.delete(f"/api/photos/{photo.id}/")
+        assert response.status_code == 204
+        assert not any(storage.exists(name) for name in names)
+
+    def test_commande_backfill(self, api_client, producer_with_photo, product_with_photo):
+        """generate_photo_derivatives traite les photos creees sans declinaisons."""
+        from django.core.management import call_command
+
+        photo = producer_with_photo.photos.first()
+        assert photo.derivatives == {}
+        call_command("generate_photo_derivatives", stdout=io.StringIO())
+        photo.refresh_from_db()
+        assert photo.derivatives["webp"]
+        assert photo.processing_status == "ready"
+        assert product_with_photo.photos.first().derivatives["jpeg"]
+
+        response = api_client.get(f"/api/producers/{producer_with_photo.id}/")
+        assert "_100.webp" in response.data["photos"][0]["thumbnail"]
+
+
+@pytest.mark.django_db
+class TestPhotosPlaceholder:
+    """Placeholder (data URI minuscule) calcule au traitement."""
+
+    def test_placeholder_calcule_et_expose(self, auth_producer_client, producer_with_photo):
+        """Le placeholder est une petite image WebP en data URI, exposee par l'API."""
+        import base64
+
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": make_image_file("lqip.jpg", size=(1200, 800))},
+            format="multipart",
+        )
+        assert response.data["placeholder"] == ""
+        process_pending_photos()
+
+        photo = ProducerPhoto.objects.get(id=response.data["id"])
+        prefix = "data:image/webp;base64,"
+        assert photo.placeholder.startswith(prefix)
+        assert len(photo.placeholder) < 500
+        with Image.open(io.BytesIO(base64.b64decode(photo.placeholder[len(prefix):]))) as small:
+            assert small.size == (16, 11)
+        assert MediaBlob.objects.get(hash=photo.content_hash).placeholder == photo.placeholder
+
+        response = auth_producer_client.get(f"/api/producers/{producer_with_photo.id}/")
+        data = next(p for p in response.data["photos"] if p["id"] == photo.id)
+        assert data["placeholder"] == photo.placeholder
+
+    def test_placeholder_repris_pour_contenu_connu(self, auth_producer_client, producer_with_photo):
+        """Un contenu deja traite reprend le placeholder du blob sans rendu."""
+        url = f"/api/producers/{producer_with_photo.id}/photos/"
+        auth_producer_client.post(url, {"image_file": make_image_file("a.jpg", (300, 200))}, format="multipart")
+        process_pending_photos()
+        second = auth_producer_client.post(url, {"image_file": make_image_file("b.jpg", (300, 200))}, format="multipart")
+        assert second.data["processing_status"] == "ready"
+        assert second.data["placeholder"].startswith("data:image/webp;base64,")
+
+    def test_contenu_sans_placeholder_retraite(self, producer_with_photo):
+        """Un blob decline avant les placeholders repasse une fois par le traitement."""
+        from django.core.management import call_command
+
+        process_pending_photos()
+        photo = producer_with_photo.photos.first()
+        derivatives = photo.derivatives
+        MediaBlob.objects.filter(hash=photo.content_hash).update(placeholder="")
+        ProducerPhoto.objects.filter(pk=photo.pk).update(placeholder="")
+
+        call_command("generate_photo_derivatives", "--model", "producer", stdout=io.StringIO())
+        photo.refresh_from_db()
+        assert photo.placeholder.startswith("data:image/webp;base64,")
+        # Declinaisons partagees conservees
+        assert photo.derivatives == derivatives
+        assert MediaBlob.objects.get(hash=photo.content_hash).placeholder == photo.placeholder
+
+
+@pytest.mark.django_db
+class TestPhotosTraitementArrierePlan:
+    """File de traitement des photos (processing_status)."""
+
+    def test_pool_de_processus(self, producer_with_photo, product_with_photo):
+        """Le rendu se fait dans des processus fils, le resultat en base dans le parent."""
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            stats = process_pending_photos(executor)
+        assert stats == {"ready": 2, "failed": 0}
+        assert producer_with_photo.photos.first().processing_status == "ready"
+        assert product_with_photo.photos.first().derivatives["webp"]
+
+    def test_image_corrompue_en_echec(self, producer_with_photo):
+        """Un fichier illisible passe en failed sans bloquer la file."""
+        ProducerPhoto.objects.filter(producer=producer_with_photo).update(processing_status="ready")
+        bad = ProducerPhoto.objects.create(
+            producer=producer_with_photo,
+            image_file=SimpleUploadedFile("bad.jpg", b"not an image", content_type="image/jpeg"),
+        )
+        assert process_pending_photos() == {"ready": 0, "failed": 1}
+        bad.refresh_from_db()
+        assert bad.processing_status == "failed"
+        assert bad.derivatives == {}
+
+    def test_reservation_abandonnee_reprise(self, producer_with_photo):
+        """Une photo reservee par un worker arrete est reprise apres le delai."""
+        photo = producer_with_photo.photos.first()
+        assert [pk for pk, _, _ in claim_photos(ProducerPhoto, 10)] == [photo.id]
+        assert claim_photos(ProducerPhoto, 10) == []
+        ProducerPhoto.objects.filter(pk=photo.pk).update(
+            processing_started_at=timezone.now() - timedelta(hours=1)
+        )
+        assert [pk for pk, _, _ in claim_photos(ProducerPhoto, 10)] == [photo.id]
+
+
+@pytest.mark.django_db
+class TestPhotosDeduplication:
+    """Stockage adresse par contenu (MediaBlob)."""
+
+    def test_contenu_identique_stocke_une_fois(self, auth_producer_client, producer_with_photo):
+        """Deux uploads identiques partagent un fichier et ses declinaisons."""
+        url = f"/api/producers/{producer_with_photo.id}/photos/"
+        first = auth_producer_client.post(url, {"image_file": make_image_file("a.jpg", (600, 400))}, format="multipart")
+        process_pending_photos()
+        second = auth_producer_client.post(url, {"image_file": make_image_file("b.jpg", (600, 400))}, format="multipart")
+        assert second.status_code == 201
+        # Contenu connu : pret sans repasser par la file
+        assert second.data["processing_status"] == "ready"
+        assert second.data["srcset"]["webp"]
+
+        a = ProducerPhoto.objects.get(id=first.data["id"])
+        b = ProducerPhoto.objects.get(id=second.data["id"])
+        assert a.image_file.name == b.image_file.name
+        assert a.derivatives == b.derivatives
+        assert MediaBlob.objects.get(hash=a.content_hash).ref_count == 2
+
+    def test_meme_contenu_enregistre_deux_fois(self, producer_with_photo, monkeypatch):
+        """Reenregistrer le meme contenu ou echouer a l'ecriture ne change pas le compteur."""
+        photo = producer_with_photo.photos.get()
+        blob = MediaBlob.objects.get(hash=photo.content_hash)
+        for _ in range(2):
+            photo.image_file = make_image_file("producer_1.jpg")
+            photo.save()
+            assert photo.content_hash == blob.hash
+            blob.refresh_from_db()
+            assert blob.ref_count == 1
+
+        def failing_update(*args, **kwargs):
+            raise DatabaseError("ecriture impossible")
+
+        monkeypatch.setattr(ProducerPhoto, "_do_update", failing_update)
+        photo.image_file = make_image_file("producer_1.jpg")
+        with pytest.raises(DatabaseError):
+            photo.save()
+        blob.refresh_from_db()
+        assert blob.ref_count == 1
+
+    def test_fichier_supprime_avec_derniere_reference(
+        self, auth_producer_client, producer_with_photo, product_with_photo, django_capture_on_commit_callbacks
+    ):
+        """Le blob survit a la premiere suppression, pas a la derniere."""
+        producer_photo = producer_with_photo.photos.first()
+        product_photo = product_with_photo.photos.first()
+        assert producer_photo.content_hash == product_photo.content_hash
+        process_pending_photos()
+        producer_photo.refresh_from_db()
+        storage = producer_photo.image_file.storage
+        names = [producer_photo.image_file.name] + list(producer_photo.derivatives["webp"].values())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_producer_client.delete(f"/api/photos/{producer_photo.id}/")
+        assert all(storage.exists(name) for name in names)
+        assert MediaBlob.objects.get(hash=product_photo.content_hash).ref_count == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_producer_client.delete(f"/api/products/photos/{product_photo.id}/")
+        assert not any(storage.exists(name) for name in names)
+        assert not MediaBlob.objects.exists()
+
+    def test_commande_dedupe_photos(self, producer_with_photo, product_with_photo):
+        """Les photos anterieures identiques sont regroupees sur un seul fichier."""
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+
+        # Photos anterieures : un fichier par photo, sans content_hash
+        legacy = []
+        for photo in (producer_with_photo.photos.first(), product_with_photo.photos.first()):
+            with default_storage.open(photo.image_file.name, "rb") as f:
+                name = default_storage.save(f"legacy/{photo.pk}.jpg", ContentFile(f.read()))
+            type(photo).objects.filter(pk=photo.pk).update(image_file=name, content_hash="")
+            legacy.append(name)
+        MediaBlob.objects.all().delete()
+
+        call_command("dedupe_photos", stdout=io.StringIO())
+
+        a = producer_with_photo.photos.first()
+        b = product_with_photo.photos.first()
+        assert a.content_hash and a.content_hash == b.content_hash
+        assert a.image_file.name == b.image_file.name
+        assert MediaBlob.objects.get(hash=a.content_hash).ref_count == 2
+        assert not any(default_storage.exists(name) for name in legacy)
+
+
+@pytest.mark.django_db
+class TestPhotosValidationEnTete:
+    """Validation des uploads sur l'en-tete, pendant la reception."""
+
+    def test_faux_fichier_refuse(self, auth_producer_client, producer_with_photo):
+        """Un fichier .jpg qui n'est pas une image est refuse sans etre stocke."""
+        fake = SimpleUploadedFile("fake.jpg", b"<?php echo 1; ?>" * 100, content_type="image/jpeg")
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/", {"image_file": fake}, format="multipart"
+        )
+        assert response.status_code == 400
+        assert "image_file" in response.data
+        assert producer_with_photo.photos.count() == 1
+
+    def test_format_non_autorise_refuse(self, auth_producer_client, product_with_photo):
+        """Un GIF renomme en .png est refuse (octets magiques)."""
+        buf = io.BytesIO()
+        Image.new("RGB", (50, 50)).save(buf, format="GIF")
+        gif = SimpleUploadedFile("photo.png", buf.getvalue(), content_type="image/png")
+        response = auth_producer_client.post(
+            f"/api/products/{product_with_photo.id}/photos/", {"image_file": gif}, format="multipart"
+        )
+        assert response.status_code == 400
+        assert "image_file" in response.data
+
+    @pytest.mark.parametrize("image_format,options", [
+        ("JPEG", {}),
+        ("JPEG", {"progressive": True, "exif": b"Exif\x00\x00" + b"\x00" * 2048}),
+        ("PNG", {}),
+        ("WEBP", {}),
+        ("WEBP", {"lossless": True}),
+        ("WEBP", {"exif": b"Exif\x00\x00"}),
+    ])
+    def test_dimensions_lues_par_format(self, image_format, options):
+        """Format et dimensions lus dans l'en-tete de chaque format, en plusieurs morceaux."""
+        buf = io.BytesIO()
+        Image.new("RGB", (321, 123)).save(buf, format=image_format, **options)
+        data = buf.getvalue()
+        assert sniff_image_header(data[:12]) is None
+        assert sniff_image_header(data, complete=True) == (image_format, 321, 123)
+
+    def test_dimensions_excessives_refusees(self, auth_producer_client, producer_with_photo, settings):
+        """Les dimensions sont lues dans l'en-tete, sans decoder l'image."""
+        settings.MAX_IMAGE_PIXELS = 100 * 100
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": make_image_file("big.jpg", (200, 200))},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert "image_file" in response.data
+
+    def test_taille_maximale_pendant_reception(self, auth_producer_client, producer_with_photo, settings):
+        """Un fichier trop gros est arrete des que la limite est franchie."""
+        settings.MAX_UPLOAD_SIZE = 1024
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": make_image_file("big.jpg", (300, 300))},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert "size" in str(response.data["image_file"][0])
+        assert producer_with_photo.photos.count() == 1
+
+    def test_requete_trop_grosse_refusee(self, auth_producer_client, producer_with_photo, settings):
+        """Le corps de requete est refuse avant lecture au-dela de MAX_UPLOAD_REQUEST_SIZE."""
+        settings.MAX_UPLOAD_REQUEST_SIZE = 1024
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/",
+            {"image_file": make_image_file("photo.jpg", (300, 300))},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert producer_with_photo.photos.count() == 1
+
+    def test_gros_upload_sur_disque(self, auth_producer_client, producer_with_photo, settings):
+        """Au-dela de FILE_UPLOAD_MAX_MEMORY_SIZE, le fichier passe par le disque ; le hash est celui du contenu."""
+        import hashlib
+
+        settings.FILE_UPLOAD_MAX_MEMORY_SIZE = 1024
+        img = make_image_file("large.jpg", (400, 300))
+        content = img.read()
+        img.seek(0)
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/", {"image_file": img}, format="multipart"
+        )
+        assert response.status_code == 201
+        photo = ProducerPhoto.objects.get(id=response.data["id"])
+        assert photo.content_hash == hashlib.sha256(content).hexdigest()
+        with photo.image_file.open("rb") as f:
+            assert f.read() == content
+
+    def test_handlers_django_hors_upload_photos(self, auth_producer_client, producer_with_photo, settings):
+        """Les autres vues gardent les handlers Django : pas de limite d'upload d'images."""
+        settings.MAX_UPLOAD_REQUEST_SIZE = 1024
+        response = auth_producer_client.patch(
+            f"/api/producers/{producer_with_photo.id}/", {"description": "x" * 2000}, format="multipart"
+        )
+        assert response.status_code == 200
+        producer_with_photo.refresh_from_db()
+        assert producer_with_photo.description == "x" * 2000
+
+
+@pytest.mark.django_db
+class TestPhotosUploadGroupe:
+    """Upload de plusieurs photos en une requete (photos/batch/)."""
+
+    def test_plusieurs_photos_producteur(self, auth_producer_client, producer_with_photo):
+        """Les fichiers valides sont crees, les autres signales un par un."""
+        fake = SimpleUploadedFile("fake.jpg", b"not an image" * 50, content_type="image/jpeg")
+        files = [make_image_file("a.jpg", (300, 200)), fake, make_image_file("b.jpg", (200, 300))]
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/batch/", {"image_files": files}, format="multipart"
+        )
+        assert response.status_code == 207
+        results = {r["file_name"]: r for r in response.data["results"]}
+        assert results["a.jpg"]["created"] and results["b.jpg"]["created"]
+        assert not results["fake.jpg"]["created"] and results["fake.jpg"]["errors"]
+        assert results["a.jpg"]["photo"]["processing_status"] == "pending"
+        assert producer_with_photo.photos.count() == 3
+
+        created = ProducerPhoto.objects.get(id=results["a.jpg"]["photo"]["id"])
+        assert created.content_hash
+        assert MediaBlob.objects.get(hash=created.content_hash).ref_count == 1
+        assert created.image_file.storage.exists(created.image_file.name)
+        process_pending_photos()
+        created.refresh_from_db()
+        assert created.processing_status == "ready"
+
+    def test_limite_produit_atomique(self, auth_producer_client, product_with_photo):
+        """Un produit a deja 1 photo : 4 places sur 6 fichiers."""
+        files = [make_image_file(f"p{i}.jpg", (100 + i, 100)) for i in range(6)]
+        response = auth_producer_client.post(
+            f"/api/products/{product_with_photo.id}/photos/batch/", {"image_files": files}, format="multipart"
+        )
+        assert response.status_code == 207
+        assert [r["created"] for r in response.data["results"]] == [True] * 4 + [False] * 2
+        assert "maximum" in response.data["results"][5]["errors"][0]
+        assert product_with_photo.photos.count() == 5
+
+        response = auth_producer_client.post(
+            f"/api/products/{product_with_photo.id}/photos/batch/",
+            {"image_files": [make_image_file("extra.jpg")]},
+            format="multipart",
+        )
+        assert response.status_code == 400
+        assert product_with_photo.photos.count() == 5
+
+    def test_contenu_identique_dans_un_envoi(self, auth_producer_client, producer_with_photo):
+        """Deux fichiers identiques dans un envoi : un seul blob a deux references, pret si deja traite."""
+        process_pending_photos()
+        # Meme contenu que la photo existante (deja traitee) et deux fois dans l'envoi
+        files = [make_image_file("x.jpg"), make_image_file("y.jpg")]
+        response = auth_producer_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/batch/", {"image_files": files}, format="multipart"
+        )
+        assert response.status_code == 201
+        photos = [r["photo"] for r in response.data["results"]]
+        assert all(p["processing_status"] == "ready" for p in photos)
+        digest = producer_with_photo.photos.first().content_hash
+        # Fixtures producteur et photo initiale : meme image 100x100
+        assert MediaBlob.objects.get(hash=digest).ref_count == 3
+
+    def test_envoi_vide_ou_trop_gros(self, auth_producer_client, producer_with_photo, settings):
+        url = f"/api/producers/{producer_with_photo.id}/photos/batch/"
+        assert auth_producer_client.post(url, {}, format="multipart").status_code == 400
+        settings.PHOTO_BATCH_MAX_FILES = 2
+        files = [make_image_file(f"{i}.jpg") for i in range(3)]
+        response = auth_producer_client.post(url, {"image_files": files}, format="multipart")
+        assert response.status_code == 400
+        assert producer_with_photo.photos.count() == 1
+
+    def test_autre_utilisateur_refuse(self, other_user_client, producer_with_photo):
+        response = other_user_client.post(
+            f"/api/producers/{producer_with_photo.id}/photos/batch/",
+            {"image_files": [make_image_file()]},
+            format="multipart",
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestGcMedia:
+    """Commande gc_media : fichiers non references."""
+
+    def _orphan(self, root, name, age_hours=48):
+        import os
+        import time
+
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 1000)
+        old = time.time() - age_hours * 3600
+        os.utime(path, (old, old))
+        return path
+
+    def test_orphelins_supprimes_references_conserves(self, media_root, producer_with_photo, product_with_photo):
+        from django.core.management import call_command
+
+        process_pending_photos()
+        photo = producer_with_photo.photos.first()
+        kept = [photo.image_file.name] + [n for names in photo.derivatives.values() for n in names.values()]
+        orphan = self._orphan(media_root, "producers/2024/01/01/supprimee.jpg")
+        recent = self._orphan(media_root, "producers/2024/01/01/en_cours.jpg", age_hours=0)
+
+        out = io.StringIO()
+        call_command("gc_media", "--dry-run", stdout=out)
+        assert orphan.exists()
+        assert "1 orphelin(s)" in out.getvalue()
+
+        call_command("gc_media", "--batch-size", "1", "--chunk-size", "1", stdout=io.StringIO())
+        assert not orphan.exists()
+        assert recent.exists()
+        assert all((media_root / name).exists() for name in kept)
+
+    def test_quarantaine(self, media_root, tmp_path, producer_with_photo):
+        from django.core.management import call_command
+
+        orphan = self._orphan(media_root, "products/2024/02/02/ancienne.jpg")
+        quarantine = tmp_path / "quarantine"
+        call_command("gc_media", "--quarantine", str(quarantine), stdout=io.StringIO())
+        assert not orphan.exists()
+        assert (quarantine / "products/2024/02/02/ancienne.jpg").exists()
+        assert producer_with_photo.photos.first().image_file.storage.exists(
+            producer_with_photo.photos.first().image_file.name
+        )
+
+
+@pytest.mark.django_db
+class TestServiceMedias:
+    """Service des medias (config/media.py) : cache immutable, ETag, X-Accel-Redirect."""
+
+    def test_fichier_servi_avec_cache_immutable(self, media_root, client, producer_with_photo):
+        name = producer_with_photo.photos.first().image_file.name
+        response = client.get(f"/media/{name}")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/jpeg"
+        assert "immutable" in response["Cache-Control"] and "max-age=31536000" in response["Cache-Control"]
+        assert b"".join(response.streaming_content)[:2] == b"\xff\xd8"
+
+        etag = response["ETag"]
+        response = client.get(f"/media/{name}", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_envoi_delegue_a_nginx(self, media_root, client, settings, producer_with_photo):
+        settings.MEDIA_ACCEL_REDIRECT = "/protected-media/"
+        name = producer_with_photo.photos.first().image_file.name
+        response = client.get(f"/media/{name}")
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == f"/protected-media/{name}"
+        assert response["Content-Type"] == "image/jpeg"
+        assert response.content == b""
+        assert "ETag" in response
+
+    def test_chemins_refuses(self, media_root, client):
+        (media_root / "photos").mkdir(parents=True)
+        (media_root / "photos" / ".cache").write_bytes(b"x")
+        (media_root / "private.txt").write_bytes(b"x")
+        for path in ("private.txt", "photos/.cache", "photos/../private.txt", "photos/absent.jpg"):
+            assert client.get(f"/media/{path}").status_code == 404
+        assert client.post("/media/private.txt").status_code == 405
+
+
+@pytest.fixture
+def image_server(settings):
+    """Serveur HTTP local (keep-alive) substitue a Unsplash pour les commandes de peuplement."""
+    import threading
+    import zlib
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    served = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            served.append((self.path, self.client_address))
+            if self.path.startswith("/missing"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            # Une image differente par chemin
+            color = zlib.crc32(self.path.encode()).to_bytes(4, "big")[:3]
+            buf = io.BytesIO()
+            Image.new("RGB", (40, 30), color=tuple(color)).save(buf, format="JPEG")
+            body = buf.getvalue()
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.SEED_IMAGE_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    yield served
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+class TestCommandesPeuplement:
+    """Commandes de peuplement : telechargements paralleles, session partagee, bulk_create."""
+
+    def test_add_complete_producer(self, media_root, image_server):
+        from apps.producers.management.commands.add_complete_producer import COMPLETE_PRODUCER
+
+        data = COMPLETE_PRODUCER
+        product_urls = [url for product in data["products"] for url in product.get("photos", [])]
+        urls = set(data["producer_photos"]) | set(product_urls)
+
+        call_command("add_complete_producer", "--workers", "4", stdout=io.StringIO())
+        producer = ProducerProfile.objects.get(user__email=data["email"])
+        assert producer.photos.count() == len(data["producer_photos"])
+        assert ProductPhoto.objects.filter(product__producer=producer).count() == len(product_urls)
+        assert all(photo.content_hash for photo in producer.photos.all())
+        # Chaque URL telechargee une fois, sur au plus 4 connexions reutilisees
+        assert len(image_server) == len(urls)
+        assert len({address for _, address in image_server}) <= 4
+
+        # Relance : photos deja presentes, rien n'est retelecharge
+        call_command("add_complete_producer", "--update", stdout=io.StringIO())
+        assert len(image_server) == len(urls)
+        assert producer.photos.count() == len(data["producer_photos"])
+
+    def test_add_10_complete_producers(self, image_server):
+        """URLs prechargees avant les transactions ; relance sans nouveau telechargement."""
+        from apps.producers.management.commands.add_10_complete_producers import PRODUCERS_DATA
+
+        call_command("add_10_complete_producers", "--workers", "4", stdout=io.StringIO())
+        assert ProducerProfile.objects.count() == len(PRODUCERS_DATA)
+        assert ProductPhoto.objects.exists()
+        downloaded = len(image_server)
+        assert downloaded == len({path for path, _ in image_server})
+
+        call_command("add_10_complete_producers", stdout=io.StringIO())
+        assert len(image_server) == downloaded
+
+    def test_erreurs_et_contenus_deja_presents(self, media_root, image_server, producer_with_photo):
+        from apps.producers.seed_images import ImageDownloader, seed_photos
+
+        images = [("a.jpg", "https://images.example/a.jpg"), ("absente.jpg", "https://images.example/missing.jpg")]
+        with ImageDownloader(workers=2) as downloader:
+            photos, errors = seed_photos(downloader, ProducerPhoto, "producer", producer_with_photo, images)
+            assert len(photos) == 1 and len(errors) == 1
+            assert "missing.jpg" in errors[0]
+            assert photos[0].image_file.name.startswith("photos/")
+            assert MediaBlob.objects.get(hash=photos[0].content_hash).ref_count == 1
+
+            # Meme contenu pour le meme producteur : pas de doublon
+            photos, _ = seed_photos(downloader, ProducerPhoto, "producer", producer_with_photo, images[:1])
+            assert photos == []
+        assert producer_with_photo.photos.count() == 2
+        assert sorted(path for path, _ in image_server) == ["/a.jpg", "/missing.jpg"]
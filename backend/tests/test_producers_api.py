@@ -1,23 +1,26 @@
 """Tests unitaires API Producers."""
-import pytest
+import csv
+import gzip
+import io
+import json
+import math
+from datetime import time
 from decimal import Decimal
 
-from apps.auth.models import User
-from apps.producers.models import ProducerProfile
-
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-@pytest.fixture
-def producer_profile(producer_user, db):
-    """Profil producteur de test."""
-    return ProducerProfile.objects.create(
-        user=producer_user,
-        name="Ferme Test",
-        description="Une ferme de test",
-        category="maraîchage",
-        address="10 rue Test, 75001 Paris",
-        latitude=Decimal("48.8566"),
-        longitude=Decimal("2.3522"),
-    )
+from apps.auth.models import User
+from apps.producers.importer import save_checkpoint
+from apps.producers.models import OpeningHours, ProducerProfile, SaleMode
+from apps.producers.utils import TOP_CITIES
+from apps.producers.validators import batch_errors, validate_batch
+from apps.products.models import Product
 
 
 @pytest.fixture
@@ -137,3 +140,367 @@ class TestProducerCreate:
         }
         response = api_client.post("/api/producers/", data, format="json")
         assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestProducerMe:
+    """Tests GET /api/producers/me/."""
+
+    def test_me_returns_own_profile(self, auth_producer_client, producer_profile):
+        """Profil complet du producteur connecté."""
+        response = auth_producer_client.get("/api/producers/me/")
+        assert response.status_code == 200
+        assert response.data["id"] == producer_profile.id
+        assert "products" in response.data
+        assert "sale_modes" in response.data
+
+    def test_me_without_profile(self, api_client, user_no_producer):
+        """404 tant que le profil n'est pas créé, puis profil après création."""
+        login = api_client.post(
+            "/api/auth/login/",
+            {"email": user_no_producer.email, "password": "Pass123!"},
+            format="json",
+        )
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        assert api_client.get("/api/producers/me/").status_code == 404
+        ProducerProfile.objects.create(
+            user=user_no_producer,
+            name="Ferme Tardive",
+            category="élevage",
+            address="20 rue Nouvelle, 69001 Lyon",
+            latitude=Decimal("45.7640"),
+            longitude=Decimal("4.8357"),
+        )
+        assert api_client.get("/api/producers/me/").status_code == 200
+
+    def test_me_unauthenticated(self, api_client):
+        """Accès refusé sans token."""
+        assert api_client.get("/api/producers/me/").status_code == 401
+
+
+def _import_record(index, **extra):
+    record = {
+        "email": f"import{index}@example.com",
+        "name": f"Ferme Import {index}",
+        "category": "maraîchage",
+        "address": f"{index} route des Champs",
+        "latitude": 48.1 + index / 1000,
+        "longitude": -1.6,
+        "products": [
+            {"name": "Tomates", "category": "legumes", "availability_type": "custom",
+             "availability_start_month": 6, "availability_end_month": 10},
+        ],
+        "sale_modes": [
+            {"mode_type": "on_site", "title": "Vente à la ferme", "instructions": "Sonner au portail",
+             "opening_hours": [{"day": 5, "opening": "09:00", "closing": "12:00"}, {"day": 0, "is_closed": True}]},
+        ],
+    }
+    record.update(extra)
+    return record
+
+
+@pytest.mark.django_db
+class TestImportProducteurs:
+    """Commande import_producers : lecture en flux, upsert par lots, reprise."""
+
+    def _run(self, path, *args):
+        out = io.StringIO()
+        call_command("import_producers", str(path), *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_geojson_puis_mise_a_jour(self, tmp_path):
+        """Import GeoJSON par lots, puis réimport modifié : mises à jour sans doublons."""
+
+        def feature(record):
+            lon, lat = record.pop("longitude"), record.pop("latitude")
+            return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": record}
+
+        path = tmp_path / "producteurs.geojson"
+        features = [feature(_import_record(i)) for i in range(5)]
+        path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+        out = self._run(path, "--chunk-size", "2")
+        assert "5 producteur(s) créé(s)" in out and "lignes/s" in out
+
+        producer = ProducerProfile.objects.get(user__email="import3@example.com")
+        assert producer.latitude == Decimal("48.1030000")
+        assert producer.user.is_producer and not producer.user.has_usable_password()
+        assert Product.objects.filter(producer=producer, name="Tomates", availability_start_month=6).exists()
+        assert OpeningHours.objects.filter(sale_mode__producer=producer).count() == 2
+
+        # Réimport modifié : mises à jour, sans doublons
+        record = _import_record(3, name="Ferme Renommée")
+        record["products"][0]["availability_end_month"] = 11
+        record["sale_modes"][0]["opening_hours"][0]["closing"] = "13:00"
+        path.write_text(json.dumps({"type": "FeatureCollection", "features": [feature(record)]}), encoding="utf-8")
+        out = self._run(path)
+        assert "0 producteur(s) créé(s), 1 mis à jour" in out
+        producer.refresh_from_db()
+        assert producer.name == "Ferme Renommée"
+        assert Product.objects.get(producer=producer).availability_end_month == 11
+        assert SaleMode.objects.filter(producer=producer).count() == 1
+        hours = OpeningHours.objects.get(sale_mode__producer=producer, day_of_week=5)
+        assert hours.closing_time.hour == 13
+        assert ProducerProfile.objects.filter(user__email__startswith="import").count() == 5
+
+    def test_lignes_invalides_ignorees(self, tmp_path):
+        """Les lignes CSV invalides sont rapportées et ignorées, les autres importées."""
+        path = tmp_path / "producteurs.csv"
+        rows = [
+            _import_record(1),
+            _import_record(2, latitude=123),
+            _import_record(3, email="pas-un-email"),
+            _import_record(4, products=[{"name": "Miel", "category": "inconnue"}]),
+        ]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "products": json.dumps(row["products"]), "sale_modes": json.dumps(row["sale_modes"])})
+        out = self._run(path)
+        assert "3 enregistrement(s) invalide(s)" in out
+        assert "Enregistrement 2" in out and "catégorie inconnue" in out
+        assert list(ProducerProfile.objects.values_list("user__email", flat=True)) == ["import1@example.com"]
+
+    def test_comptes_existants_non_convertis(self, tmp_path, user, producer_user):
+        """Un compte existant non producteur, de l'équipe ou en suppression n'est pas rattaché."""
+        staff = User.objects.create_user(
+            email="staff@example.com", username="staff", password="Pass123!", is_producer=True, is_staff=True
+        )
+        leaving = User.objects.create_user(
+            email="leaving@example.com", username="leaving", password="Pass123!", is_producer=True,
+            deletion_requested_at=timezone.now(),
+        )
+        records = [
+            _import_record(1, email=user.email, username=user.username),
+            _import_record(2, email=staff.email, username=staff.username),
+            _import_record(3, email=leaving.email, username=leaving.username),
+            _import_record(4, email=producer_user.email, username=producer_user.username),
+            _import_record(5),
+            _import_record(5, name="Ferme Import 5 bis"),
+        ]
+        path = tmp_path / "producteurs.ndjson"
+        path.write_text("\n".join(json.dumps(record) for record in records), encoding="utf-8")
+        out = self._run(path)
+        assert "3 enregistrement(s) invalide(s)" in out and "non producteur" in out
+        assert "1 enregistrement(s) remplacé(s)" in out
+        assert "2 producteur(s) créé(s), 0 mis à jour" in out
+        user.refresh_from_db()
+        assert not user.is_producer
+        assert set(ProducerProfile.objects.values_list("user__email", flat=True)) == {
+            producer_user.email, "import5@example.com"
+        }
+        assert ProducerProfile.objects.get(user__email="import5@example.com").name == "Ferme Import 5 bis"
+
+    def test_reprise_apres_point_de_reprise(self, tmp_path):
+        """Reprise après le point de reprise, refusée si le fichier a changé."""
+        path = tmp_path / "producteurs.ndjson"
+        path.write_text("\n".join(json.dumps(_import_record(i)) for i in range(6)) + "\n{illisible\n", encoding="utf-8")
+        checkpoint = tmp_path / "reprise.json"
+        # Import interrompu après 4 enregistrements
+        save_checkpoint(str(checkpoint), str(path), 4, {"imported": 4, "created": 4, "products": 4})
+
+        out = self._run(path, "--checkpoint", str(checkpoint), "--resume")
+        assert "4 enregistrement(s) déjà importé(s)" in out
+        assert "1 enregistrement(s) invalide(s)" in out
+        # Statistiques cumulées avec celles des lots déjà importés
+        assert "6 producteur(s) créé(s), 0 mis à jour, 6 produit(s)" in out
+        emails = set(ProducerProfile.objects.values_list("user__email", flat=True))
+        assert emails == {"import4@example.com", "import5@example.com"}
+        assert not checkpoint.exists()
+
+        # Fichier modifié depuis le point de reprise : refusé
+        save_checkpoint(str(checkpoint), str(path), 4, {})
+        path.write_text(json.dumps(_import_record(9)) + "\n", encoding="utf-8")
+        with pytest.raises(CommandError):
+            self._run(path, "--checkpoint", str(checkpoint), "--resume")
+
+
+@pytest.mark.django_db
+class TestDonneesSynthetiques:
+    """Commande generate_synthetic_data : jeu de donnees reproductible, valide, autour des villes."""
+
+    def _snapshot(self):
+        return list(
+            ProducerProfile.objects.order_by("user__username").values_list(
+                "user__username", "name", "category", "latitude", "longitude"
+            )
+        )
+
+    def test_graine_reproductible_et_suppression(self):
+        """Même graine, mêmes données ; --clear supprime les comptes synthétiques."""
+        call_command("generate_synthetic_data", "--producers", "120", "--seed", "7", "--batch-size", "50", stdout=io.StringIO())
+        first = self._snapshot()
+        assert len(first) == 120
+
+        # Même graine : refusée tant que les données existent, identique après suppression
+        with pytest.raises(CommandError):
+            call_command("generate_synthetic_data", "--producers", "10", "--seed", "7", stdout=io.StringIO())
+        call_command("generate_synthetic_data", "--clear", "--producers", "120", "--seed", "7", stdout=io.StringIO())
+        assert self._snapshot() == first
+
+        call_command("generate_synthetic_data", "--clear", "--producers", "0", stdout=io.StringIO())
+        assert not ProducerProfile.objects.exists()
+        assert not User.objects.filter(email__endswith="@synthetic.invalid").exists()
+
+    def test_donnees_valides_autour_des_villes(self, api_client):
+        """Données valides (full_clean) et situées autour des villes choisies."""
+
+        call_command("generate_synthetic_data", "--producers", "200", "--cities", "3", "--spread-km", "10", stdout=io.StringIO())
+        assert Product.objects.count() >= 200
+        assert SaleMode.objects.filter(mode_type="on_site").count() == 200
+
+        cities = TOP_CITIES[:3]
+        for producer in ProducerProfile.objects.prefetch_related("products", "sale_modes__opening_hours"):
+            producer.full_clean()
+            distance = min(
+                math.hypot(float(producer.latitude) - lat, (float(producer.longitude) - lon) * math.cos(math.radians(lat)))
+                for _, lat, lon, _ in cities
+            ) * 111.32
+            assert distance < 60
+            for product in producer.products.all():
+                product.full_clean()
+        for hours in OpeningHours.objects.all()[:500]:
+            hours.full_clean()
+
+        response = api_client.get("/api/producers/nearby/", {"latitude": 48.8566, "longitude": 2.3522, "radius_km": 30})
+        assert response.status_code == 200
+        assert response.data["count"] > 0
+
+
+@pytest.mark.django_db
+class TestExportProducteurs:
+    """GET /api/producers/export/ : GeoJSON ou NDJSON en flux, gzip au fil de l'eau."""
+
+    @pytest.fixture
+    def producers(self, producer_profile):
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f"export{index}@example.com", username=f"export{index}", password="Pass123!", is_producer=True
+            )
+            ProducerProfile.objects.create(
+                user=user,
+                name=f"Élevage {index}",
+                category="élevage",
+                address="1 route de Lyon",
+                latitude=Decimal("45.7640000"),
+                longitude=Decimal("4.8357000"),
+            )
+        return producer_profile
+
+    def _body(self, response):
+        assert response.streaming
+        body = b"".join(response.streaming_content)
+        if response.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body.decode("utf-8")
+
+    def test_geojson(self, api_client, producers):
+        """Export GeoJSON : FeatureCollection en longitude, latitude."""
+        response = api_client.get("/api/producers/export/", {"gzip": "0"})
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("application/geo+json")
+        assert "attachment" in response["Content-Disposition"]
+        data = json.loads(self._body(response))
+        assert data["type"] == "FeatureCollection"
+        assert len(data["features"]) == 4
+        feature = next(f for f in data["features"] if f["id"] == producers.id)
+        assert feature["geometry"] == {"type": "Point", "coordinates": [2.3522, 48.8566]}
+        assert feature["properties"]["name"] == "Ferme Test"
+        assert feature["properties"]["category"] == "maraîchage"
+
+    def test_ndjson_gzip_et_filtre(self, api_client, producers):
+        """Export NDJSON compressé et filtré ; table vide et format inconnu."""
+        response = api_client.get(
+            "/api/producers/export/", {"output": "ndjson", "categories": "élevage"}, HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+        assert response.status_code == 200
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in self._body(response).splitlines()]
+        assert [row["name"] for row in rows] == ["Élevage 0", "Élevage 1", "Élevage 2"]
+        assert rows[0]["latitude"] == 45.764
+
+        # Table vide : document GeoJSON valide ; format inconnu refusé
+        response = api_client.get("/api/producers/export/", {"categories": "apiculture"}, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        assert "Content-Encoding" not in response
+        assert json.loads(self._body(response)) == {"type": "FeatureCollection", "features": []}
+        assert api_client.get("/api/producers/export/", {"output": "csv"}).status_code == 400
+
+
+@pytest.mark.django_db
+class TestEcritureValidee:
+    """save(validated=True), validate_batch et serializers : validation une seule fois, invariants gardés."""
+
+    def test_save_valide_sans_requete_de_validation(self, producer_profile):
+        """save(validated=True) saute les requêtes de validation mais garde clean()."""
+        producer_profile.name = "Ferme Renommée"
+        with CaptureQueriesContext(connection) as full:
+            producer_profile.save()
+        with CaptureQueriesContext(connection) as fast:
+            producer_profile.save(validated=True)
+        assert len(fast) < len(full)
+        assert not any(query["sql"].lstrip().upper().startswith("SELECT") for query in fast)
+
+        # clean() reste exécuté
+        producer_profile.latitude = Decimal("95")
+        with pytest.raises(ValidationError):
+            producer_profile.save(validated=True)
+
+    def test_validate_batch(self, producer_profile):
+        """validate_batch signale doublons, conflits en base et valeurs invalides par index."""
+
+        sale_mode = SaleMode.objects.create(producer=producer_profile, mode_type="on_site", title="Vente à la ferme", instructions="Sur place")
+        monday = OpeningHours.objects.create(
+            sale_mode=sale_mode, day_of_week=0, opening_time=time(9), closing_time=time(12)
+        )
+        hours = [
+            OpeningHours(sale_mode=sale_mode, day_of_week=0, is_closed=True),  # lundi existe déjà
+            OpeningHours(sale_mode=sale_mode, day_of_week=1, is_closed=True),
+            OpeningHours(sale_mode=sale_mode, day_of_week=1, is_closed=True),  # doublon du lot
+            OpeningHours(sale_mode=sale_mode, day_of_week=2, opening_time=time(18), closing_time=time(8)),
+            OpeningHours(sale_mode=sale_mode, day_of_week=9, is_closed=True),  # jour hors choix
+            OpeningHours(sale_mode=sale_mode, day_of_week=3, is_closed=True),
+        ]
+        errors = batch_errors(hours)
+        assert sorted(errors) == [0, 2, 3, 4]
+        assert sorted(batch_errors(hours, unique=False)) == [3, 4]
+        # Sa propre ligne n'est pas un conflit (bulk_update)
+        monday.is_closed = True
+        assert batch_errors([monday]) == {}
+
+        with pytest.raises(ValidationError) as excinfo:
+            validate_batch(hours)
+        assert set(excinfo.value.message_dict) == {"0", "2", "3", "4"}
+        assert validate_batch(hours[5:]) == hours[5:]
+
+    def test_serializers_modes_de_vente(self, auth_producer_client, producer_profile):
+        """Création et mise à jour des modes de vente via les serializers validés."""
+        url = f"/api/producers/{producer_profile.id}/sale-modes/"
+        payload = {
+            "mode_type": "on_site",
+            "title": "Vente à la ferme",
+            "instructions": "Sonner au portail",
+            "location_latitude": "45.1234567891",
+            "location_longitude": "4.1234567891",
+            "opening_hours": [
+                {"day_of_week": 0, "is_closed": False, "opening_time": "09:00", "closing_time": "12:00"},
+                {"day_of_week": 6, "is_closed": True},
+            ],
+        }
+        response = auth_producer_client.post(url, payload, format="json")
+        assert response.status_code == 201
+        sale_mode = SaleMode.objects.get(pk=response.data["id"])
+        assert sale_mode.location_longitude == Decimal("4.1234568")
+        assert sorted(sale_mode.opening_hours.values_list("day_of_week", flat=True)) == [0, 6]
+
+        response = auth_producer_client.patch(
+            f"{url}{sale_mode.id}/", {"opening_hours": [{"day_of_week": 2, "is_closed": True}]}, format="json"
+        )
+        assert response.status_code == 200
+        assert list(sale_mode.opening_hours.values_list("day_of_week", flat=True)) == [2]
+
+        # Jours en double, coordonnées hors bornes : refusés par le serializer
+        duplicated = dict(payload, opening_hours=[{"day_of_week": 1, "is_closed": True}] * 2)
+        assert auth_producer_client.post(url, duplicated, format="json").status_code == 400
+        assert auth_producer_client.post(url, dict(payload, location_latitude="5000"), format="json").status_code == 400
+        assert SaleMode.objects.filter(producer=producer_profile).count() == 1
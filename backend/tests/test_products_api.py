@@ -1,26 +1,10 @@
 """Tests unitaires API Products."""
 import pytest
-from decimal import Decimal
 
 from apps.auth.models import User
-from apps.producers.models import ProducerProfile
 from apps.products.models import ProductCategory, Product
 
 
-@pytest.fixture
-def producer_profile(producer_user, db):
-    """Profil producteur de test."""
-    return ProducerProfile.objects.create(
-        user=producer_user,
-        name="Ferme Test",
-        description="Une ferme de test",
-        category="maraîchage",
-        address="10 rue Test, 75001 Paris",
-        latitude=Decimal("48.8566"),
-        longitude=Decimal("2.3522"),
-    )
-
-
 @pytest.fixture
 def product_category(db):
     """Catégorie de produit."""
@@ -0,0 +1,165 @@
+"""Tests du throttling par fenêtre glissante."""
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.producers.views import ProducerProfileViewSet
+from config.throttling import (
+    LocalPreThrottle,
+    RedisAnonRateThrottle,
+    RedisHeavyAnonRateThrottle,
+    get_request_cost,
+    sliding_window,
+)
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'ratelimit': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-ratelimit'},
+    'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-tokens'},
+}
+
+
+@pytest.fixture
+def ratelimit_cache():
+    """Cache de throttling local en mémoire."""
+    with override_settings(CACHES=LOCMEM_CACHES):
+        caches['ratelimit'].clear()
+        yield caches['ratelimit']
+        caches['ratelimit'].clear()
+
+
+class ThreePerMinuteThrottle(RedisAnonRateThrottle):
+    rate = '3/minute'
+
+
+def anon_request(ip='10.0.0.1', path='/api/producers/'):
+    request = Request(APIRequestFactory().get(path, REMOTE_ADDR=ip))
+    request.user = None
+    return request
+
+
+class TestSlidingWindow:
+    """Algorithme (identique au script Lua)."""
+
+    def test_limit_within_window(self):
+        state = None
+        for _ in range(3):
+            allowed, state, _, _ = sliding_window(state, 3, 60, 1000.0)
+            assert allowed
+        allowed, _, wait, _ = sliding_window(state, 3, 60, 1001.0)
+        assert not allowed
+        assert 0 < wait <= 60
+
+    def test_previous_window_is_weighted(self):
+        # 3 requêtes dans la fenêtre [960, 1020), puis au quart de la suivante :
+        # le compte précédent pèse encore 75 % → 2,25 + 1 > 3
+        state = None
+        for _ in range(3):
+            _, state, _, _ = sliding_window(state, 3, 60, 1000.0)
+        allowed, _, wait, _ = sliding_window(state, 3, 60, 1035.0)
+        assert not allowed
+        # Acceptée dès que le poids du précédent tombe à 2 (tiers de la fenêtre)
+        assert wait == pytest.approx(5.0, abs=0.01)
+        allowed, _, _, _ = sliding_window(state, 3, 60, 1035.0 + wait)
+        assert allowed
+
+    def test_old_windows_are_forgotten(self):
+        state = None
+        for _ in range(3):
+            _, state, _, _ = sliding_window(state, 3, 60, 1000.0)
+        allowed, state, _, _ = sliding_window(state, 3, 60, 1200.0)
+        assert allowed
+        assert state[1:] == (1, 0)
+
+    def test_cost_weighted(self):
+        allowed, state, _, _ = sliding_window(None, 10, 60, 0.0, cost=8)
+        assert allowed
+        allowed, _, _, _ = sliding_window(state, 10, 60, 1.0, cost=3)
+        assert not allowed
+
+
+class TestThrottleClass:
+    """Classes DRF sur un cache sans Redis."""
+
+    def test_blocks_after_limit_with_wait(self, ratelimit_cache):
+        throttle = ThreePerMinuteThrottle()
+        results = [throttle.allow_request(anon_request(), None) for _ in range(4)]
+        assert results == [True, True, True, False]
+        # Fenêtre précédente supposée uniforme : l'attente peut dépasser une fenêtre
+        assert 0 < throttle.wait() <= 120
+
+    def test_state_is_constant_size(self, ratelimit_cache):
+        throttle = ThreePerMinuteThrottle()
+        throttle.allow_request(anon_request(), None)
+        throttle.allow_request(anon_request(), None)
+        assert len(ratelimit_cache.get(throttle.key)) == 3
+
+    def test_idents_are_separate(self, ratelimit_cache):
+        throttle = ThreePerMinuteThrottle()
+        for _ in range(3):
+            throttle.allow_request(anon_request('10.0.0.1'), None)
+        assert throttle.allow_request(anon_request('10.0.0.2'), None)
+
+
+class TestLocalPreThrottle:
+    """Pré-throttle local synchronisé par lots."""
+
+    def make_throttle(self, batch, rate='100/minute'):
+        class LocalThrottle(RedisAnonRateThrottle):
+            pass
+        LocalThrottle.rate = rate
+        LocalThrottle.local_throttle = LocalPreThrottle(batch=batch, interval_ms=60000)
+        return LocalThrottle()
+
+    def test_under_limit_served_locally(self, ratelimit_cache):
+        throttle = self.make_throttle(batch=10)
+        assert all(throttle.allow_request(anon_request(), None) for _ in range(50))
+        stats = throttle.local_throttle.stats
+        assert stats['remote'] < 10
+        assert stats['local'] + stats['remote'] == 50
+
+    def test_limit_enforced_near_the_end(self, ratelimit_cache):
+        throttle = self.make_throttle(batch=10, rate='30/minute')
+        accepted = sum(throttle.allow_request(anon_request(), None) for _ in range(60))
+        assert accepted == 30
+
+    def test_fail_closed_policy(self, ratelimit_cache, monkeypatch, settings):
+        def broken(*args, **kwargs):
+            raise ConnectionError('redis down')
+        monkeypatch.setattr(ratelimit_cache, 'get', broken)
+        throttle = ThreePerMinuteThrottle()
+        settings.THROTTLE_FAIL_OPEN = True
+        assert throttle.allow_request(anon_request(), None)
+        settings.THROTTLE_FAIL_OPEN = False
+        assert not throttle.allow_request(anon_request(), None)
+
+
+class TestWeightedThrottle:
+    """Coûts déclarés par les vues et budget des requêtes lourdes."""
+
+    def view(self, action):
+        view = ProducerProfileViewSet()
+        view.action = action
+        return view
+
+    def test_costs_declared_on_viewset(self):
+        assert get_request_cost(anon_request(), self.view('list')) == 1
+        assert get_request_cost(anon_request(path='/api/producers/?search=ferme'), self.view('list')) == 2
+        assert get_request_cost(anon_request(), self.view('nearby')) == 5
+        # Un envoi groupé coûte autant que le maximum d'envois unitaires
+        photos = get_request_cost(anon_request(), self.view('photos'))
+        assert get_request_cost(anon_request(), self.view('photos_batch')) == photos * settings.PHOTO_BATCH_MAX_FILES
+        assert get_request_cost(anon_request(), None) == 1
+
+    def test_heavy_budget_consumes_cost_units(self, ratelimit_cache):
+        class TwentyUnitsThrottle(RedisHeavyAnonRateThrottle):
+            rate = '20/minute'
+        throttle = TwentyUnitsThrottle()
+        nearby = [throttle.allow_request(anon_request(), self.view('nearby')) for _ in range(5)]
+        assert nearby == [True, True, True, True, False]
+        # Les requêtes légères ne consomment pas ce budget
+        assert all(throttle.allow_request(anon_request(), self.view('list')) for _ in range(50))
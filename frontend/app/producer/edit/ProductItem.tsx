@@ -119,8 +119,8 @@ export function ProductItem({ product, onEdit, onDelete, onRefresh }: ProductIte
   }
 
   const handlePhotoUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
-    const file = e.target.files?.[0]
-    if (!file) return
+    const files = Array.from(e.target.files ?? [])
+    if (files.length === 0) return
 
     // Vérifier la limite de 5 photos
     if (product.photos && product.photos.length >= 5) {
@@ -133,8 +133,13 @@ export function ProductItem({ product, onEdit, onDelete, onRefresh }: ProductIte
 
     setUploadingPhoto(true)
     try {
-      await apiClient.uploadProductPhoto(product.id, file)
-      await onRefresh()
+      // Un seul envoi ; le serveur applique la limite et répond fichier par fichier
+      const results = await apiClient.uploadProductPhotos(product.id, files)
+      const refused = results.filter((r) => !r.created)
+      if (refused.length < results.length) await onRefresh()
+      if (refused.length > 0) {
+        alert(refused.map((r) => `${r.file_name} : ${r.errors?.join(' ') || 'refusée'}`).join('\n'))
+      }
     } catch (error: unknown) {
       const errorMessage = error instanceof Error ? error.message : 'Erreur lors de l\'upload'
       alert(errorMessage)
@@ -332,6 +337,7 @@ export function ProductItem({ product, onEdit, onDelete, onRefresh }: ProductIte
             ref={fileInputRef}
             type="file"
             accept="image/*"
+            multiple
             onChange={handlePhotoUpload}
             className="hidden"
           />
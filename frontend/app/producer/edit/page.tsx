@@ -92,9 +92,7 @@ export default function ProducerEditPage() {
 
   const loadProducer = async () => {
     try {
-      const producers = await apiClient.getProducers()
-      const list = producers.results ?? (Array.isArray(producers) ? producers : [])
-      const userProducer = list.find((p: ProducerProfile) => p.user.id === user?.id)
+      const userProducer: ProducerProfile | null = await apiClient.getMyProducer()
       if (userProducer) {
         setProducer(userProducer)
         const newFormData = {
@@ -318,12 +316,18 @@ export default function ProducerEditPage() {
     }
   }
 
-  const handlePhotoUpload = async (file: File) => {
+  const handlePhotoUpload = async (files: File[]) => {
     if (!producer) return
     try {
-      await apiClient.uploadPhoto(producer.id, file)
-      addToast('Photo ajoutée', 'success')
-      await loadProducer()
+      const results = await apiClient.uploadPhotos(producer.id, files)
+      const created = results.filter((r) => r.created).length
+      results
+        .filter((r) => !r.created)
+        .forEach((r) => addToast(`${r.file_name} : ${r.errors?.join(' ') || 'refusée'}`, 'error'))
+      if (created > 0) {
+        addToast(created > 1 ? `${created} photos ajoutées` : 'Photo ajoutée', 'success')
+        await loadProducer()
+      }
     } catch (err) {
       addToast(err instanceof Error ? err.message : 'Erreur', 'error')
     }
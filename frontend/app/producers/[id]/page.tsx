@@ -5,7 +5,7 @@ import { useParams } from 'next/navigation'
 import { apiClient } from '@/lib/api'
 import { LoadingSpinner } from '@/components/LoadingSpinner'
 import { ErrorMessage } from '@/components/ErrorMessage'
-import { getImageUrl } from '@/lib/imageUrl'
+import { getImageUrl, getPlaceholderStyle } from '@/lib/imageUrl'
 import { ProductCard } from '@/components/ProductCard'
 import { OpeningStatusBadge } from '@/components/OpeningStatusBadge'
 import { WeeklySchedule, SingleModeSchedule } from '@/components/WeeklySchedule'
@@ -105,6 +105,7 @@ export default function ProducerDetailPage() {
           <div className="relative h-64 md:h-96">
             <img
               src={getImageUrl(producer.photos[0].image_file)}
+              style={getPlaceholderStyle(producer.photos[0])}
               alt={producer.name}
               className="w-full h-full object-cover"
             />
@@ -334,6 +335,9 @@ export default function ProducerDetailPage() {
                   <div key={photo.id} className="relative h-48 rounded-lg overflow-hidden">
                     <img
                       src={getImageUrl(photo.image_file)}
+                      style={getPlaceholderStyle(photo)}
+                      loading="lazy"
+                      decoding="async"
                       alt={producer.name}
                       className="w-full h-full object-cover"
                     />
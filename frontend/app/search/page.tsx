@@ -3,7 +3,7 @@
 import { useEffect, useState, useCallback, Suspense } from 'react'
 import { useSearchParams } from 'next/navigation'
 import { apiClient } from '@/lib/api'
-import { getImageUrl } from '@/lib/imageUrl'
+import { getPlaceholderStyle, getThumbnailUrl } from '@/lib/imageUrl'
 import { LoadingSpinner } from '@/components/LoadingSpinner'
 import type { ProducerProfile } from '@/types'
 import Link from 'next/link'
@@ -68,7 +68,10 @@ function SearchPageContent() {
               {producer.photos && producer.photos.length > 0 && (
                 <div className="relative h-48">
                   <img
-                    src={getImageUrl(producer.photos[0].image_file)}
+                    src={getThumbnailUrl(producer.photos[0])}
+                    style={getPlaceholderStyle(producer.photos[0])}
+                    loading="lazy"
+                    decoding="async"
                     alt={producer.name}
                     className="w-full h-full object-cover"
                   />
@@ -7,7 +7,8 @@ import type { ProducerPhoto } from '@/types'
 
 interface PhotoManagerProps {
   photos: ProducerPhoto[]
-  onUpload: (file: File) => Promise<void>
+  /** Fichiers envoyés en un seul upload groupé */
+  onUpload: (files: File[]) => Promise<void>
   onDelete: (photoId: number) => Promise<void>
 }
 
@@ -15,12 +16,12 @@ export function PhotoManager({ photos, onUpload, onDelete }: PhotoManagerProps)
   const [uploading, setUploading] = useState(false)
 
   const handlePhotoUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
-    const file = e.target.files?.[0]
-    if (!file) return
+    const files = Array.from(e.target.files ?? [])
+    if (files.length === 0) return
 
     setUploading(true)
     try {
-      await onUpload(file)
+      await onUpload(files)
     } finally {
       setUploading(false)
       e.target.value = ''
@@ -40,11 +41,12 @@ export function PhotoManager({ photos, onUpload, onDelete }: PhotoManagerProps)
       </h2>
       <div className="mb-4">
         <label className="block text-sm font-medium text-gray-700 mb-2">
-          Ajouter une photo
+          Ajouter des photos
         </label>
         <input
           type="file"
           accept="image/*"
+          multiple
           onChange={handlePhotoUpload}
           disabled={uploading}
           className="block w-full text-sm text-earth-700 file:mr-4 file:py-3 file:px-6 file:rounded-2xl file:border-2 file:border-nature-300 file:text-sm file:font-bold file:bg-nature-100 file:text-nature-700 hover:file:bg-nature-200 transition-all"
@@ -61,6 +63,16 @@ export function PhotoManager({ photos, onUpload, onDelete }: PhotoManagerProps)
                   alt="Photo producteur"
                   className="w-full h-full object-cover"
                 />
+                {(photo.processing_status === 'pending' || photo.processing_status === 'processing') && (
+                  <span className="absolute bottom-2 left-2 bg-white/90 text-earth-700 px-2 py-1 rounded-lg text-xs font-semibold">
+                    Optimisation en cours...
+                  </span>
+                )}
+                {photo.processing_status === 'failed' && (
+                  <span className="absolute bottom-2 left-2 bg-red-500 text-white px-2 py-1 rounded-lg text-xs font-semibold">
+                    Image illisible
+                  </span>
+                )}
               </div>
               <button
                 type="button"
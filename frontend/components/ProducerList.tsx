@@ -3,7 +3,7 @@
 import { useState } from 'react'
 import Link from 'next/link'
 import Image from 'next/image'
-import { getImageUrl } from '@/lib/imageUrl'
+import { getThumbnailUrl } from '@/lib/imageUrl'
 import type { ProducerProfile } from '@/types'
 
 interface ProducerListProps {
@@ -44,9 +44,11 @@ export function ProducerList({ producers, onProducerClick, distances }: Producer
           {producer.photos && producer.photos.length > 0 && (
             <div className="relative h-56 rounded-t-3xl overflow-hidden">
               <Image
-                src={getImageUrl(producer.photos[0].image_file)}
+                src={getThumbnailUrl(producer.photos[0])}
                 alt={producer.name}
                 fill
+                placeholder={producer.photos[0].placeholder ? 'blur' : 'empty'}
+                blurDataURL={producer.photos[0].placeholder || undefined}
                 className="object-cover"
               />
             </div>
@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react'
 import { CategoryIcon } from '@/components/CategoryIcon'
-import { getImageUrl } from '@/lib/imageUrl'
+import { getImageUrl, getPlaceholderStyle, getThumbnailUrl } from '@/lib/imageUrl'
 import type { Product } from '@/types'
 
 interface ProductCardProps {
@@ -78,7 +78,10 @@ export function ProductCard({ product }: ProductCardProps) {
       return (
         <div className="w-full h-full cursor-pointer" onClick={() => openCarousel(0)}>
           <img
-            src={getImageUrl(validPhotos[0].image_file)}
+            src={getThumbnailUrl(validPhotos[0])}
+            style={getPlaceholderStyle(validPhotos[0])}
+            loading="lazy"
+            decoding="async"
             alt={`${product.name} - Photo 1`}
             className="w-full h-full object-cover"
             onError={(e) => {
@@ -99,7 +102,10 @@ export function ProductCard({ product }: ProductCardProps) {
               onClick={() => openCarousel(index)}
             >
               <img
-                src={getImageUrl(photo.image_file)}
+                src={getThumbnailUrl(photo)}
+                style={getPlaceholderStyle(photo)}
+                loading="lazy"
+                decoding="async"
                 alt={`${product.name} - Photo ${index + 1}`}
                 className="w-full h-full object-cover"
                 onError={(e) => {
@@ -120,7 +126,10 @@ export function ProductCard({ product }: ProductCardProps) {
             onClick={() => openCarousel(0)}
           >
             <img
-              src={getImageUrl(validPhotos[0].image_file)}
+              src={getThumbnailUrl(validPhotos[0])}
+              style={getPlaceholderStyle(validPhotos[0])}
+              loading="lazy"
+              decoding="async"
               alt={`${product.name} - Photo 1`}
               className="w-full h-full object-cover"
               onError={(e) => {
@@ -133,7 +142,10 @@ export function ProductCard({ product }: ProductCardProps) {
             onClick={() => openCarousel(1)}
           >
             <img
-              src={getImageUrl(validPhotos[1].image_file)}
+              src={getThumbnailUrl(validPhotos[1])}
+              style={getPlaceholderStyle(validPhotos[1])}
+              loading="lazy"
+              decoding="async"
               alt={`${product.name} - Photo 2`}
               className="w-full h-full object-cover"
               onError={(e) => {
@@ -146,7 +158,10 @@ export function ProductCard({ product }: ProductCardProps) {
             onClick={() => openCarousel(2)}
           >
             <img
-              src={getImageUrl(validPhotos[2].image_file)}
+              src={getThumbnailUrl(validPhotos[2])}
+              style={getPlaceholderStyle(validPhotos[2])}
+              loading="lazy"
+              decoding="async"
               alt={`${product.name} - Photo 3`}
               className="w-full h-full object-cover"
               onError={(e) => {
@@ -168,7 +183,10 @@ export function ProductCard({ product }: ProductCardProps) {
               onClick={() => openCarousel(index)}
             >
               <img
-                src={getImageUrl(photo.image_file)}
+                src={getThumbnailUrl(photo)}
+                style={getPlaceholderStyle(photo)}
+                loading="lazy"
+                decoding="async"
                 alt={`${product.name} - Photo ${index + 1}`}
                 className="w-full h-full object-cover"
                 onError={(e) => {
@@ -188,7 +206,10 @@ export function ProductCard({ product }: ProductCardProps) {
           onClick={() => openCarousel(0)}
         >
           <img
-            src={getImageUrl(validPhotos[0].image_file)}
+            src={getThumbnailUrl(validPhotos[0])}
+            style={getPlaceholderStyle(validPhotos[0])}
+            loading="lazy"
+            decoding="async"
             alt={`${product.name} - Photo 1`}
             className="w-full h-full object-cover"
             onError={(e) => {
@@ -201,7 +222,10 @@ export function ProductCard({ product }: ProductCardProps) {
           onClick={() => openCarousel(1)}
         >
           <img
-            src={getImageUrl(validPhotos[1].image_file)}
+            src={getThumbnailUrl(validPhotos[1])}
+            style={getPlaceholderStyle(validPhotos[1])}
+            loading="lazy"
+            decoding="async"
             alt={`${product.name} - Photo 2`}
             className="w-full h-full object-cover"
             onError={(e) => {
@@ -216,7 +240,10 @@ export function ProductCard({ product }: ProductCardProps) {
             onClick={() => openCarousel(index + 2)}
           >
             <img
-              src={getImageUrl(photo.image_file)}
+              src={getThumbnailUrl(photo)}
+              style={getPlaceholderStyle(photo)}
+              loading="lazy"
+              decoding="async"
               alt={`${product.name} - Photo ${index + 3}`}
               className="w-full h-full object-cover"
               onError={(e) => {
@@ -1,5 +1,6 @@
 import axios, { AxiosInstance } from 'axios'
 import Cookies from 'js-cookie'
+import type { PhotoUploadResult, ProducerPhoto, ProductPhoto } from '@/types'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL?.startsWith('http')
   ? process.env.NEXT_PUBLIC_API_URL
@@ -10,14 +11,30 @@ const API_URL = process.env.NEXT_PUBLIC_API_URL?.startsWith('http')
 const axiosInstance: AxiosInstance = axios.create({
   baseURL: API_URL,
   headers: { 'Content-Type': 'application/json' },
+  // 304 : réponse conditionnelle, on renvoie la copie locale (voir etagCache)
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 })
 
+/**
+ * Réponses GET mémorisées avec leur ETag : on envoie If-None-Match et, sur un 304,
+ * on réutilise les données sans les retélécharger. Taille bornée (ordre d'insertion).
+ */
+const ETAG_CACHE_MAX_ENTRIES = 100
+const etagCache = new Map<string, { etag: string; data: unknown }>()
+
+function etagCacheKey(config: { method?: string; url?: string; params?: unknown }): string | null {
+  if ((config.method ?? 'get').toLowerCase() !== 'get') return null
+  return axiosInstance.getUri(config)
+}
+
 /** Endpoints publics : on n'envoie jamais le token (évite 401, pas de logique de retry) */
 function isPublicEndpoint(config: { url?: string; method?: string }): boolean {
   const u = (config.url ?? '').split('?')[0]
   const m = (config.method ?? 'get').toLowerCase()
   if (u.includes('/auth/login') || u.includes('/auth/register') || u.includes('/auth/token/refresh'))
     return true
+  // Profil du producteur connecté : authentifié (refresh du token sur 401)
+  if (u.includes('/producers/me/')) return false
   // GET producers/products : public pour liste, mais on envoie le token si dispo (cache backend)
   if (m === 'get' && (u.includes('/producers/') || u.includes('/products/'))) return true
   return false
@@ -32,6 +49,9 @@ axiosInstance.interceptors.request.use(
       const token = Cookies.get('access_token')
       if (token) config.headers.Authorization = `Bearer ${token}`
     }
+    const key = etagCacheKey(config)
+    const cached = key ? etagCache.get(key) : undefined
+    if (cached) config.headers['If-None-Match'] = cached.etag
     return config
   },
   (e) => Promise.reject(e)
@@ -39,7 +59,25 @@ axiosInstance.interceptors.request.use(
 
 /** Refresh token uniquement pour les requêtes authentifiées qui ont échoué */
 axiosInstance.interceptors.response.use(
-  (r) => r,
+  (r) => {
+    const key = etagCacheKey(r.config)
+    if (!key) return r
+    if (r.status === 304) {
+      const cached = etagCache.get(key)
+      if (cached) return { ...r, status: 200, data: cached.data }
+      return r
+    }
+    const etag = r.headers?.etag
+    if (etag) {
+      etagCache.delete(key)
+      etagCache.set(key, { etag, data: r.data })
+      if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+        const oldest = etagCache.keys().next().value
+        if (oldest !== undefined) etagCache.delete(oldest)
+      }
+    }
+    return r
+  },
   async (err) => {
     const req = err.config
     if (err.response?.status !== 401 || req._retry || isPublicEndpoint(req))
@@ -53,6 +91,8 @@ axiosInstance.interceptors.response.use(
     try {
       const { data } = await axios.post(`${API_URL}/auth/token/refresh/`, { refresh })
       Cookies.set('access_token', data.access, { expires: 1 })
+      // Rotation : l'ancien refresh token est révoqué, on garde le nouveau
+      if (data.refresh) Cookies.set('refresh_token', data.refresh, { expires: 7 })
       req.headers.Authorization = `Bearer ${data.access}`
       return axiosInstance(req)
     } catch {
@@ -63,6 +103,24 @@ axiosInstance.interceptors.response.use(
   }
 )
 
+/**
+ * Upload groupé de photos (champ image_files) : un résultat par fichier, y compris
+ * quand aucun n'est accepté (400 avec results).
+ */
+function postPhotoBatch<P>(url: string, files: File[]): Promise<PhotoUploadResult<P>[]> {
+  const fd = new FormData()
+  files.forEach((file) => fd.append('image_files', file))
+  return axiosInstance.post(url, fd, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 400,
+  }).then((r) => {
+    if (!Array.isArray(r.data?.results)) {
+      throw new Error(r.data?.image_files?.[0] ?? r.data?.error ?? 'Erreur lors de l\'upload')
+    }
+    return r.data.results
+  })
+}
+
 export const apiClient = {
   login: (creds: { email: string; password: string }) =>
     axiosInstance.post('/auth/login/', { email: creds.email, password: creds.password }).then((r) => {
@@ -72,15 +130,25 @@ export const apiClient = {
     }),
   register: (data: unknown) => axiosInstance.post('/auth/register/', data).then((r) => r.data),
   logout: () => {
+    // Révocation côté serveur (liste noire des tokens), sans bloquer la déconnexion locale
+    const access = Cookies.get('access_token')
+    const refresh = Cookies.get('refresh_token')
+    if (access)
+      axiosInstance
+        .post('/auth/logout/', { refresh }, { headers: { Authorization: `Bearer ${access}` } })
+        .catch(() => {})
     Cookies.remove('access_token')
     Cookies.remove('refresh_token')
+    etagCache.clear()
   },
   getMe: () => axiosInstance.get('/auth/me/').then((r) => r.data),
   updateMe: (data: unknown) => axiosInstance.patch('/auth/me/', data).then((r) => r.data),
   changePassword: (data: { old_password: string; new_password: string }) =>
     axiosInstance.post('/auth/change-password/', data).then((r) => r.data),
   deleteAccount: (password: string) =>
-    axiosInstance.post('/auth/delete-account/', { password }).then((r) => r.data),
+    axiosInstance
+      .post('/auth/delete-account/', { password, refresh: Cookies.get('refresh_token') })
+      .then((r) => r.data),
 
   getProducers: (params?: { search?: string; categories?: string[] }) => {
     const q: Record<string, string> = {}
@@ -89,6 +157,15 @@ export const apiClient = {
     return axiosInstance.get('/producers/', { params: q }).then((r) => r.data)
   },
   getProducer: (id: number) => axiosInstance.get(`/producers/${id}/`).then((r) => r.data),
+  /** Profil producteur de l'utilisateur connecté, null s'il n'en a pas encore */
+  getMyProducer: () =>
+    axiosInstance
+      .get('/producers/me/')
+      .then((r) => r.data)
+      .catch((e) => {
+        if (e.response?.status === 404) return null
+        throw e
+      }),
   getNearbyProducers: (params: {
     latitude: number
     longitude: number
@@ -110,13 +187,8 @@ export const apiClient = {
   updateProducer: (id: number, data: FormData | Record<string, unknown>) =>
     axiosInstance.patch(`/producers/${id}/`, data).then((r) => r.data),
 
-  uploadPhoto: (producerId: number, file: File) => {
-    const fd = new FormData()
-    fd.append('image_file', file)
-    return axiosInstance.post(`/producers/${producerId}/photos/`, fd, {
-      headers: { 'Content-Type': 'multipart/form-data' },
-    }).then((r) => r.data)
-  },
+  uploadPhotos: (producerId: number, files: File[]) =>
+    postPhotoBatch<ProducerPhoto>(`/producers/${producerId}/photos/batch/`, files),
   deletePhoto: (photoId: number) => axiosInstance.delete(`/photos/${photoId}/`).then((r) => r.data),
 
   getSaleModes: (producerId: number) =>
@@ -134,13 +206,8 @@ export const apiClient = {
   updateProduct: (productId: number, data: unknown) =>
     axiosInstance.patch(`/products/${productId}/`, data).then((r) => r.data),
   deleteProduct: (productId: number) => axiosInstance.delete(`/products/${productId}/`).then((r) => r.data),
-  uploadProductPhoto: (productId: number, file: File) => {
-    const fd = new FormData()
-    fd.append('image_file', file)
-    return axiosInstance.post(`/products/${productId}/photos/`, fd, {
-      headers: { 'Content-Type': 'multipart/form-data' },
-    }).then((r) => r.data)
-  },
+  uploadProductPhotos: (productId: number, files: File[]) =>
+    postPhotoBatch<ProductPhoto>(`/products/${productId}/photos/batch/`, files),
   deleteProductPhoto: (photoId: number) =>
     axiosInstance.delete(`/products/photos/${photoId}/`).then((r) => r.data),
 }
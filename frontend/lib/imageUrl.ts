@@ -1,3 +1,5 @@
+import type { CSSProperties } from 'react'
+
 const getBaseUrl = () => {
   const api = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api'
   return api.replace('/api', '')
@@ -10,3 +12,18 @@ export function getImageUrl(imagePath: string | null | undefined): string {
   const path = imagePath.startsWith('/media/') ? imagePath : `/media/${imagePath.replace(/^\/+/, '')}`
   return `${base}${path}`
 }
+
+/** Vignette d'une photo pour les listes (déclinaison réduite, l'original à défaut) */
+export function getThumbnailUrl(photo: { image_file: string; thumbnail?: string | null } | null | undefined): string {
+  return getImageUrl(photo?.thumbnail || photo?.image_file)
+}
+
+/** Fond flouté affiché sous une vignette le temps qu'elle se charge */
+export function getPlaceholderStyle(photo: { placeholder?: string } | null | undefined): CSSProperties | undefined {
+  if (!photo?.placeholder) return undefined
+  return {
+    backgroundImage: `url("${photo.placeholder}")`,
+    backgroundSize: 'cover',
+    backgroundPosition: 'center',
+  }
+}
@@ -26,12 +26,30 @@ export interface ProducerProfile {
   updated_at: string
 }
 
+export type PhotoProcessingStatus = 'pending' | 'processing' | 'ready' | 'failed'
+
 export interface ProducerPhoto {
   id: number
   image_file: string
+  /** Déclinaison réduite pour les listes */
+  thumbnail?: string | null
+  /** srcset par format, ex: { webp: "…_160.webp 160w, …_480.webp 480w" } */
+  srcset?: Partial<Record<'webp' | 'jpeg', string>>
+  /** Image minuscule (data URI) à afficher floutée pendant le chargement */
+  placeholder?: string
+  /** Traitement en arrière-plan (déclinaisons) */
+  processing_status?: PhotoProcessingStatus
   created_at: string
 }
 
+/** Résultat d'un fichier dans un upload groupé (photos/batch/) */
+export interface PhotoUploadResult<P = ProducerPhoto> {
+  file_name: string
+  created: boolean
+  photo?: P
+  errors?: string[]
+}
+
 export interface ProductCategory {
   id: number
   name: string
@@ -43,6 +61,14 @@ export interface ProductCategory {
 export interface ProductPhoto {
   id: number
   image_file: string
+  /** Déclinaison réduite pour les listes */
+  thumbnail?: string | null
+  /** srcset par format, ex: { webp: "…_160.webp 160w, …_480.webp 480w" } */
+  srcset?: Partial<Record<'webp' | 'jpeg', string>>
+  /** Image minuscule (data URI) à afficher floutée pendant le chargement */
+  placeholder?: string
+  /** Traitement en arrière-plan (déclinaisons) */
+  processing_status?: PhotoProcessingStatus
   created_at: string
 }
 